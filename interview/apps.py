@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class InterviewConfig(AppConfig):
     name = "interview"
+
+    def ready(self):
+        # connect reference data and recipients cache invalidation, responsibles recomputation
+        from interview import recipients, refdata, responsibles  # noqa: F401
@@ -0,0 +1,6 @@
+from interview import refdata
+
+
+def reference_data(request):
+    """Cached reference data, rows are only loaded when a template uses them"""
+    return {"subsidiaries": refdata.subsidiaries}
@@ -28,3 +28,12 @@ def privilege_level_check(authorised_level=None):
         return wrapper
 
     return decorator
+
+
+def global_subsidiary_filter_exempt(view_func):
+    """
+    Mark a view not rendering pages (ajax, feed, webhook...), GlobalSubsidiaryFilterMiddleware neither touches
+    its session nor its request.GET
+    """
+    view_func.global_subsidiary_filter_exempt = True
+    return view_func
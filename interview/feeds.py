@@ -13,6 +13,8 @@ from ref.models import Subsidiary, PyouPyouUser
 class AbstractPyoupyouInterviewFeed(ICalFeed):
 
     timezone = "Europe/Paris"
+    # token authenticated, without session
+    global_subsidiary_filter_exempt = True
 
     def __call__(self, request, *args, **kwargs):
         user = PyouPyouUser.objects.filter(token=kwargs["token"]).first()
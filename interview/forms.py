@@ -9,6 +9,7 @@ from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Div, Submit, Column, Field
 from django_select2.forms import ModelSelect2MultipleWidget, ModelSelect2Widget
 
+from interview import refdata
 from interview.models import Interview, Candidate, Process, Sources, Offer
 from ref.models import PyouPyouUser
 from interview.widgets import UploadFilesWidget
@@ -33,11 +34,23 @@ class SourcesWidget(ModelSelect2Widget):
     search_fields = ["name__icontains"]
 
 
+class CachedChoicesMixin:
+    """Render choices of model choice fields from the reference data cache, see interview.refdata"""
+
+    # field name: refdata accessor
+    cached_choices = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, rows in self.cached_choices.items():
+            refdata.set_choices(self.fields[name], rows())
+
+
 class ProcessCandidateForm(forms.ModelForm):
     class Meta:
         model = Candidate
         helper = FormHelper()
-        exclude = ("anonymized", "anonymized_hashed_name", "anonymized_hashed_email")
+        fields = ("name", "email", "phone", "linkedin_url")
 
     candidate_documents = forms.FileField(
         label=_("Upload documents (CV / Cover Letter / Other)"), required=False, widget=UploadFilesWidget()
@@ -78,7 +91,9 @@ class SelectOrCreateOffer(ModelSelect2Widget):
         return mark_safe("\n".join(output))
 
 
-class ProcessForm(forms.ModelForm):
+class ProcessForm(CachedChoicesMixin, forms.ModelForm):
+    cached_choices = {"subsidiary": refdata.subsidiaries, "contract_type": refdata.contract_types}
+
     class Meta:
         model = Process
         exclude = [
@@ -99,7 +114,9 @@ class ProcessForm(forms.ModelForm):
     helper.form_tag = False
 
 
-class SourceForm(forms.ModelForm):
+class SourceForm(CachedChoicesMixin, forms.ModelForm):
+    cached_choices = {"category": refdata.sources_categories}
+
     class Meta:
         model = Sources
         fields = ["category", "name"]
@@ -108,7 +125,9 @@ class SourceForm(forms.ModelForm):
     helper.form_tag = False
 
 
-class OfferForm(forms.ModelForm):
+class OfferForm(CachedChoicesMixin, forms.ModelForm):
+    cached_choices = {"subsidiary": refdata.subsidiaries}
+
     class Meta:
         model = Offer
         fields = ["subsidiary", "name"]
@@ -117,7 +136,9 @@ class OfferForm(forms.ModelForm):
     helper.form_tag = False
 
 
-class InterviewersForm(forms.ModelForm):
+class InterviewersForm(CachedChoicesMixin, forms.ModelForm):
+    cached_choices = {"kind_of_interview": refdata.interview_kinds}
+
     def clean(self):
         cleaned_data = super().clean()
         interviewers = cleaned_data.get("interviewers")
@@ -139,7 +160,9 @@ class InterviewersForm(forms.ModelForm):
     helper.form_tag = False
 
 
-class InterviewFormPlan(forms.ModelForm):
+class InterviewFormPlan(CachedChoicesMixin, forms.ModelForm):
+    cached_choices = {"kind_of_interview": refdata.interview_kinds}
+
     class Meta:
         model = Interview
         fields = ["planned_date", "kind_of_interview"]
@@ -150,7 +173,9 @@ class InterviewFormPlan(forms.ModelForm):
     helper.layout = Layout(Div(Column("planned_date", "kind_of_interview"), css_class="relative"))
 
 
-class InterviewFormEditInterviewers(forms.ModelForm):
+class InterviewFormEditInterviewers(CachedChoicesMixin, forms.ModelForm):
+    cached_choices = {"kind_of_interview": refdata.interview_kinds}
+
     class Meta:
         model = Interview
         fields = ["interviewers", "kind_of_interview", "goal", "prequalification"]
@@ -168,7 +193,9 @@ class MultipleFileInput(forms.ClearableFileInput):
     allow_multiple_selected = True
 
 
-class InterviewMinuteForm(forms.ModelForm):
+class InterviewMinuteForm(CachedChoicesMixin, forms.ModelForm):
+    cached_choices = {"kind_of_interview": refdata.interview_kinds}
+
     class Meta:
         model = Interview
         fields = ["minute", "next_interview_goal", "kind_of_interview"]
@@ -188,6 +215,16 @@ class CandidateForm(forms.ModelForm):
     helper.add_input(Submit("summit", _("Save"), css_class="btn-primary"))
 
 
+class NotificationSettingsForm(forms.ModelForm):
+    class Meta:
+        model = PyouPyouUser
+        fields = ["notification_frequency"]
+
+    helper = FormHelper()
+    helper.form_method = "POST"
+    helper.add_input(Submit("summit", _("Save"), css_class="btn-primary"))
+
+
 class CloseForm(forms.ModelForm):
     class Meta:
         model = Process
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from django.db.models import Aggregate, TextField, Value
+
+
+class GroupConcat(Aggregate):
+    """
+    Concatenate grouped values into a single string, supported on SQLite and MySQL/MariaDB
+
+    Values order is not guaranteed.
+    """
+
+    function = "GROUP_CONCAT"
+    output_field = TextField()
+
+    def __init__(self, expression, separator=",", **extra):
+        super().__init__(expression, Value(separator), **extra)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, arg_joiner=" SEPARATOR ", **extra_context)
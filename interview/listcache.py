@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of processes lists
+
+Lists are cached per user and filters along with the data version of the subsidiaries they show. A subsidiary
+version is replaced whenever one of its processes, their candidates, interviews or interviewers change, which
+invalidates every list showing this subsidiary. Lists not restricted to a subsidiary follow a global version
+replaced on any change. Entries also expire after settings.PROCESS_LIST_CACHE_TIMEOUT seconds as some columns
+depend on the current date (stale processes, recently closed processes...).
+
+Versions are only seen by other workers if CACHES default backend is shared between them, lists are not cached
+with the default local memory backend unless settings.PROCESS_LIST_CACHE is set.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django_tables2.data import TableQuerysetData
+
+VERSION_KEY = "processes:version:{subsidiary}"
+ALL_SUBSIDIARIES = "all"
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _set_versions(subsidiary_ids):
+    cache.set_many(
+        {VERSION_KEY.format(subsidiary=subsidiary): _new_version() for subsidiary in subsidiary_ids}, timeout=None
+    )
+
+
+def bump(*subsidiary_ids):
+    """Invalidate processes lists showing any of these subsidiaries"""
+    subsidiary_ids = {subsidiary_id for subsidiary_id in subsidiary_ids if subsidiary_id is not None}
+    subsidiary_ids.add(ALL_SUBSIDIARIES)
+    _set_versions(subsidiary_ids)
+    # again once committed, a list may have been cached in between without the change
+    transaction.on_commit(lambda: _set_versions(subsidiary_ids))
+
+
+def enabled():
+    # refdata imports models, which import this module
+    from interview import refdata
+
+    if settings.PROCESS_LIST_CACHE is not None:
+        return settings.PROCESS_LIST_CACHE
+    return refdata.shared_cache()
+
+
+def list_key(name, user, subsidiary=None):
+    """
+    Cache key of user processes list identified by name (view, table and arguments), restricted to subsidiary
+
+    None when lists are not cached.
+    """
+    # refdata imports models, which import this module
+    from interview import refdata
+
+    if not enabled():
+        return None
+
+    version_key = VERSION_KEY.format(subsidiary=subsidiary.id if subsidiary else ALL_SUBSIDIARIES)
+    parts = (
+        name,
+        user.pk,
+        user.date_joined,
+        user.privilege,
+        user.company_id,
+        user.limited_to_source_id,
+        # subsidiaries, sources, contract types... names are displayed
+        refdata.version(),
+        cache.get_or_set(version_key, _new_version, timeout=None),
+    )
+    return "processes:list:" + hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def cached_list(key, build):
+    """Rows returned by build(), cached under key"""
+    if key is None:
+        return list(build())
+    return cache.get_or_set(key, lambda: list(build()), settings.PROCESS_LIST_CACHE_TIMEOUT)
+
+
+class CachedTableData(TableQuerysetData):
+    """
+    Table data of a processes queryset whose count and pages are cached under key
+
+    Table sort and page are part of pages keys, so the queryset is only run on cache miss. Nothing is cached when
+    key is None.
+    """
+
+    def __init__(self, data, key):
+        super().__init__(data)
+        self.key = key
+
+    def __len__(self):
+        if self.key is None:
+            return super().__len__()
+        if getattr(self, "_length", None) is None:
+            self._length = cache.get_or_set(self.key + ":count", super().__len__, settings.PROCESS_LIST_CACHE_TIMEOUT)
+        return self._length
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or self.key is None:
+            return super().__getitem__(key)
+        page_key = "{key}:{order}:{start}:{stop}".format(
+            key=self.key,
+            order=hashlib.md5(repr(self.data.query.order_by).encode()).hexdigest(),
+            start=key.start,
+            stop=key.stop,
+        )
+        return cached_list(page_key, lambda: self.data[key])
@@ -1,22 +1,34 @@
 from dateutil.relativedelta import relativedelta
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+import json
 import logging
+import shutil
+import time
+from pathlib import Path
+from django.conf import settings
 from django.core.management import BaseCommand
+from django.db import transaction
 from django.utils.timezone import now
 
-from interview.models import Process, Candidate
+from interview import listcache, responsibles
+from interview.models import Candidate, Document, Interview, Process, SearchDocument
 
 logger = logging.getLogger("pyoupyou.batch")
 
 """
-Usage: ./manage.py anonymize [date]
+Usage: ./manage.py anonymize [date] [--batch-size 500] [--workers 8] [--dry-run] [--restart]
 
 Will anonymize candidate not hired whose process stopped before date.
 
 `date` must have format "2020-12-10"
 By defaut date is 12 months ago.
 
+Candidates are anonymized batch-size at a time: their documents directories are removed by a pool of workers
+threads, then their data, processes and interviews are wiped with bulk updates in one transaction. The last
+anonymized candidate is recorded in settings.ANONYMIZE_CHECKPOINT_FILE so that an interrupted run for the same
+date resumes after it, --restart ignores it. --dry-run only reports what would be anonymized.
 """
 
 
@@ -24,32 +36,119 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         # Positional arguments
         parser.add_argument("date", nargs="?", type=str)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=8, help="threads removing documents directories")
+        parser.add_argument("--dry-run", action="store_true", help="only report counts")
+        parser.add_argument("--restart", action="store_true", help="ignore the checkpoint of a previous run")
 
     def handle(self, *args, **options):
         current_date = (
             date.fromisoformat(options["date"]) if options["date"] else now().date() - relativedelta(months=12)
         )
         logger.info("Start batch anonymization {}".format(current_date))
+        start = time.perf_counter()
 
         candidates_with_only_closed_process = (
             Candidate.objects.filter(anonymized=False)
-            .prefetch_related("process_set")
             .filter(process__end_date__isnull=False)
             .filter(process__end_date__lte=current_date)
             .exclude(process__state__in=Process.OPEN_STATE_VALUES)
         )
+        candidate_ids = candidates_with_only_closed_process.order_by("id").values_list("id", flat=True).distinct()
 
-        for candidate in candidates_with_only_closed_process:
-            logger.info("Anonymizing candidate {candidate_id}".format(candidate_id=candidate.id))
-            candidate.anonymize()
-            candidate.save()
+        if options["dry_run"]:
+            counts = count_anonymized(candidate_ids)
+            report = "{candidates} candidates, {processes} processes, {interviews} interviews and {documents} documents"
+            self.stdout.write((report + " to anonymize").format(**counts))
+            logger.info("End batch anonymization, dry run")
+            return
 
-            for proc in candidate.process_set.all():
-                for interview in proc.interview_set.all():
-                    interview.anonymize()
-                    interview.save(trigger_notification=False)
+        checkpoint = Checkpoint(settings.ANONYMIZE_CHECKPOINT_FILE, current_date)
+        last_id = None if options["restart"] else checkpoint.load()
+        if last_id is not None:
+            logger.info("Resuming after candidate {candidate_id}".format(candidate_id=last_id))
+            candidate_ids = candidate_ids.filter(id__gt=last_id)
 
-                proc.anonymize()
-                proc.save(trigger_notification=False)
+        anonymized = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            while True:
+                batch = list(candidate_ids[: options["batch_size"]])
+                if not batch:
+                    break
+                anonymize_batch(batch, executor)
+                checkpoint.save(batch[-1])
+                candidate_ids = candidate_ids.filter(id__gt=batch[-1])
+                anonymized += len(batch)
+                logger.info("{count} candidates anonymized".format(count=anonymized))
+        checkpoint.clear()
 
-        logger.info("End batch anonymization")
+        report = "{count} candidates anonymized in {duration:.2f}s".format(
+            count=anonymized, duration=time.perf_counter() - start
+        )
+        self.stdout.write(report)
+        logger.info("End batch anonymization, {}".format(report))
+
+
+def count_anonymized(candidate_ids):
+    return {
+        "candidates": candidate_ids.count(),
+        "processes": Process.objects.filter(candidate_id__in=candidate_ids).count(),
+        "interviews": Interview.objects.filter(process__candidate_id__in=candidate_ids).count(),
+        "documents": Document.objects.filter(candidate_id__in=candidate_ids).count(),
+    }
+
+
+def anonymize_batch(candidate_ids, executor):
+    """
+    Anonymize candidates as Candidate, Process and Interview anonymize() and save() would, removing documents
+    directories with executor
+    """
+    candidates = Candidate.objects.filter(id__in=candidate_ids).only("id", "name")
+    paths = [path for candidate in candidates for path in candidate.documents_dirs()]
+    # like Candidate.anonymize, files are removed first, a failed batch is anonymized again on next run
+    list(executor.map(lambda path: shutil.rmtree(path, ignore_errors=True), paths))
+
+    processes = Process.objects.filter(candidate_id__in=candidate_ids)
+    with transaction.atomic():
+        Document.objects.filter(candidate_id__in=candidate_ids).delete()
+        Candidate.objects.filter(id__in=candidate_ids).update(
+            name="", email="", phone="", linkedin_url="", anonymized=True
+        )
+        processes.update(other_informations="")
+        Interview.objects.filter(process__candidate_id__in=candidate_ids).update(
+            minute="", goal="", next_interview_goal=""
+        )
+
+        process_ids = list(processes.values_list("id", flat=True))
+        responsibles.recompute(Process.objects.filter(id__in=process_ids))
+        SearchDocument.objects.refresh(process_ids)
+        listcache.bump(*processes.values_list("subsidiary_id", flat=True).distinct())
+
+
+class Checkpoint:
+    """Last candidate anonymized by a run for date, stored in path"""
+
+    def __init__(self, path, date):
+        self.path = Path(path)
+        self.date = date.isoformat()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+        if checkpoint["date"] != self.date:
+            logger.info("Ignoring checkpoint of a run for {date}".format(date=checkpoint["date"]))
+            return None
+        return checkpoint["last_candidate_id"]
+
+    def save(self, candidate_id):
+        with open(self.path, "w") as f:
+            json.dump({"date": self.date, "last_candidate_id": candidate_id}, f)
+
+    def clear(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
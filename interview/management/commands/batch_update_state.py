@@ -2,27 +2,129 @@ import time
 
 import logging
 from django.core.management import BaseCommand
+from django.db import transaction
 from django.utils.timezone import now
 from email.utils import parsedate_to_datetime
 
-from interview.models import Interview, Process
+from interview import listcache, notifications, responsibles
+from interview.unitofwork import deferred_process_updates
+from interview.models import AnalyticsFact, Interview, Process
 
 
 logger = logging.getLogger("pyoupyou.batch")
 
+"""
+Usage: ./manage.py batch_update_state [current_date] [--batch-size 2000] [--per-interview]
+
+Move interviews still planned after their planned date (default now) to wait information, processes whose last
+interview is moved wait for its minute. Interviews and processes are updated with one UPDATE per batch, then
+responsibles and analytics of their processes are recomputed in bulk. --per-interview saves interviews one by
+one instead. Reports the number of interviews and processes moved.
+"""
+
 
 class Command(BaseCommand):
     def add_arguments(self, parser):
         # Positional arguments
         parser.add_argument("current_date", nargs="?", type=str)
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--per-interview", action="store_true", help="save each interview")
 
     def handle(self, *args, **options):
         current_date = parsedate_to_datetime(options["current_date"]) if options["current_date"] else now()
         logger.info("Start batch update state {}".format(current_date))
-        for i in Interview.objects.filter(
+        start = time.perf_counter()
+        overdue = Interview.objects.filter(
             planned_date__lte=current_date, process__state__in=Process.OPEN_STATE_VALUES, state=Interview.PLANNED
-        ):
+        )
+        if options["per_interview"]:
+            interviews_count, processes_count = save_each(overdue)
+        else:
+            interviews_count, processes_count = move_to_wait_information(overdue, options["batch_size"])
+
+        report = (
+            "{interviews} interviews moved to wait information, {processes} processes moved to wait interview minute"
+            " in {duration:.2f}s"
+        )
+        report = report.format(
+            interviews=interviews_count, processes=processes_count, duration=time.perf_counter() - start
+        )
+        self.stdout.write(report)
+        logger.info("End batch update state, {}".format(report))
+
+
+def save_each(interviews):
+    interviews_count = 0
+    with deferred_process_updates() as work:
+        for i in interviews:
             logger.info("Interview {i} - state moved to Wait information".format(i=i))
             i.state = Interview.WAIT_INFORMATION
             i.save()
-        logger.info("End batch update state")
+            interviews_count += 1
+        # processes are saved at the end of the block
+        processes = [(process, process.state) for process, _, _ in work.processes.values()]
+    processes_count = sum(1 for process, state in processes if process.state == Process.WAITING_ITW_MINUTE != state)
+    return interviews_count, processes_count
+
+
+def move_to_wait_information(interviews, batch_size):
+    """
+    Move interviews to wait information and update their processes as their saves would, batch_size interviews
+    at a time
+
+    Returns the number of interviews moved to wait information and of processes moved to wait interview minute.
+    """
+    rows = list(interviews.order_by("id").values_list("id", "process_id", "process__subsidiary_id"))
+    interviews_count = processes_count = 0
+    # processes notifications are sent once all batches are committed
+    with notifications.collecting():
+        for start in range(0, len(rows), batch_size):
+            interviews_moved, processes_moved = _move_batch(rows[start : start + batch_size])
+            interviews_count += interviews_moved
+            processes_count += processes_moved
+    return interviews_count, processes_count
+
+
+def _move_batch(rows):
+    interview_ids = {interview_id for interview_id, _, _ in rows}
+    process_ids = {process_id for _, process_id, _ in rows}
+    with transaction.atomic():
+        # interviews changed meanwhile are left as is
+        moved = Interview.objects.filter(id__in=interview_ids, state=Interview.PLANNED).update(
+            state=Interview.WAIT_INFORMATION
+        )
+
+        last_interviews = {}
+        for interview_id, process_id, state in (
+            Interview.objects.filter(process_id__in=process_ids)
+            .order_by("process", "rank")
+            .values_list("id", "process_id", "state")
+        ):
+            last_interviews[process_id] = (interview_id, state)
+        # processes follow their last interview only
+        following = [
+            process_id
+            for process_id, (interview_id, state) in last_interviews.items()
+            if interview_id in interview_ids and state == Interview.WAIT_INFORMATION
+        ]
+        changed = list(
+            Process.objects.filter(id__in=following, state__in=Process.OPEN_STATE_VALUES)
+            .exclude(state=Process.WAITING_ITW_MINUTE)
+            .select_related("candidate", "subsidiary")
+        )
+        last_state_change = now()
+        Process.objects.filter(id__in=[process.id for process in changed]).update(
+            state=Process.WAITING_ITW_MINUTE, last_state_change=last_state_change
+        )
+
+        responsibles.recompute(Process.objects.filter(id__in=process_ids))
+        # search documents do not hold states
+        AnalyticsFact.objects.refresh(process_ids)
+        listcache.bump(*{subsidiary_id for _, _, subsidiary_id in rows})
+
+        for process in changed:
+            logger.info("Process {process} - state moved to Waiting interview minute".format(process=process))
+            process.state = Process.WAITING_ITW_MINUTE
+            process.last_state_change = last_state_change
+            process.trigger_notification(is_new=False)
+    return moved, len(changed)
@@ -0,0 +1,199 @@
+import datetime
+import functools
+import random
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from interview import reports, responsibles
+from interview.models import Candidate, Interview, Process, ResponsibleRule, Sources
+from ref.models import PyouPyouUser, Subsidiary
+
+"""
+Benchmark reports engines over a generated multi-year dataset
+
+Dataset is created in a transaction rolled back at the end, nothing is kept in the database. Still, prefer
+running it on a dev database:
+
+./manage.py benchmark [activity_summary ...] [--years 5] [--processes-per-month 40] [--repeat 5]
+"""
+
+
+BENCHMARK_USERS_PREFIX = "$B"
+
+
+def generate_dataset(years, processes_per_month, subsidiaries_count=3, users_count=20, seed=0):
+    """
+    Bulk create processes started along the past years with their interviews, returns created processes count
+
+    Users joined along the same years are responsible of processes and interviewers.
+    """
+    rng = random.Random(seed)
+    today = datetime.date.today()
+
+    subsidiaries = Subsidiary.objects.bulk_create(
+        Subsidiary(name="Benchmark subsidiary {no}".format(no=i), code="$B{no}".format(no=i))
+        for i in range(subsidiaries_count)
+    )
+    users = PyouPyouUser.objects.bulk_create(
+        PyouPyouUser(
+            trigramme="{prefix}{no}".format(prefix=BENCHMARK_USERS_PREFIX, no=i),
+            company=rng.choice(subsidiaries),
+            date_joined=timezone.now() - datetime.timedelta(days=rng.randrange(years * 365)),
+        )
+        for i in range(users_count)
+    )
+    sources = Sources.objects.bulk_create(Sources(name="Benchmark source {no}".format(no=i)) for i in range(10))
+    ResponsibleRule.objects.bulk_create(
+        ResponsibleRule(
+            responsible=rng.choice(users),
+            subsidiary=rng.choice(subsidiaries),
+            sources=rng.choice(sources + [None]),
+            priority=rng.randrange(100),
+        )
+        for i in range(20)
+    )
+
+    count = years * 12 * processes_per_month
+    candidates = [Candidate(name="Benchmark {no}".format(no=i)) for i in range(count)]
+    for candidate in candidates:
+        # bulk_create does not call save
+        candidate.compute_anonymized_fields()
+    candidates = Candidate.objects.bulk_create(candidates)
+    processes = []
+    for candidate in candidates:
+        start_date = today - datetime.timedelta(days=rng.randrange(years * 365))
+        processes.append(
+            Process(
+                candidate=candidate,
+                subsidiary=rng.choice(subsidiaries),
+                sources=rng.choice(sources + [None]),
+                state=rng.choice(Process.ALL_STATE_VALUES),
+                last_state_change=timezone.make_aware(
+                    datetime.datetime.combine(start_date, datetime.time()) + datetime.timedelta(days=rng.randrange(90))
+                ),
+            )
+        )
+        processes[-1].benchmark_start_date = start_date
+    processes = Process.objects.bulk_create(processes)
+    # start_date is auto_now_add, it can only be set after creation
+    for process in processes:
+        process.start_date = process.benchmark_start_date
+    Process.objects.bulk_update(processes, ["start_date"], batch_size=1000)
+    Process.responsible.through.objects.bulk_create(
+        (Process.responsible.through(process=process, pyoupyouuser=rng.choice(users)) for process in processes),
+        batch_size=1000,
+    )
+
+    interviews = []
+    for process in processes:
+        planned_date = process.last_state_change
+        for rank in range(1, rng.randrange(1, 6)):
+            planned_date += datetime.timedelta(days=rng.randrange(1, 15))
+            interviews.append(
+                Interview(
+                    process=process,
+                    rank=rank,
+                    state=rng.choice(Interview.ALL_STATE_VALUES),
+                    planned_date=rng.choice([planned_date, planned_date, None]),
+                )
+            )
+    interviews = Interview.objects.bulk_create(interviews, batch_size=1000)
+    Interview.interviewers.through.objects.bulk_create(
+        (
+            Interview.interviewers.through(interview=interview, pyoupyouuser=rng.choice(users))
+            for interview in interviews
+        ),
+        batch_size=1000,
+    )
+    return count
+
+
+def activity_summary():
+    """Activity summary over all data and over the last year"""
+    a_year_ago = timezone.now() - datetime.timedelta(days=365)
+    reports.activity_summary(Process.objects.all(), Interview.objects.all())
+    reports.activity_summary(
+        Process.objects.filter(last_state_change__gte=a_year_ago),
+        Interview.objects.filter(planned_date__gte=a_year_ago),
+    )
+
+
+def process_visibility():
+    """Processes and interviews visible by each generated user: counts, open processes page and detail lookups"""
+    for user in PyouPyouUser.objects.filter(trigramme__startswith=BENCHMARK_USERS_PREFIX):
+        Process.objects.for_user(user).count()
+        Interview.objects.for_user(user).count()
+        list(Process.objects.for_table(user).filter(end_date__isnull=True).order_by("-start_date")[:100])
+        for process_id in Process.objects.order_by("-id").values_list("id", flat=True)[:10]:
+            Process.objects.for_user(user).filter(id=process_id).exists()
+
+
+def responsibles_recompute():
+    """Responsibles of all open processes, generated responsibles are random so the first run changes most of them"""
+    responsibles.recompute()
+
+
+def duplicate_candidates(words):
+    """Duplicates of a candidate whose name has this many words"""
+    candidate = Candidate(name=" ".join("Word{no}".format(no=i) for i in range(words)), email="benchmark@example.com")
+    list(candidate.find_duplicates())
+
+
+BENCHMARKS = {
+    "activity_summary": activity_summary,
+    "process_visibility": process_visibility,
+    "responsibles_recompute": responsibles_recompute,
+    **{
+        "duplicate_candidates_{words}_words".format(words=words): functools.partial(duplicate_candidates, words)
+        for words in (2, 4, 8, 16)
+    },
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark reports engines over a generated dataset"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "benchmarks", nargs="*", help="Benchmarks to run, all by default: %s" % ", ".join(BENCHMARKS)
+        )
+        parser.add_argument("--years", type=int, default=5, help="Years covered by the dataset")
+        parser.add_argument("--processes-per-month", type=int, default=40)
+        parser.add_argument("--repeat", type=int, default=5, help="Runs of each benchmark")
+
+    def handle(self, *args, **options):
+        names = options["benchmarks"] or list(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError("Unknown benchmark(s): %s" % ", ".join(sorted(unknown)))
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            count = generate_dataset(options["years"], options["processes_per_month"])
+            self.stdout.write(
+                "Dataset: {count} processes over {years} years generated in {duration:.1f}s".format(
+                    count=count, years=options["years"], duration=time.perf_counter() - start
+                )
+            )
+
+            for name in names:
+                durations = []
+                for i in range(options["repeat"]):
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        BENCHMARKS[name]()
+                        durations.append(time.perf_counter() - start)
+                self.stdout.write(
+                    "{name}: {queries} queries, best {best:.1f}ms, mean {mean:.1f}ms".format(
+                        name=name,
+                        queries=len(queries),
+                        best=min(durations) * 1000,
+                        mean=sum(durations) / len(durations) * 1000,
+                    )
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,25 @@
+import logging
+
+from django.core.management import BaseCommand
+
+from interview.models import AnalyticsFact
+
+logger = logging.getLogger("pyoupyou.batch")
+
+"""
+Usage: ./manage.py rebuild_analytics [--batch-size 500]
+
+Rebuild the whole analytics facts table used by analysis pages.
+Facts are kept up to date on process and interview changes, this is only needed after data
+imports or on first deployment.
+"""
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        logger.info("Start analytics rebuild")
+        count = AnalyticsFact.objects.rebuild(batch_size=options["batch_size"])
+        logger.info("End analytics rebuild, {count} processes".format(count=count))
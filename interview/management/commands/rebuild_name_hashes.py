@@ -0,0 +1,25 @@
+import logging
+
+from django.core.management import BaseCommand
+
+from interview.models import Candidate
+
+logger = logging.getLogger("pyoupyou.batch")
+
+"""
+Usage: ./manage.py rebuild_name_hashes [--batch-size 500]
+
+Recompute sorted name hashes used to find duplicate candidates, for candidates not anonymized.
+Hashes are computed on candidate save and by migrations, this is only needed after data imports bypassing
+saves or a change of SECRET_ANON_SALT.
+"""
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        logger.info("Start name hashes rebuild")
+        count = Candidate.objects.rebuild_sorted_name_hashes(batch_size=options["batch_size"])
+        logger.info("End name hashes rebuild, {count} candidates".format(count=count))
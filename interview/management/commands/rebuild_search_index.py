@@ -0,0 +1,25 @@
+import logging
+
+from django.core.management import BaseCommand
+
+from interview.models import SearchDocument
+
+logger = logging.getLogger("pyoupyou.batch")
+
+"""
+Usage: ./manage.py rebuild_search_index [--batch-size 500]
+
+Rebuild the whole search index used by the search page.
+Search documents are kept up to date on candidate, process and interview changes, this is only needed
+after data imports or on first deployment.
+"""
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        logger.info("Start search index rebuild")
+        count = SearchDocument.objects.rebuild(batch_size=options["batch_size"])
+        logger.info("End search index rebuild, {count} processes".format(count=count))
@@ -0,0 +1,52 @@
+import logging
+
+from django.core.management import BaseCommand
+
+from interview import responsibles
+from interview.models import Process
+from ref.models import PyouPyouUser
+
+logger = logging.getLogger("pyoupyou.batch")
+
+"""
+Usage: ./manage.py recompute_responsibles [--subsidiary CODE ...] [--dry-run] [--batch-size 2000]
+
+Update responsibles of open processes from responsible rules, subsidiaries and interviews.
+Processes whose responsibles change are listed with added (+) and removed (-) users, nothing is changed
+with --dry-run.
+"""
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--subsidiary", action="append", help="subsidiary code, may be repeated")
+        parser.add_argument("--dry-run", action="store_true", help="only report changes")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        processes = Process.objects.filter(state__in=Process.OPEN_STATE_VALUES)
+        if options["subsidiary"]:
+            processes = processes.filter(subsidiary__code__in=options["subsidiary"])
+
+        logger.info("Start responsibles recomputation")
+        changes = responsibles.recompute(processes, dry_run=options["dry_run"], batch_size=options["batch_size"])
+
+        user_ids = set()
+        for added, removed in changes.values():
+            user_ids.update(added, removed)
+        trigrammes = dict(PyouPyouUser.objects.filter(id__in=user_ids).values_list("id", "trigramme"))
+        for process_id, (added, removed) in sorted(changes.items()):
+            self.stdout.write(
+                "Process {process_id}: {changes}".format(
+                    process_id=process_id,
+                    changes=" ".join(
+                        ["+" + trigrammes[user_id] for user_id in sorted(added)]
+                        + ["-" + trigrammes[user_id] for user_id in sorted(removed)]
+                    ),
+                )
+            )
+        logger.info(
+            "End responsibles recomputation, {count} processes {changed}".format(
+                count=len(changes), changed="to change" if options["dry_run"] else "changed"
+            )
+        )
@@ -0,0 +1,31 @@
+import logging
+
+from django.core.management import BaseCommand
+
+from interview.models import OutboxEmail
+from ref.models import PyouPyouUser
+
+logger = logging.getLogger("pyoupyou.batch")
+
+"""
+Usage: ./manage.py send_digests hourly|daily
+
+Group notifications of users who chose an hourly or daily digest into one email per user.
+Digests are queued in the outbox and sent by send_notifications. Run it every hour with "hourly" and
+once a day with "daily".
+"""
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "frequency",
+            choices=[
+                PyouPyouUser.NotificationFrequency.HOURLY.value,
+                PyouPyouUser.NotificationFrequency.DAILY.value,
+            ],
+        )
+
+    def handle(self, *args, **options):
+        count = OutboxEmail.objects.build_digests(options["frequency"])
+        logger.info("{count} {frequency} digests queued".format(count=count, frequency=options["frequency"]))
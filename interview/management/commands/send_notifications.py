@@ -0,0 +1,45 @@
+import logging
+import time
+
+from django.core.management import BaseCommand
+
+from interview.models import OutboxEmail
+
+logger = logging.getLogger("pyoupyou.batch")
+
+"""
+Usage: ./manage.py send_notifications [--batch-size 100] [--loop [--sleep 10]]
+
+Send notification emails waiting in the outbox, each batch over a single SMTP connection.
+Without --loop, pending emails are sent once (e.g. from cron), else the command keeps polling the outbox.
+Failed emails are retried after NOTIFICATION_RETRY_DELAY seconds, doubled after each attempt.
+Batches are claimed for NOTIFICATION_SEND_LEASE seconds, a batch whose connection fails is postponed without
+counting an attempt.
+"""
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--loop", action="store_true", help="keep polling the outbox")
+        parser.add_argument("--sleep", type=float, default=10, help="seconds between polls when outbox is empty")
+
+    def handle(self, *args, **options):
+        while True:
+            sent = self.send_pending(options["batch_size"])
+            if not options["loop"]:
+                break
+            if not sent:
+                time.sleep(options["sleep"])
+
+    def send_pending(self, batch_size):
+        total = 0
+        while OutboxEmail.objects.pending().exists():
+            sent = OutboxEmail.objects.deliver(batch_size=batch_size)
+            if not sent:
+                # remaining emails failed, they are retried later
+                break
+            total += sent
+        if total:
+            logger.info("{count} notification emails sent".format(count=total))
+        return total
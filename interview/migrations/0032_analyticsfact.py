@@ -0,0 +1,179 @@
+# Generated by Django 5.1.6 on 2026-10-17 11:42
+
+import datetime
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def fiscal_year(date):
+    month, day = (int(x) for x in settings.FINANCIAL_STARTING_MONTH_DAY.split("-"))
+    if date < datetime.date(date.year, month, day):
+        return "%d/%d" % (date.year - 1, date.year)
+    return "%d/%d" % (date.year, date.year + 1)
+
+
+def facts(AnalyticsFact, processes, interviews):
+    for process in processes:
+        if process.end_date:
+            length_end_date = process.end_date
+        elif process.interview_last_planned_date:
+            length_end_date = process.interview_last_planned_date.date()
+        else:
+            length_end_date = None
+        process_fact = {
+            "process_id": process.id,
+            "subsidiary_id": process.subsidiary_id,
+            "sources_id": process.sources_id,
+            "offer_id": process.offer_id,
+            "contract_type_id": process.contract_type_id,
+            "start_date": process.start_date,
+            "start_fiscal_year": fiscal_year(process.start_date),
+            "end_date": process.end_date,
+            "length_end_date": length_end_date,
+            "state": process.state,
+            "itw_count": process.itw_count,
+            "contract_start_date": process.contract_start_date,
+            "contract_duration": process.contract_duration,
+        }
+        yield AnalyticsFact(**process_fact)
+
+        process_interviews = interviews[process.id]
+        for idx, interview in enumerate(process_interviews):
+            days_since_last_itw = None
+            last_event_date = process.start_date
+            if interview.rank > 1:
+                last_itw = process_interviews[idx - 1]
+                last_event_date = last_itw.planned_date.date() if last_itw.planned_date is not None else None
+            if interview.planned_date is not None and last_event_date is not None:
+                days_since_last_itw = int((interview.planned_date.date() - last_event_date).days)
+                if days_since_last_itw < 0:
+                    days_since_last_itw = None
+            yield AnalyticsFact(
+                interview_id=interview.id,
+                interview_state=interview.state,
+                interview_rank=interview.rank,
+                interview_planned_date=interview.planned_date,
+                kind_of_interview_id=interview.kind_of_interview_id,
+                prequalification=interview.prequalification,
+                interviewers="_".join(i.trigramme for i in interview.interviewers.all()),
+                days_since_last_itw=days_since_last_itw,
+                **process_fact,
+            )
+
+
+def build_facts(apps, schema_editor):
+    # same computation as AnalyticsFact.objects.refresh at the time of this migration
+    AnalyticsFact = apps.get_model("interview", "AnalyticsFact")
+    Process = apps.get_model("interview", "Process")
+    Interview = apps.get_model("interview", "Interview")
+
+    process_ids = list(Process.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(process_ids), 500):
+        batch = process_ids[start : start + 500]
+        processes = (
+            Process.objects.filter(id__in=batch)
+            .annotate(interview_last_planned_date=Max("interview__planned_date"), itw_count=Count("interview"))
+            .order_by("id")
+        )
+        interviews = defaultdict(list)
+        for interview in (
+            Interview.objects.filter(process_id__in=batch).prefetch_related("interviewers").order_by("process", "rank")
+        ):
+            interviews[interview.process_id].append(interview)
+        AnalyticsFact.objects.bulk_create(facts(AnalyticsFact, processes, interviews))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0031_merge_20250918_1022"),
+        ("ref", "0016_delete_consultant"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalyticsFact",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("start_date", models.DateField()),
+                ("start_fiscal_year", models.CharField(max_length=9)),
+                ("end_date", models.DateField(null=True)),
+                ("length_end_date", models.DateField(null=True)),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("OP", "Open"),
+                            ("WA", "Waiting interviewer to be designed"),
+                            ("WK", "Waiting next interview designation or process termination"),
+                            ("JO", "Waiting candidate feedback after a job offer"),
+                            ("WP", "Waiting interview planification"),
+                            ("WR", "Waiting for interview planification response"),
+                            ("WM", "Waiting interview minute"),
+                            ("WI", "Waiting interview"),
+                            ("NG", "Last interviewer interupt process"),
+                            ("CD", "Candidate declined our offer"),
+                            ("HI", "Candidate accepted our offer"),
+                            ("NO", "Closed - other reason"),
+                        ],
+                        max_length=3,
+                    ),
+                ),
+                ("itw_count", models.PositiveIntegerField()),
+                ("contract_start_date", models.DateField(null=True)),
+                ("contract_duration", models.PositiveIntegerField(null=True)),
+                (
+                    "interview_state",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("NP", "NEED PLANIFICATION"),
+                            ("PR", "WAIT PLANIFICATION RESPONSE"),
+                            ("PL", "PLANNED"),
+                            ("GO", "GO"),
+                            ("NO", "NO"),
+                            ("DR", "DRAFT"),
+                            ("WI", "WAIT INFORMATION"),
+                        ],
+                        max_length=3,
+                    ),
+                ),
+                ("interview_rank", models.IntegerField(null=True)),
+                ("interview_planned_date", models.DateTimeField(null=True)),
+                ("prequalification", models.BooleanField(default=False)),
+                ("interviewers", models.CharField(blank=True, max_length=255)),
+                ("days_since_last_itw", models.IntegerField(null=True)),
+                (
+                    "contract_type",
+                    models.ForeignKey(
+                        null=True, on_delete=django.db.models.deletion.SET_NULL, to="interview.contracttype"
+                    ),
+                ),
+                (
+                    "interview",
+                    models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to="interview.interview"),
+                ),
+                (
+                    "kind_of_interview",
+                    models.ForeignKey(
+                        null=True, on_delete=django.db.models.deletion.SET_NULL, to="interview.interviewkind"
+                    ),
+                ),
+                (
+                    "offer",
+                    models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to="interview.offer"),
+                ),
+                ("process", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="interview.process")),
+                (
+                    "sources",
+                    models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to="interview.sources"),
+                ),
+                ("subsidiary", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="ref.subsidiary")),
+            ],
+        ),
+        migrations.RunPython(build_facts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.1.6 on 2026-10-17 12:01
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Full text indexes are database specific, see interview.search
+SQLITE_INDEX = [
+    """CREATE VIRTUAL TABLE interview_searchdocument_fts USING fts5(
+        candidate, notes, content='interview_searchdocument', content_rowid='process_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER interview_searchdocument_ai AFTER INSERT ON interview_searchdocument BEGIN
+        INSERT INTO interview_searchdocument_fts(rowid, candidate, notes)
+        VALUES (new.process_id, new.candidate, new.notes);
+    END""",
+    """CREATE TRIGGER interview_searchdocument_ad AFTER DELETE ON interview_searchdocument BEGIN
+        INSERT INTO interview_searchdocument_fts(interview_searchdocument_fts, rowid, candidate, notes)
+        VALUES ('delete', old.process_id, old.candidate, old.notes);
+    END""",
+    """CREATE TRIGGER interview_searchdocument_au AFTER UPDATE ON interview_searchdocument BEGIN
+        INSERT INTO interview_searchdocument_fts(interview_searchdocument_fts, rowid, candidate, notes)
+        VALUES ('delete', old.process_id, old.candidate, old.notes);
+        INSERT INTO interview_searchdocument_fts(rowid, candidate, notes)
+        VALUES (new.process_id, new.candidate, new.notes);
+    END""",
+]
+SQLITE_DROP_INDEX = [
+    "DROP TRIGGER interview_searchdocument_au",
+    "DROP TRIGGER interview_searchdocument_ad",
+    "DROP TRIGGER interview_searchdocument_ai",
+    "DROP TABLE interview_searchdocument_fts",
+]
+MYSQL_INDEX = ["CREATE FULLTEXT INDEX interview_searchdocument_fulltext ON interview_searchdocument (candidate, notes)"]
+MYSQL_DROP_INDEX = ["DROP INDEX interview_searchdocument_fulltext ON interview_searchdocument"]
+
+
+def create_index(apps, schema_editor):
+    statements = {"sqlite": SQLITE_INDEX, "mysql": MYSQL_INDEX}.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    statements = {"sqlite": SQLITE_DROP_INDEX, "mysql": MYSQL_DROP_INDEX}.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def build_documents(apps, schema_editor):
+    # same documents as SearchDocument.objects.refresh at the time of this migration
+    SearchDocument = apps.get_model("interview", "SearchDocument")
+    Process = apps.get_model("interview", "Process")
+    Interview = apps.get_model("interview", "Interview")
+
+    process_ids = list(Process.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(process_ids), 500):
+        batch = process_ids[start : start + 500]
+        minutes = defaultdict(list)
+        for process_id, minute in (
+            Interview.objects.filter(process_id__in=batch)
+            .exclude(minute="")
+            .order_by("process", "rank")
+            .values_list("process_id", "minute")
+        ):
+            minutes[process_id].append(minute)
+        SearchDocument.objects.bulk_create(
+            SearchDocument(
+                process_id=process.id,
+                candidate=" ".join(
+                    x for x in (process.candidate.name, process.candidate.email, process.candidate.phone) if x
+                ),
+                notes="\n".join(
+                    x for x in (process.other_informations, process.closed_comment, *minutes[process.id]) if x
+                ),
+            )
+            for process in Process.objects.filter(id__in=batch).select_related("candidate")
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0032_analyticsfact"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "process",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="interview.process",
+                    ),
+                ),
+                ("candidate", models.TextField()),
+                ("notes", models.TextField()),
+            ],
+        ),
+        migrations.RunPython(create_index, drop_index),
+        # after the index, sqlite triggers index the documents
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+    ]
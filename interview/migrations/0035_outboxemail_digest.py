@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-17 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0034_outboxemail"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxemail",
+            name="digest",
+            field=models.CharField(
+                blank=True,
+                choices=[("immediate", "Immediately"), ("hourly", "Hourly digest"), ("daily", "Daily digest")],
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="outboxemail",
+            name="url",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
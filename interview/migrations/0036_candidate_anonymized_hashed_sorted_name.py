@@ -0,0 +1,59 @@
+# Generated by Django 5.1.6 on 2026-10-17 12:56
+
+from django.db import migrations, models
+
+import hashlib
+
+from django.conf import settings
+
+import unicodedata
+
+
+def remove_accents(input_str):
+    nfkd_form = unicodedata.normalize("NFKD", input_str)
+    only_ascii = nfkd_form.encode("ASCII", "ignore")
+    return only_ascii
+
+
+def anonymize_words(text):
+    h = hashlib.sha256()
+    h.update(settings.SECRET_ANON_SALT.encode("utf-8"))
+    h.update(" ".join(sorted(remove_accents(text.lower()).decode().split())).encode("utf-8"))
+    return h.hexdigest()
+
+
+def compute_sorted_name_hashes(apps, schema_editor):
+    # names of anonymized candidates are gone, they keep only their name hash
+    Candidate = apps.get_model("interview", "Candidate")
+    candidates = list(Candidate.objects.filter(anonymized=False).exclude(name="").only("id", "name"))
+    for candidate in candidates:
+        candidate.anonymized_hashed_sorted_name = anonymize_words(candidate.name)
+    Candidate.objects.bulk_update(candidates, ["anonymized_hashed_sorted_name"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interview", "0035_outboxemail_digest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="candidate",
+            name="anonymized_hashed_sorted_name",
+            field=models.CharField(
+                blank=True, db_index=True, max_length=64, verbose_name="Anonymized Hashed Sorted Name"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="candidate",
+            name="anonymized_hashed_email",
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name="Anonymized Hashed Email"),
+        ),
+        migrations.AlterField(
+            model_name="candidate",
+            name="anonymized_hashed_name",
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name="Anonymized Hashed Name"),
+        ),
+        migrations.RunPython(compute_sorted_name_hashes, migrations.RunPython.noop),
+    ]
@@ -6,19 +6,36 @@ import hashlib
 import shutil
 import unicodedata
 import itertools
+from collections import defaultdict
 
 from django.conf import settings
 from django.core import mail
-from django.db import models
-from django.db.models import Q, CharField, Count
-from django.db.models.signals import m2m_changed
-from django.db.models.functions import Lower
+from django.db import models, transaction
+from django.db.models import (
+    Q,
+    BooleanField,
+    CharField,
+    Count,
+    Case,
+    Exists,
+    ExpressionWrapper,
+    F,
+    Max,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.db.models.functions import Coalesce, Concat, Lower
 from django.dispatch import receiver
 from django.template.loader import render_to_string
 from django.utils.text import slugify
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
+from interview import listcache, notifications, unitofwork
+from interview.functions import GroupConcat
 from pyoupyou.settings import MINUTE_FORMAT, STALE_DAYS
 from ref.models import Subsidiary, PyouPyouUser
 
@@ -56,10 +73,43 @@ class Sources(models.Model):
         ordering = ["name"]
 
 
+class LoadedStateMixin:
+    """Values of LOADED_FIELDS as loaded from or last saved to database, to tell which fields changed"""
+
+    LOADED_FIELDS = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._set_loaded_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._set_loaded_state()
+
+    def _set_loaded_state(self):
+        # deferred fields are unknown
+        self._loaded_state = {field: self.__dict__[field] for field in self.LOADED_FIELDS if field in self.__dict__}
+
+    def changed(self, fields):
+        """Whether any of fields may differ from database, unknown fields are considered changed"""
+        loaded_state = getattr(self, "_loaded_state", {})
+        return any(field not in loaded_state or loaded_state[field] != self.__dict__.get(field) for field in fields)
+
+
 class CandidateManager(models.Manager):
     def for_user(self, user):
         return Candidate.objects.distinct().filter(process__in=Process.objects.for_user(user))
 
+    def rebuild_sorted_name_hashes(self, batch_size=500):
+        """Recompute sorted name hashes of candidates not anonymized, returns the number of candidates"""
+        candidates = list(self.filter(anonymized=False).exclude(name="").only("id", "name"))
+        for candidate in candidates:
+            candidate.anonymized_hashed_sorted_name = candidate.anonymized_sorted_name()
+        self.bulk_update(candidates, ["anonymized_hashed_sorted_name"], batch_size=batch_size)
+        return len(candidates)
+
 
 def remove_accents(input_str):
     nfkd_form = unicodedata.normalize("NFKD", input_str)
@@ -74,12 +124,21 @@ def anonymize_text(text):
     return h.hexdigest()
 
 
-class Candidate(models.Model):
+def anonymize_words(text):
+    """Hash of text words whatever their order and spacing"""
+    return anonymize_text(" ".join(sorted(remove_accents(text.lower()).decode().split())))
+
+
+class Candidate(LoadedStateMixin, models.Model):
     name = models.CharField(_("Name"), max_length=200)
     email = models.EmailField(blank=True)
     phone = models.CharField(_("Phone"), max_length=30, blank=True)
-    anonymized_hashed_name = models.CharField(_("Anonymized Hashed Name"), max_length=64, blank=True)
-    anonymized_hashed_email = models.CharField(_("Anonymized Hashed Email"), max_length=64, blank=True)
+    anonymized_hashed_name = models.CharField(_("Anonymized Hashed Name"), max_length=64, blank=True, db_index=True)
+    # name words sorted, matches the name in any order. Empty for candidates anonymized before it was added
+    anonymized_hashed_sorted_name = models.CharField(
+        _("Anonymized Hashed Sorted Name"), max_length=64, blank=True, db_index=True
+    )
+    anonymized_hashed_email = models.CharField(_("Anonymized Hashed Email"), max_length=64, blank=True, db_index=True)
     anonymized = models.BooleanField(default=False)
     linkedin_url = models.URLField(verbose_name=_("LinkedIn link"), blank=True)
 
@@ -89,25 +148,38 @@ class Candidate(models.Model):
 
     objects = CandidateManager()
 
+    # names of candidates anonymized without sorted name hash are matched in any order up to this many words
+    LEGACY_NAME_PERMUTATIONS_MAX_WORDS = 4
+
+    # copied by SearchDocument rows
+    SEARCH_FIELDS = ("name", "email", "phone")
+    LOADED_FIELDS = SEARCH_FIELDS
+
     def compute_anonymized_fields(self):
         if not self.anonymized:
             if self.name != "":
                 self.anonymized_hashed_name = self.anonymized_name()
+                self.anonymized_hashed_sorted_name = self.anonymized_sorted_name()
             if self.email != "":
                 self.anonymized_hashed_email = self.anonymized_email()
 
     def save(self, *args, **kwargs):
         self.compute_anonymized_fields()
         super(Candidate, self).save(*args, **kwargs)
+        self._set_loaded_state()
+        listcache.bump(*self.process_set.values_list("subsidiary_id", flat=True))
 
     def __str__(self):
         return ("{name}").format(name=self.name)
 
-    def delete_all_documents(self):
+    def documents_dirs(self):
+        """Directories of candidate documents, one per document type (see document_path)"""
         dirname = f"{self.id}_{slugify(self.name)}"
-        for document_type in [dt[0] for dt in Document.DOCUMENT_TYPE]:
-            doc_type_media = settings.MEDIA_ROOT / document_type
-            shutil.rmtree(doc_type_media / dirname, ignore_errors=True)
+        return [settings.MEDIA_ROOT / document_type / dirname for document_type, _ in Document.DOCUMENT_TYPE]
+
+    def delete_all_documents(self):
+        for path in self.documents_dirs():
+            shutil.rmtree(path, ignore_errors=True)
         self.document_set.all().delete()
 
     def anonymize(self):
@@ -128,20 +200,33 @@ class Candidate(models.Model):
     def anonymized_name(self):
         return anonymize_text(self.name)
 
+    def anonymized_sorted_name(self):
+        return anonymize_words(self.name)
+
+    def legacy_anonymized_names(self):
+        """Hashes of name words permutations, as stored in anonymized_hashed_name"""
+        words = self.name.lower().split(" ")
+        if len(words) > self.LEGACY_NAME_PERMUTATIONS_MAX_WORDS:
+            return [anonymize_text(" ".join(words))]
+        return [anonymize_text(" ".join(permutation)) for permutation in itertools.permutations(words)]
+
     def anonymized_email(self):
         if self.email:
             return anonymize_text(self.email)
         return ""
 
     def find_duplicates(self):
-        name_permutations = list(itertools.permutations(self.name.lower().split(" ")))
-        hash_permutations = map(lambda words: anonymize_text(" ".join(words)), name_permutations)
+        legacy_anonymized = Q(anonymized=True, anonymized_hashed_sorted_name="") & ~Q(anonymized_hashed_name="")
 
         return Candidate.objects.filter(
             (
                 ~Q(id=self.id)
                 & (
-                    (~Q(anonymized_hashed_name="") & Q(anonymized_hashed_name__in=hash_permutations))
+                    (
+                        ~Q(anonymized_hashed_sorted_name="")
+                        & Q(anonymized_hashed_sorted_name=self.anonymized_sorted_name())
+                    )
+                    | (legacy_anonymized & Q(anonymized_hashed_name__in=self.legacy_anonymized_names()))
                     | (~Q(anonymized_hashed_email="") & Q(anonymized_hashed_email=self.anonymized_email()))
                 )
             )
@@ -151,10 +236,11 @@ class Candidate(models.Model):
         res = []
 
         if self.name:
-            name_permutations = list(itertools.permutations(self.name.lower().split(" ")))
-            hash_permutations = map(lambda words: anonymize_text(" ".join(words)), name_permutations)
-
-            if other.anonymized_hashed_name in hash_permutations:
+            if other.anonymized_hashed_sorted_name:
+                same_name = other.anonymized_hashed_sorted_name == self.anonymized_sorted_name()
+            else:
+                same_name = other.anonymized_hashed_name in self.legacy_anonymized_names()
+            if same_name:
                 res.append("name")
 
         if self.email and self.anonymized_email() == other.anonymized_hashed_email:
@@ -220,11 +306,20 @@ class Offer(models.Model):
 
 class ProcessManager(models.Manager):
     def for_user(self, user):
+        """
+        Processes started after user joined, or where user is responsible or interviewer
+
+        Responsible and interviewers are checked with EXISTS on m2m tables indexes, rows are not
+        duplicated by joins and no DISTINCT is needed.
+        """
+        is_responsible = Process.responsible.through.objects.filter(process=OuterRef("pk"), pyoupyouuser=user)
+        is_interviewer = Interview.interviewers.through.objects.filter(
+            interview__process=OuterRef("pk"), pyoupyouuser=user
+        )
         q = (
             super()
             .get_queryset()
-            .filter(Q(start_date__gte=user.date_joined) | Q(responsible__in=[user]) | Q(interview__interviewers=user))
-            .distinct()
+            .filter(Q(start_date__gte=user.date_joined) | Exists(is_responsible) | Exists(is_interviewer))
         )
         if user.is_external:
             q = q.filter(sources=user.limited_to_source)
@@ -235,12 +330,90 @@ class ProcessManager(models.Manager):
             self.for_user(user)
             .select_related("subsidiary", "candidate", "contract_type")
             .prefetch_related("responsible")
-            .annotate(current_rank=Count("interview", distinct=True))
+            # counted in a subquery rather than grouping every visible process with its interviews
+            .annotate(
+                current_rank=Coalesce(
+                    Subquery(
+                        Interview.objects.filter(process=OuterRef("pk"))
+                        .order_by()
+                        .values("process")
+                        .annotate(count=Count("id"))
+                        .values("count")
+                    ),
+                    0,
+                )
+            )
         )
         return qs
 
+    def for_dashboard(self, user, since):
+        """
+        Processes of user dashboard sections, fetched in one query
+
+        Each process is annotated with the sections it belongs to:
+        - `needs_action`: not closed processes user is responsible of
+        - `is_related`: processes user is interviewer of, still open or ended since `since`
+        - `in_subsidiary`: processes of user company, still open or ended since `since`
+        """
+        recent = Q(end_date__gte=since) | Q(state__in=Process.OPEN_STATE_VALUES)
+        is_responsible = Process.responsible.through.objects.filter(process=OuterRef("pk"), pyoupyouuser=user)
+        is_interviewer = Interview.interviewers.through.objects.filter(
+            interview__process=OuterRef("pk"), pyoupyouuser=user
+        )
+        return (
+            self.for_table(user)
+            .annotate(
+                needs_action=ExpressionWrapper(
+                    Exists(is_responsible) & ~Q(state__in=Process.CLOSED_STATE_VALUES), output_field=BooleanField()
+                ),
+                is_related=ExpressionWrapper(Exists(is_interviewer) & recent, output_field=BooleanField()),
+                in_subsidiary=ExpressionWrapper(Q(subsidiary_id=user.company_id) & recent, output_field=BooleanField()),
+            )
+            .filter(Q(needs_action=True) | Q(is_related=True) | Q(in_subsidiary=True))
+        )
+
+    def for_kanban(self):
+        """
+        Processes annotated with their last interview information and their kanban column
+
+        Column is the last interview rank, prequalification interview being column 0
+        """
+        last_interview = Interview.objects.filter(process=OuterRef("pk")).order_by("-rank")
+        last_interview_interviewers = (
+            Interview.interviewers.through.objects.filter(
+                interview__process=OuterRef("pk"), interview__rank=OuterRef("last_interview_rank")
+            )
+            .values("interview")
+            .annotate(
+                names=GroupConcat(
+                    Concat("pyoupyouuser__full_name", Value(" ("), "pyoupyouuser__trigramme", Value(")")),
+                    separator="\n",
+                )
+            )
+            .values("names")
+        )
+        return (
+            super()
+            .get_queryset()
+            .select_related("candidate", "subsidiary", "contract_type")
+            .annotate(
+                last_interview_rank=Subquery(last_interview.values("rank")[:1]),
+                last_interview_prequalification=Subquery(last_interview.values("prequalification")[:1]),
+                last_interview_planned_date=Subquery(last_interview.values("planned_date")[:1]),
+                has_prequalification=Exists(Interview.objects.filter(process=OuterRef("pk"), prequalification=True)),
+            )
+            .annotate(
+                last_interview_interviewers=Subquery(last_interview_interviewers),
+                kanban_column=Case(
+                    When(last_interview_rank__isnull=True, then=Value(0)),
+                    When(has_prequalification=True, last_interview_rank__gt=0, then=F("last_interview_rank") - 1),
+                    default=F("last_interview_rank"),
+                ),
+            )
+        )
+
 
-class Process(models.Model):
+class Process(LoadedStateMixin, models.Model):
     WAITING_INTERVIEW_PLANIFICATION = "WP"
     WAITING_INTERVIEW_PLANIFICATION_RESPONSE = "WR"
     INTERVIEW_IS_PLANNED = "WI"
@@ -335,62 +508,64 @@ class Process(models.Model):
         PyouPyouUser, verbose_name=_("Subscribers"), blank=True, related_name="subscribed_processes"
     )
 
+    # copied by AnalyticsFact rows
+    ANALYTICS_FIELDS = (
+        "subsidiary_id",
+        "sources_id",
+        "offer_id",
+        "contract_type_id",
+        "start_date",
+        "end_date",
+        "state",
+        "contract_start_date",
+        "contract_duration",
+    )
+    # copied by SearchDocument rows, along with candidate fields
+    SEARCH_FIELDS = ("candidate_id", "other_informations", "closed_comment")
+    # state and subsidiary are compared on save
+    LOADED_FIELDS = ANALYTICS_FIELDS + SEARCH_FIELDS
+
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None, trigger_notification=True):
+        # responsibles imports models
+        from interview import responsibles
+
         is_new = False if self.id else True
         if is_new:
             self.last_state_change = now()
+            previous_subsidiary_id = None
         else:
-            old = Process.objects.get(id=self.id)
-            if old.state != self.state:
+            loaded_state = getattr(self, "_loaded_state", {})
+            if not {"state", "subsidiary_id"} <= loaded_state.keys():
+                loaded_state = Process.objects.filter(id=self.id).values("state", "subsidiary_id").get()
+            if loaded_state["state"] != self.state:
                 self.last_state_change = now()
+            previous_subsidiary_id = loaded_state["subsidiary_id"]
         super().save(force_insert, force_update, using, update_fields)
-        self.responsible.clear()
-        default_responsible = self.compute_responsable()
-
-        if self.state in (
-            Process.WAITING_INTERVIEWER_TO_BE_DESIGNED,
-            Process.WAITING_NEXT_INTERVIEWER_TO_BE_DESIGNED_OR_END_OF_PROCESS,
-            Process.JOB_OFFER,
-        ):
-            self.responsible.clear()
-            if default_responsible is not None:
-                self.responsible.add(default_responsible)
-
-        if self.state in (Process.CANDIDATE_DECLINED, Process.HIRED):
-            self.responsible.clear()
-        if self.state in (
-            Process.WAITING_INTERVIEW_PLANIFICATION,
-            Process.WAITING_INTERVIEW_PLANIFICATION_RESPONSE,
-            Process.INTERVIEW_IS_PLANNED,
-        ):
-            self.responsible.clear()
-            for interviewer in self.interview_set.last().interviewers.all():
-                self.responsible.add(interviewer)
-
-        if self.is_open():
-            for interview in self.interview_set.exclude(state__in=[Interview.GO, Interview.NO_GO]):
-                for interviewer in interview.interviewers.all():
-                    self.responsible.add(interviewer)
+        self._set_loaded_state()
+        responsibles.update(self, is_new)
+        listcache.bump(self.subsidiary_id, previous_subsidiary_id)
         if trigger_notification:
             self.trigger_notification(is_new)
 
+    def set_state_from_interview(self, interview):
+        """Follow the state of interview, the last one of this process"""
+        if interview.state == Interview.WAITING_PLANIFICATION:
+            self.state = Process.WAITING_INTERVIEW_PLANIFICATION
+        if interview.state == Interview.WAITING_PLANIFICATION_RESPONSE:
+            self.state = Process.WAITING_INTERVIEW_PLANIFICATION_RESPONSE
+        elif interview.state == Interview.PLANNED:
+            self.state = Process.INTERVIEW_IS_PLANNED
+        elif interview.state == Interview.WAIT_INFORMATION:
+            self.state = Process.WAITING_ITW_MINUTE
+        elif interview.state in (Interview.GO, Interview.NO_GO):
+            self.state = Process.WAITING_NEXT_INTERVIEWER_TO_BE_DESIGNED_OR_END_OF_PROCESS
+
     def compute_responsable(self):
-        """returns all matching responsible"""
-
-        # we use null as wildcard in rules table
-        rule_to_apply = (
-            ResponsibleRule.objects.filter(
-                Q(sources=self.sources) | Q(sources__isnull=True),
-                Q(subsidiary=self.subsidiary) | Q(subsidiary__isnull=True),
-                Q(contract_type=self.contract_type) | Q(contract_type__isnull=True),
-                Q(offer=self.offer) | Q(offer__isnull=True),
-            )
-            .order_by("-priority")
-            .first()
-        )
-        if rule_to_apply is not None and rule_to_apply.responsible.is_active:
-            return rule_to_apply.responsible
-        return self.subsidiary.responsible
+        """returns the matching responsible, see interview.recipients"""
+        # recipients imports models
+        from interview import recipients
+
+        return recipients.responsible(self)
 
     def get_absolute_url(self):
         from django.urls import reverse
@@ -472,32 +647,17 @@ class Process(models.Model):
             body_template = "interview/email/job_offer.txt"
 
         if subject and body_template:
-            url = os.path.join(settings.SITE_HOST, self.get_absolute_url().lstrip("/"))
-            body = render_to_string(body_template, {"process": self, "url": url})
+            notifications.notify(self, body_template, lambda: self.send_notification(subject, body_template))
 
-            # not sure about line 465 about the merge conflict...
-            mail.send_mail(
-                subject=subject, message=body, from_email=settings.MAIL_FROM, recipient_list=self.recipient_list()
-            )
+    def send_notification(self, subject, body_template):
+        url = os.path.join(settings.SITE_HOST, self.get_absolute_url().lstrip("/"))
+        OutboxEmail.objects.notify(subject, body_template, {"process": self, "url": url}, self.recipient_list())
 
     def recipient_list(self):
-        recipients = self.subsidiary.notification_emails
-        # add subsidiary responsible to recipient list
-        if self.subsidiary.responsible and self.subsidiary.responsible.is_active:
-            recipients.append(self.subsidiary.responsible.email)
-
-        # Add responsible based on rule
-        computed_responsible = self.compute_responsable()
-        if computed_responsible is not None:
-            recipients.append(computed_responsible.email)
-
-        # add users subscribed to offer's notification
-        if self.offer:
-            recipients += [user.email for user in self.offer.subscribers.filter(is_active=True)]
+        # recipients imports models
+        from interview import recipients
 
-        recipients += [user.email for user in self.subscribers.filter(is_active=True)]
-
-        return set(recipients)
+        return recipients.process_recipients(self)
 
     def get_all_interviewers_for_process(self):
         return PyouPyouUser.objects.filter(interview__process=self)
@@ -512,11 +672,14 @@ class InterviewKind(models.Model):
 
 class InterviewManager(models.Manager):
     def for_user(self, user):
+        """Interviews of processes started after user joined or where user is an interviewer, see ProcessManager"""
+        is_process_interviewer = Interview.interviewers.through.objects.filter(
+            interview__process=OuterRef("process"), pyoupyouuser=user
+        )
         q = (
             super(InterviewManager, self)
             .get_queryset()
-            .filter(Q(process__start_date__gte=user.date_joined) | Q(process__interview__interviewers=user))
-            .distinct()
+            .filter(Q(process__start_date__gte=user.date_joined) | Exists(is_process_interviewer))
         )
         if user.is_external:
             q = q.filter(process__sources=user.limited_to_source)
@@ -538,7 +701,7 @@ class InterviewManager(models.Manager):
         return qs
 
 
-class Interview(models.Model):
+class Interview(LoadedStateMixin, models.Model):
     WAITING_PLANIFICATION = "NP"
     WAITING_PLANIFICATION_RESPONSE = "PR"
     PLANNED = "PL"
@@ -584,6 +747,12 @@ class Interview(models.Model):
         InterviewKind, verbose_name=_("Kind of interview"), blank=True, null=True, on_delete=models.SET_NULL
     )
 
+    # copied by AnalyticsFact rows, interviewers aside
+    ANALYTICS_FIELDS = ("process_id", "state", "rank", "planned_date", "kind_of_interview_id", "prequalification")
+    # copied by SearchDocument rows
+    SEARCH_FIELDS = ("process_id", "minute")
+    LOADED_FIELDS = ANALYTICS_FIELDS + SEARCH_FIELDS
+
     def __str__(self):
         interviewers = ", ".join(i.trigramme for i in self.interviewers.all())
         return "#{rank} - {process} - {itws}".format(rank=self.rank, process=self.process, itws=interviewers)
@@ -612,18 +781,15 @@ class Interview(models.Model):
             self.state = self.WAITING_PLANIFICATION
 
         super(Interview, self).save(force_insert, force_update, using, update_fields)
-        if is_new or (Interview.objects.filter(process=self.process).last() == self and self.process.is_open()):
-            if self.state == self.WAITING_PLANIFICATION:
-                self.process.state = Process.WAITING_INTERVIEW_PLANIFICATION
-            if self.state == self.WAITING_PLANIFICATION_RESPONSE:
-                self.process.state = Process.WAITING_INTERVIEW_PLANIFICATION_RESPONSE
-            elif self.state == self.PLANNED:
-                self.process.state = Process.INTERVIEW_IS_PLANNED
-            elif self.state == self.WAIT_INFORMATION:
-                self.process.state = Process.WAITING_ITW_MINUTE
-            elif self.state in (Interview.GO, Interview.NO_GO):
-                self.process.state = Process.WAITING_NEXT_INTERVIEWER_TO_BE_DESIGNED_OR_END_OF_PROCESS
+        self._set_loaded_state()
+        work = unitofwork.current()
+        if work is not None:
+            work.interview_saved(self, is_new)
+        elif is_new or (Interview.objects.filter(process=self.process).last() == self and self.process.is_open()):
+            self.process.set_state_from_interview(self)
             self.process.save()
+        else:
+            listcache.bump(self.process.subsidiary_id)
 
     def get_absolute_url(self):
         from django.urls import reverse
@@ -693,12 +859,11 @@ class Interview(models.Model):
             body_template = "interview/email/interview_planned.txt"
 
         if subject and body_template:
-            url = os.path.join(settings.SITE_HOST, self.process.get_absolute_url().lstrip("/"))
-            body = render_to_string(body_template, {"interview": self, "url": url})
+            notifications.notify(self, body_template, lambda: self.send_notification(subject, body_template))
 
-            mail.send_mail(
-                subject=subject, message=body, from_email=settings.MAIL_FROM, recipient_list=self.recipient_list()
-            )
+    def send_notification(self, subject, body_template):
+        url = os.path.join(settings.SITE_HOST, self.process.get_absolute_url().lstrip("/"))
+        OutboxEmail.objects.notify(subject, body_template, {"interview": self, "url": url}, self.recipient_list())
 
     def recipient_list(self):
         recipients = self.process.recipient_list()
@@ -747,6 +912,22 @@ def interview_m2m_changed(sender, **kwargs):
         instance.process.save()
         # trigger notification
         instance.trigger_notification()
+    elif kwargs["action"] in ("post_remove", "post_clear") and not kwargs["reverse"]:
+        listcache.bump(kwargs["instance"].process.subsidiary_id)
+
+
+@receiver(post_delete, sender=Process)
+@receiver(post_delete, sender=Interview)
+def process_deleted(sender, instance, **kwargs):
+    listcache.bump(instance.subsidiary_id if sender is Process else instance.process.subsidiary_id)
+
+
+@receiver(post_save, sender=PyouPyouUser)
+def user_saved(sender, update_fields=None, **kwargs):
+    # responsibles and interviewers are displayed in processes lists of any subsidiary, last login is saved on
+    # each login
+    if update_fields is None or set(update_fields) != {"last_login"}:
+        listcache.bump(*Subsidiary.objects.values_list("id", flat=True))
 
 
 class ResponsibleRule(models.Model):
@@ -758,3 +939,385 @@ class ResponsibleRule(models.Model):
     contract_type = models.ForeignKey(ContractType, null=True, blank=True, on_delete=models.CASCADE)
     offer = models.ForeignKey(Offer, null=True, blank=True, on_delete=models.CASCADE)
     priority = models.IntegerField(default=0)
+
+
+def fiscal_year(date):
+    """Fiscal year label ("2024/2025") of date, fiscal year starting on settings.FINANCIAL_STARTING_MONTH_DAY"""
+    month, day = (int(x) for x in settings.FINANCIAL_STARTING_MONTH_DAY.split("-"))
+    if date < datetime.date(date.year, month, day):
+        return "%d/%d" % (date.year - 1, date.year)
+    return "%d/%d" % (date.year, date.year + 1)
+
+
+class AnalyticsFactManager(models.Manager):
+    def refresh(self, process_ids):
+        """Recompute facts of given processes, facts of deleted processes are removed"""
+        process_ids = list(process_ids)
+        processes = (
+            Process.objects.filter(id__in=process_ids)
+            .annotate(interview_last_planned_date=Max("interview__planned_date"), itw_count=Count("interview"))
+            .order_by("id")
+        )
+        interviews = defaultdict(list)
+        for interview in (
+            Interview.objects.filter(process_id__in=process_ids)
+            .prefetch_related("interviewers")
+            .order_by("process", "rank")
+        ):
+            interviews[interview.process_id].append(interview)
+
+        facts = []
+        for process in processes:
+            if process.end_date:
+                length_end_date = process.end_date
+            elif process.interview_last_planned_date:
+                length_end_date = process.interview_last_planned_date.date()
+            else:
+                length_end_date = None
+            process_fact = {
+                "process": process,
+                "subsidiary_id": process.subsidiary_id,
+                "sources_id": process.sources_id,
+                "offer_id": process.offer_id,
+                "contract_type_id": process.contract_type_id,
+                "start_date": process.start_date,
+                "start_fiscal_year": fiscal_year(process.start_date),
+                "end_date": process.end_date,
+                "length_end_date": length_end_date,
+                "state": process.state,
+                "itw_count": process.itw_count,
+                "contract_start_date": process.contract_start_date,
+                "contract_duration": process.contract_duration,
+            }
+            # process row
+            facts.append(AnalyticsFact(**process_fact))
+
+            process_interviews = interviews[process.id]
+            for idx, interview in enumerate(process_interviews):
+                # Compute time elapsed since last event (previous interview or beginning of process)
+                days_since_last_itw = None
+                last_event_date = process.start_date
+                if interview.rank > 1:
+                    last_itw = process_interviews[idx - 1]
+                    last_event_date = last_itw.planned_date.date() if last_itw.planned_date is not None else None
+                if interview.planned_date is not None and last_event_date is not None:
+                    days_since_last_itw = int((interview.planned_date.date() - last_event_date).days)
+                    # we have some processes that were created after the first itw was planned
+                    if days_since_last_itw < 0:
+                        days_since_last_itw = None
+
+                facts.append(
+                    AnalyticsFact(
+                        interview=interview,
+                        interview_state=interview.state,
+                        interview_rank=interview.rank,
+                        interview_planned_date=interview.planned_date,
+                        kind_of_interview_id=interview.kind_of_interview_id,
+                        prequalification=interview.prequalification,
+                        interviewers="_".join(i.trigramme for i in interview.interviewers.all()),
+                        days_since_last_itw=days_since_last_itw,
+                        **process_fact,
+                    )
+                )
+
+        with transaction.atomic():
+            self.filter(process_id__in=process_ids).delete()
+            self.bulk_create(facts)
+
+    def rebuild(self, batch_size=500):
+        """Recompute all facts, returns the number of processes"""
+        self.all().delete()
+        process_ids = list(Process.objects.order_by("id").values_list("id", flat=True))
+        for start in range(0, len(process_ids), batch_size):
+            self.refresh(process_ids[start : start + batch_size])
+        return len(process_ids)
+
+
+class AnalyticsFact(models.Model):
+    """
+    Denormalized process x interview data used by analysis pages
+
+    Every process has one row without interview and one row per interview. Rows are refreshed when
+    processes or interviews change, `./manage.py rebuild_analytics` rebuilds the whole table.
+    """
+
+    objects = AnalyticsFactManager()
+
+    process = models.ForeignKey(Process, on_delete=models.CASCADE)
+    interview = models.ForeignKey(Interview, null=True, on_delete=models.CASCADE)
+
+    # process data
+    subsidiary = models.ForeignKey(Subsidiary, on_delete=models.CASCADE)
+    sources = models.ForeignKey(Sources, null=True, on_delete=models.SET_NULL)
+    offer = models.ForeignKey(Offer, null=True, on_delete=models.SET_NULL)
+    contract_type = models.ForeignKey(ContractType, null=True, on_delete=models.SET_NULL)
+    start_date = models.DateField()
+    start_fiscal_year = models.CharField(max_length=9)
+    end_date = models.DateField(null=True)
+    # date used to compute process length, process is still running when null
+    length_end_date = models.DateField(null=True)
+    state = models.CharField(max_length=3, choices=Process.PROCESS_STATE)
+    itw_count = models.PositiveIntegerField()
+    contract_start_date = models.DateField(null=True)
+    contract_duration = models.PositiveIntegerField(null=True)
+
+    # interview data
+    interview_state = models.CharField(max_length=3, choices=Interview.ITW_STATE, blank=True)
+    interview_rank = models.IntegerField(null=True)
+    interview_planned_date = models.DateTimeField(null=True)
+    kind_of_interview = models.ForeignKey(InterviewKind, null=True, on_delete=models.SET_NULL)
+    prequalification = models.BooleanField(default=False)
+    interviewers = models.CharField(max_length=255, blank=True)
+    # null when unknown
+    days_since_last_itw = models.IntegerField(null=True)
+
+    @property
+    def process_length(self):
+        end_date = self.length_end_date or datetime.date.today()
+        return (end_date - self.start_date).days
+
+    @property
+    def mean_days_between_itws(self):
+        return 0 if self.itw_count == 0 else int(self.process_length / self.itw_count)
+
+
+@receiver(post_save, sender=Process)
+@receiver(post_save, sender=Interview)
+def refresh_analytics_facts(sender, instance, created, **kwargs):
+    # interviewers are refreshed on change below
+    if created or instance.changed(sender.ANALYTICS_FIELDS):
+        process_id = instance.id if sender is Process else instance.process_id
+        AnalyticsFact.objects.refresh([process_id])
+
+
+@receiver(post_delete, sender=Interview)
+def interview_deleted(sender, instance, **kwargs):
+    # process may be deleted in the same transaction, refresh once it is done
+    transaction.on_commit(lambda: AnalyticsFact.objects.refresh([instance.process_id]))
+
+
+@receiver(m2m_changed, sender=Interview.interviewers.through)
+def interviewers_changed(sender, **kwargs):
+    if kwargs["action"] in ("post_add", "post_remove", "post_clear") and not kwargs["reverse"]:
+        AnalyticsFact.objects.refresh([kwargs["instance"].process_id])
+
+
+class SearchDocumentManager(models.Manager):
+    def refresh(self, process_ids):
+        """Recompute search documents of given processes, documents of deleted processes are removed"""
+        process_ids = list(process_ids)
+        minutes = defaultdict(list)
+        for process_id, minute in (
+            Interview.objects.filter(process_id__in=process_ids)
+            .exclude(minute="")
+            .order_by("process", "rank")
+            .values_list("process_id", "minute")
+        ):
+            minutes[process_id].append(minute)
+
+        documents = []
+        for process in Process.objects.filter(id__in=process_ids).select_related("candidate"):
+            candidate = process.candidate
+            documents.append(
+                SearchDocument(
+                    process=process,
+                    candidate=" ".join(x for x in (candidate.name, candidate.email, candidate.phone) if x),
+                    notes="\n".join(
+                        x for x in (process.other_informations, process.closed_comment, *minutes[process.id]) if x
+                    ),
+                )
+            )
+
+        with transaction.atomic():
+            self.filter(process_id__in=process_ids).delete()
+            self.bulk_create(documents)
+
+    def rebuild(self, batch_size=500):
+        """Recompute all search documents, returns the number of processes"""
+        self.all().delete()
+        process_ids = list(Process.objects.order_by("id").values_list("id", flat=True))
+        for start in range(0, len(process_ids), batch_size):
+            self.refresh(process_ids[start : start + batch_size])
+        return len(process_ids)
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of a process, indexed by the database full text engine (see interview.search)
+
+    Documents are refreshed when candidates, processes or interviews change,
+    `./manage.py rebuild_search_index` rebuilds the whole table.
+    """
+
+    objects = SearchDocumentManager()
+
+    process = models.OneToOneField(Process, primary_key=True, on_delete=models.CASCADE)
+    # candidate name, email and phone
+    candidate = models.TextField()
+    # process other informations, closed comment and interviews minutes
+    notes = models.TextField()
+
+
+@receiver(post_save, sender=Process)
+@receiver(post_save, sender=Interview)
+def refresh_search_documents(sender, instance, created, **kwargs):
+    if created or instance.changed(sender.SEARCH_FIELDS):
+        process_id = instance.id if sender is Process else instance.process_id
+        SearchDocument.objects.refresh([process_id])
+
+
+@receiver(post_save, sender=Candidate)
+def refresh_candidate_search_documents(sender, instance, created, **kwargs):
+    # a new candidate has no process yet
+    if not created and instance.changed(sender.SEARCH_FIELDS):
+        SearchDocument.objects.refresh(instance.process_set.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Interview)
+def refresh_search_documents_on_interview_delete(sender, instance, **kwargs):
+    # process may be deleted in the same transaction, refresh once it is done
+    transaction.on_commit(lambda: SearchDocument.objects.refresh([instance.process_id]))
+
+
+class OutboxEmailManager(models.Manager):
+    def queue(self, subject, body, recipients):
+        """Store an email to be sent by `./manage.py send_notifications`, in the current transaction"""
+        recipients = sorted(set(recipients))
+        if not recipients:
+            return None
+        return self.create(subject=subject, body=body, from_email=settings.MAIL_FROM, recipients="\n".join(recipients))
+
+    def notify(self, subject, template, context, recipients):
+        """
+        Queue a notification rendered from template, with a link to context["url"]
+
+        Users who chose a digest get a line in their next digest instead, the body is only rendered for
+        recipients notified immediately.
+        """
+        recipients = set(recipients)
+        digests = dict(
+            PyouPyouUser.objects.filter(email__in=recipients, is_active=True)
+            .exclude(notification_frequency=PyouPyouUser.NotificationFrequency.IMMEDIATE)
+            .values_list("email", "notification_frequency")
+        )
+        self.bulk_create(
+            OutboxEmail(
+                subject=subject, from_email=settings.MAIL_FROM, recipients=email, digest=frequency, url=context["url"]
+            )
+            for email, frequency in digests.items()
+        )
+        if recipients - digests.keys():
+            self.queue(subject, render_to_string(template, context), recipients - digests.keys())
+
+    def pending(self):
+        return self.filter(
+            digest="", sent_at__isnull=True, attempts__lt=settings.NOTIFICATION_MAX_ATTEMPTS, next_attempt__lte=now()
+        ).order_by("id")
+
+    def build_digests(self, frequency):
+        """
+        Queue one email per recipient listing their notifications waiting for a digest of this frequency
+
+        Returns the number of digests queued.
+        """
+        with transaction.atomic():
+            events = defaultdict(list)
+            for event in (
+                self.filter(digest=frequency, sent_at__isnull=True).select_for_update(skip_locked=True).order_by("id")
+            ):
+                events[event.recipients].append(event)
+
+            for recipient, recipient_events in events.items():
+                self.queue(
+                    _("{count} notifications").format(count=len(recipient_events)),
+                    render_to_string("interview/email/digest.txt", {"events": recipient_events}),
+                    [recipient],
+                )
+            self.filter(id__in=[event.id for event in itertools.chain(*events.values())]).update(sent_at=now())
+            return len(events)
+
+    def deliver(self, batch_size=100, connection=None):
+        """
+        Send pending emails of one batch over a single connection, returns the number of emails sent
+
+        The batch is claimed for settings.NOTIFICATION_SEND_LEASE seconds in a short transaction, so that
+        concurrent workers send distinct batches, then sent outside of it. Each email is marked sent once
+        sent, a worker stopped meanwhile only leaves its unsent emails to the next worker once the lease expires.
+        Failed emails are retried later, the delay doubling after each attempt. A batch whose connection cannot be
+        opened is postponed without counting an attempt.
+        """
+        with transaction.atomic():
+            emails = list(self.pending().select_for_update(skip_locked=True)[:batch_size])
+            if not emails:
+                return 0
+            claimed = self.filter(id__in=[email.id for email in emails])
+            claimed.update(next_attempt=now() + datetime.timedelta(seconds=settings.NOTIFICATION_SEND_LEASE))
+
+        sent = 0
+        connection = connection or mail.get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            claimed.update(
+                next_attempt=now() + datetime.timedelta(seconds=settings.NOTIFICATION_RETRY_DELAY), last_error=repr(e)
+            )
+            return 0
+        try:
+            for email in emails:
+                try:
+                    connection.send_messages([email.message(connection)])
+                except Exception as e:
+                    email.failed(e)
+                else:
+                    email.sent_at = now()
+                    email.save(update_fields=["sent_at"])
+                    sent += 1
+        finally:
+            connection.close()
+        return sent
+
+
+class OutboxEmail(models.Model):
+    """
+    Notification email waiting to be sent
+
+    Emails are stored in the transaction of the change they notify, so nothing is sent if it is rolled back,
+    and sent in batches by `./manage.py send_notifications`.
+
+    Notifications of users who chose a digest are stored per recipient with their digest frequency and without
+    body, `./manage.py send_digests` groups them into a single email.
+    """
+
+    objects = OutboxEmailManager()
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    # one address per line
+    recipients = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+    next_attempt = models.DateTimeField(default=now, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # digest frequency of the recipient, empty when sent immediately
+    digest = models.CharField(max_length=10, blank=True, choices=PyouPyouUser.NotificationFrequency.choices)
+    # notified page, listed in digests
+    url = models.CharField(max_length=255, blank=True)
+
+    def message(self, connection=None):
+        return mail.EmailMessage(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=self.recipients.splitlines(),
+            connection=connection,
+        )
+
+    def failed(self, error):
+        self.attempts += 1
+        self.last_error = repr(error)
+        self.next_attempt = now() + datetime.timedelta(
+            seconds=settings.NOTIFICATION_RETRY_DELAY * 2 ** (self.attempts - 1)
+        )
+        self.save(update_fields=["attempts", "last_error", "next_attempt"])
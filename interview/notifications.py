@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Coalescing of notifications
+
+A single user action saves an interview, its process and interviewers several times, each save triggering
+notifications. Within `collecting()` (each request, see pyoupyou.middleware.NotificationCollectorMiddleware)
+notifications are kept once per (object, event), the last triggered one wins, and only sent when the
+outermost block ends: recipients are computed and bodies rendered once, from the latest object state.
+
+A notification is only kept once the transaction it was triggered in is committed, so nothing is sent for
+rolled back changes. Outside of `collecting()` notifications are sent at once, in the current transaction.
+"""
+import contextlib
+import threading
+
+from django.db import transaction
+
+_local = threading.local()
+
+
+class Collector:
+    def __init__(self):
+        self.events = {}
+
+    def add(self, key, send):
+        self.events[key] = send
+
+    def flush(self):
+        events, self.events = self.events, {}
+        with transaction.atomic():
+            for send in events.values():
+                send()
+
+
+def current():
+    """Collector of the running `collecting()` block, None outside"""
+    return getattr(_local, "collector", None)
+
+
+@contextlib.contextmanager
+def collecting():
+    """Collect notifications triggered in this block and send them once at its end, blocks may be nested"""
+    if current() is not None:
+        yield current()
+        return
+
+    collector = _local.collector = Collector()
+    try:
+        yield collector
+    finally:
+        _local.collector = None
+        collector.flush()
+
+
+def notify(instance, event, send):
+    """Call send() to notify event of instance, once per collecting block and only if committed"""
+    collector = current()
+    if collector is None:
+        send()
+        return
+    key = (instance._meta.label, instance.pk, event)
+    transaction.on_commit(lambda: collector.add(key, send))
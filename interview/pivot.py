@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Server side aggregation of analytics facts for the analysis pages
+
+Pivot attributes are the translated labels displayed on analysis pages. Facts are grouped by the
+requested attributes and only aggregated cells are sent to the browser.
+"""
+import datetime
+
+import pandas as pd
+from django.utils.translation import gettext_lazy as _
+
+from interview.models import AnalyticsFact, Interview, Process
+
+AGGREGATORS = ("Count", "Average")
+
+PROCESS_STATES = dict(Process.PROCESS_STATE)
+INTERVIEW_STATES = dict(Interview.ITW_STATE)
+
+
+def _strftime(field, fmt):
+    return lambda df: df[field].map(lambda d: "" if pd.isna(d) else d.strftime(fmt))
+
+
+def _str(field):
+    # same as str() of a missing related object
+    return lambda df: df[field].map(lambda v: "None" if pd.isna(v) else str(v))
+
+
+def _process_length(df):
+    today = datetime.date.today()
+    return pd.Series(
+        [
+            ((today if pd.isna(end) else end) - start).days
+            for start, end in zip(df["start_date"], df["length_end_date"])
+        ],
+        index=df.index,
+        dtype="int64",
+    )
+
+
+def _mean_days_between_itws(df):
+    return pd.Series(
+        [0 if count == 0 else int(length / count) for length, count in zip(_process_length(df), df["itw_count"])],
+        index=df.index,
+        dtype="int64",
+    )
+
+
+def _offer(df):
+    return pd.Series(
+        [
+            "None" if pd.isna(name) else "{name} ({sub})".format(name=name, sub=sub)
+            for name, sub in zip(df["offer__name"], df["offer__subsidiary__name"])
+        ],
+        index=df.index,
+    )
+
+
+def _source_category(df):
+    return pd.Series(
+        [
+            "" if pd.isna(source) else category
+            for source, category in zip(df["sources_id"], df["sources__category__name"])
+        ],
+        index=df.index,
+    )
+
+
+# label: (facts fields, function computing attribute values from a dataframe of these fields)
+PROCESS_ATTRIBUTES = {
+    _("subsidiary"): (["subsidiary__name"], lambda df: df["subsidiary__name"]),
+    _("process id"): (["process_id"], lambda df: df["process_id"].map(str)),
+    _("process start date"): (["start_date"], _strftime("start_date", "%Y-%m-%d")),
+    _("process start year month"): (["start_date"], _strftime("start_date", "%Y-%m")),
+    _("process start fiscal year"): (["start_fiscal_year"], lambda df: df["start_fiscal_year"]),
+    _("process end date"): (["end_date"], _strftime("end_date", "%Y-%m-%d")),
+    _("process length"): (["start_date", "length_end_date"], _process_length),
+    _("source"): (["sources__name"], _str("sources__name")),
+    _("source category"): (["sources_id", "sources__category__name"], _source_category),
+    _("offer"): (["offer__name", "offer__subsidiary__name"], _offer),
+    _("contract type"): (["contract_type__name"], _str("contract_type__name")),
+    _("contract start date"): (["contract_start_date"], _strftime("contract_start_date", "%Y-%m")),
+    _("contract duration"): (["contract_duration"], lambda df: df["contract_duration"].fillna(0).astype("int64")),
+    _("process state label"): (["state"], lambda df: df["state"].map(lambda s: str(PROCESS_STATES[s]))),
+    _("process itw count"): (["itw_count"], lambda df: df["itw_count"]),
+    _("mean days between itws"): (["start_date", "length_end_date", "itw_count"], _mean_days_between_itws),
+}
+
+INTERVIEW_ATTRIBUTES = {
+    label: attribute
+    for label, attribute in PROCESS_ATTRIBUTES.items()
+    if label not in (_("process id"), _("process start year month"), _("process length"))
+} | {
+    _("itw state label"): (
+        ["interview_state"],
+        lambda df: df["interview_state"].map(lambda s: str(INTERVIEW_STATES[s])),
+    ),
+    _("interviewers"): (["interviewers"], lambda df: df["interviewers"]),
+    _("interview rank"): (["interview_rank"], lambda df: df["interview_rank"].astype("int64")),
+    _("days since last itw"): (
+        ["days_since_last_itw"],
+        lambda df: df["days_since_last_itw"].map(lambda d: str(_("Unknown")) if pd.isna(d) else int(d)),
+    ),
+    _("itw id"): (["interview_id"], lambda df: df["interview_id"]),
+    _("itw date"): (["interview_planned_date"], _strftime("interview_planned_date", "%Y-%m-%d")),
+    _("itw year month"): (["interview_planned_date"], _strftime("interview_planned_date", "%Y-%m")),
+    _("itw kind"): (["kind_of_interview__name"], _str("kind_of_interview__name")),
+    _("itw prequalification"): (
+        ["prequalification"],
+        lambda df: df["prequalification"].map(lambda p: str(_("yes")) if p else str(_("no"))),
+    ),
+}
+
+KINDS = {
+    "processes": (PROCESS_ATTRIBUTES, {"interview__isnull": True}),
+    "interviews": (INTERVIEW_ATTRIBUTES, {"interview__isnull": False}),
+}
+
+
+class PivotError(ValueError):
+    pass
+
+
+def facts(kind):
+    """Analytics facts used by kind ("processes" or "interviews") analysis"""
+    return AnalyticsFact.objects.filter(**KINDS[kind][1])
+
+
+def attributes(kind):
+    """Labels of kind analysis attributes"""
+    return [str(label) for label in KINDS[kind][0]]
+
+
+def aggregate(kind, queryset, attributes, aggregator="Count", vals=None):
+    """
+    Group queryset facts by the given attributes labels
+
+    Returns a list of records, one per non empty cell, holding attributes values, `count` and for the
+    Average aggregator `sum` of vals first attribute. Unknown attributes are ignored.
+    """
+    if aggregator not in AGGREGATORS:
+        raise PivotError("Unknown aggregator {aggregator}".format(aggregator=aggregator))
+    available = {str(label): attribute for label, attribute in KINDS[kind][0].items()}
+    dimensions = list(dict.fromkeys(name for name in attributes if name in available))
+    measure = None
+    if aggregator == "Average":
+        if not vals or vals[0] not in available:
+            raise PivotError("Average needs a known attribute in vals")
+        measure = vals[0]
+
+    used = list(dict.fromkeys(dimensions + ([measure] if measure else [])))
+    if not used:
+        count = queryset.count()
+        return [{"count": count}] if count else []
+    fields = list(dict.fromkeys(field for name in used for field in available[name][0]))
+    df = pd.DataFrame.from_records(list(queryset.values_list(*fields)), columns=fields)
+    if df.empty:
+        return []
+
+    values = pd.DataFrame({name: available[name][1](df) for name in used}, index=df.index)
+    if measure:
+        measures = pd.to_numeric(values[measure], errors="coerce")
+        values = values.assign(count=measures.notna().astype("int64"), sum=measures.fillna(0))
+        columns = ["count", "sum"]
+    else:
+        values = values.assign(count=1)
+        columns = ["count"]
+
+    if not dimensions:
+        return [{column: values[column].sum().item() for column in columns}]
+    return values.groupby(dimensions, sort=False, dropna=False)[columns].sum().reset_index().to_dict("records")
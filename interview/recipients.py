@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Compiled responsible rules and notification recipients
+
+Responsible rules are compiled into a dict keyed by (sources, subsidiary, contract type, offer), None being
+the wildcard, holding the rule with the highest precedence (highest priority, then oldest rule) for each key.
+The rule of a process is the one with the highest precedence among the 16 keys matching it. Subsidiaries
+responsible and informed users and offers subscribers ids are loaded along.
+
+Like interview.refdata, each worker keeps them in memory along with the version they were loaded at. The
+version is stored in Django cache and replaced on any change of rules, subsidiaries, subscriptions or users.
+With the default local memory backend, which is private to each worker, nothing is kept unless
+settings.REFERENCE_DATA_CACHE is set: the rules and users matching a process are queried on each call, or once
+for a whole `loaded()` block. Recipients emails are read along with processes subscribers when notifying, from
+active users only.
+"""
+import contextlib
+import functools
+import itertools
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from interview import refdata
+from interview.models import Offer, Process, ResponsibleRule
+from ref.models import PyouPyouUser, Subsidiary
+
+VERSION_KEY = "recipients:version"
+
+
+class _State:
+    """Rules and users, of process only when set"""
+
+    def __init__(self, version, process=None):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.process = process
+
+        rules = ResponsibleRule.objects.select_related("responsible")
+        subsidiaries = Subsidiary.objects.select_related("responsible")
+        if process is not None:
+            # null is the wildcard
+            rules = rules.filter(
+                Q(sources=process.sources_id) | Q(sources__isnull=True),
+                Q(subsidiary=process.subsidiary_id) | Q(subsidiary__isnull=True),
+                Q(contract_type=process.contract_type_id) | Q(contract_type__isnull=True),
+                Q(offer=process.offer_id) | Q(offer__isnull=True),
+            )
+            subsidiaries = subsidiaries.filter(id=process.subsidiary_id)
+
+        self.rules = {}
+        for rule in rules.order_by("-priority", "pk"):
+            self.rules.setdefault((rule.sources_id, rule.subsidiary_id, rule.contract_type_id, rule.offer_id), rule)
+
+        self.subsidiary_responsible = {subsidiary.id: subsidiary.responsible for subsidiary in subsidiaries}
+
+    @functools.cached_property
+    def informed(self):
+        informed = Subsidiary.informed.through.objects
+        if self.process is not None:
+            informed = informed.filter(subsidiary_id=self.process.subsidiary_id)
+        return _users_by(informed, "subsidiary_id")
+
+    @functools.cached_property
+    def offer_subscribers(self):
+        subscribers = Offer.subscribers.through.objects
+        if self.process is not None:
+            subscribers = subscribers.filter(offer_id=self.process.offer_id)
+        return _users_by(subscribers, "offer_id")
+
+    @staticmethod
+    def precedence(rule):
+        return -rule.priority, rule.pk
+
+    def rule(self, process):
+        keys = itertools.product(
+            (process.sources_id, None),
+            (process.subsidiary_id, None),
+            (process.contract_type_id, None),
+            (process.offer_id, None),
+        )
+        rules = [self.rules[key] for key in keys if key in self.rules]
+        return min(rules, key=self.precedence) if rules else None
+
+
+def _users_by(through_objects, field):
+    users = {}
+    for pk, user_id in through_objects.values_list(field, "pyoupyouuser_id"):
+        users.setdefault(pk, set()).add(user_id)
+    return users
+
+
+_state = None
+_local = threading.local()
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _get(process):
+    global _state
+    if getattr(_local, "state", None) is not None:
+        return _local.state
+    if not refdata.enabled():
+        return _State(None, process)
+    current = cache.get_or_set(VERSION_KEY, _new_version, timeout=None)
+    state = _state
+    if (
+        state is None
+        or state.version != current
+        or time.monotonic() - state.loaded_at > settings.REFERENCE_DATA_MAX_AGE
+    ):
+        state = _state = _State(current)
+    return state
+
+
+@contextlib.contextmanager
+def loaded():
+    """Use all rules and users loaded once for the whole block, even when they are not cached"""
+    if getattr(_local, "state", None) is not None:
+        yield
+        return
+    _local.state = _get(None) if refdata.enabled() else _State(None)
+    try:
+        yield
+    finally:
+        _local.state = None
+
+
+def responsible(process):
+    """
+    Default responsible of process: responsible of the matching rule with the highest precedence when active,
+    else the subsidiary responsible
+    """
+    state = _get(process)
+    rule = state.rule(process)
+    if rule is not None and rule.responsible.is_active:
+        return rule.responsible
+    return state.subsidiary_responsible.get(process.subsidiary_id)
+
+
+def process_recipients(process):
+    """Emails of active users notified of process changes, read in one query"""
+    state = _get(process)
+    user_ids = set(state.informed.get(process.subsidiary_id, ()))
+    # the default responsible is the rule responsible when active, else the subsidiary responsible: both are
+    # notified when active
+    subsidiary_responsible = state.subsidiary_responsible.get(process.subsidiary_id)
+    if subsidiary_responsible is not None:
+        user_ids.add(subsidiary_responsible.id)
+    rule = state.rule(process)
+    if rule is not None:
+        user_ids.add(rule.responsible_id)
+    if process.offer_id:
+        user_ids.update(state.offer_subscribers.get(process.offer_id, ()))
+
+    users = Q(id__in=user_ids)
+    if process.pk is not None:
+        users |= Q(subscribed_processes=process.pk)
+    return set(PyouPyouUser.objects.filter(users, is_active=True).order_by().values_list("email", flat=True).distinct())
+
+
+def invalidate():
+    cache.set(VERSION_KEY, _new_version(), timeout=None)
+
+
+def _changed():
+    # invalidate now for this transaction readers and again once committed, a worker may have reloaded
+    # rows in between without seeing the change
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=ResponsibleRule)
+@receiver(post_save, sender=Subsidiary)
+@receiver(post_delete, sender=ResponsibleRule)
+@receiver(post_delete, sender=Subsidiary)
+@receiver(post_delete, sender=PyouPyouUser)
+def rules_changed(sender, **kwargs):
+    _changed()
+
+
+@receiver(post_save, sender=PyouPyouUser)
+def user_changed(sender, update_fields=None, **kwargs):
+    # last login is saved on each login
+    if update_fields is None or set(update_fields) != {"last_login"}:
+        _changed()
+
+
+@receiver(m2m_changed, sender=Subsidiary.informed.through)
+@receiver(m2m_changed, sender=Offer.subscribers.through)
+@receiver(m2m_changed, sender=Process.subscribers.through)
+def subscriptions_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        _changed()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Process wide cache of reference data
+
+Subsidiaries, contract types, sources, sources categories, offers and interview kinds rarely change but are
+read by most pages. Each worker keeps them in memory along with the version they were loaded at. The current
+version is stored in Django cache and replaced on any save or delete of these models, so that every worker
+reloads them on next access. This only reaches other workers when the default cache is shared between them
+(memcached, redis, database...): rows are queried on each access with the default local memory backend unless
+settings.REFERENCE_DATA_CACHE is set, they are reloaded anyway after settings.REFERENCE_DATA_MAX_AGE seconds.
+
+Cached rows are shared by all requests of the worker and must not be modified.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from interview.models import ContractType, InterviewKind, Offer, Sources, SourcesCategory
+from ref.models import Subsidiary
+
+VERSION_KEY = "refdata:version"
+
+LOADERS = {
+    "subsidiaries": lambda: Subsidiary.objects.all(),
+    "contract_types": lambda: ContractType.objects.order_by("pk"),
+    "sources": lambda: Sources.objects.select_related("category"),
+    "sources_categories": lambda: SourcesCategory.objects.order_by("pk"),
+    "offers": lambda: Offer.objects.select_related("subsidiary"),
+    "interview_kinds": lambda: InterviewKind.objects.order_by("pk"),
+}
+
+
+class _State:
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.rows = {}
+
+
+_state = _State(None)
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def shared_cache():
+    """Whether CACHES default backend is shared between workers"""
+    # each worker has its own local memory cache, other workers would not see versions changes
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def enabled():
+    if settings.REFERENCE_DATA_CACHE is not None:
+        return settings.REFERENCE_DATA_CACHE
+    return shared_cache()
+
+
+def version():
+    """Current reference data version, replaced on any change"""
+    return cache.get_or_set(VERSION_KEY, _new_version, timeout=None)
+
+
+def _get(name):
+    global _state
+    if not enabled():
+        return tuple(LOADERS[name]())
+    current = version()
+    state = _state
+    if state.version != current or time.monotonic() - state.loaded_at > settings.REFERENCE_DATA_MAX_AGE:
+        state = _state = _State(current)
+    if name not in state.rows:
+        state.rows[name] = tuple(LOADERS[name]())
+    return state.rows[name]
+
+
+def subsidiaries():
+    return _get("subsidiaries")
+
+
+def contract_types():
+    return _get("contract_types")
+
+
+def contract_type_colors():
+    return {contract_type.name: contract_type.color for contract_type in contract_types()}
+
+
+def sources():
+    return _get("sources")
+
+
+def sources_categories():
+    return _get("sources_categories")
+
+
+def offers():
+    return _get("offers")
+
+
+def interview_kinds():
+    return _get("interview_kinds")
+
+
+def set_choices(field, rows):
+    """
+    Render choices of a model choice field from cached rows instead of querying its queryset
+
+    Submitted values are still validated against the field queryset.
+    """
+    field.widget.choices = ([("", field.empty_label)] if field.empty_label is not None else []) + [
+        (row.pk, str(row)) for row in rows
+    ]
+
+
+def invalidate():
+    cache.set(VERSION_KEY, _new_version(), timeout=None)
+
+
+@receiver(post_save, sender=Subsidiary)
+@receiver(post_save, sender=ContractType)
+@receiver(post_save, sender=Sources)
+@receiver(post_save, sender=SourcesCategory)
+@receiver(post_save, sender=Offer)
+@receiver(post_save, sender=InterviewKind)
+@receiver(post_delete, sender=Subsidiary)
+@receiver(post_delete, sender=ContractType)
+@receiver(post_delete, sender=Sources)
+@receiver(post_delete, sender=SourcesCategory)
+@receiver(post_delete, sender=Offer)
+@receiver(post_delete, sender=InterviewKind)
+def reference_data_changed(sender, **kwargs):
+    # invalidate now for this transaction readers and again once committed, a worker may have reloaded
+    # rows in between without seeing the change
+    invalidate()
+    transaction.on_commit(invalidate)
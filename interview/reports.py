@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Aggregation engines used by the reports pages.
+
+Each engine builds its whole result from a few grouped queries instead of running
+queries per row of the report.
+"""
+import datetime
+
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from interview.models import Interview, Process
+
+PREQUALIFICATION_WEIGHT = 2
+
+
+def calculate_load(itws):
+    """
+    itws is an iterable of {"prequalification": bool, "load": int}, prequalification interviews
+    only count for half an interview
+    """
+    loads = {x["prequalification"]: x["load"] for x in itws}
+    return loads.get(False, 0) + (loads.get(True, 0) / PREQUALIFICATION_WEIGHT)
+
+
+def interviewers_load(pyoupyou_users):
+    """
+    Compute interviewers load for every user of the given queryset
+
+    All windows (past month, past week, planned, not planned yet) are computed with conditional
+    aggregation in a single grouped query. Returns a list of dict following queryset ordering.
+    """
+    a_month_ago = timezone.now() - datetime.timedelta(days=30)
+    a_week_ago = timezone.now() - datetime.timedelta(days=7)
+    end_of_today = timezone.now().replace(hour=23, minute=59, second=59)
+
+    windows = {
+        "itw_last_month": Q(interview__planned_date__gte=a_month_ago, interview__planned_date__lt=end_of_today),
+        "itw_last_week": Q(interview__planned_date__gte=a_week_ago, interview__planned_date__lt=end_of_today),
+        "itw_planned": Q(interview__planned_date__gte=timezone.now()),
+        "itw_not_planned_yet": Q(interview__planned_date=None, interview__process__state__in=Process.OPEN_STATE_VALUES),
+    }
+
+    annotations = {}
+    for name, window in windows.items():
+        for prequalification in (False, True):
+            annotations[f"{name}_{prequalification}"] = Count(
+                "interview", filter=window & Q(interview__prequalification=prequalification)
+            )
+
+    data = []
+    for user in pyoupyou_users.select_related("company").annotate(**annotations):
+        row = {"interviewer": user}
+        for name in windows:
+            row[name] = calculate_load(
+                {"prequalification": prequalification, "load": getattr(user, f"{name}_{prequalification}")}
+                for prequalification in (False, True)
+            )
+        row["load"] = (
+            pow(row["itw_planned"] + row["itw_not_planned_yet"] + 2, 2)
+            + 2 * row["itw_last_week"]
+            + row["itw_last_month"]
+            - 4
+        )
+        data.append(row)
+
+    return data
+
+
+def _processes_stats(subsidiary, distinct_field):
+    """
+    Annotations computing processes statistics through the `process` reverse relation, shared by
+    sources and offers reports
+    """
+    processes = Q(process__subsidiary=subsidiary) if subsidiary else Q(process__isnull=False)
+    return {
+        "total_processes_count": Count("process", filter=processes),
+        "active_processes_count": Count("process", filter=processes & Q(process__state__in=Process.OPEN_STATE_VALUES)),
+        "total_hired": Count("process", filter=processes & Q(process__state=Process.HIRED)),
+        "last_state_change": Max("process__last_state_change", filter=processes),
+        "distinct_count": Count(f"process__{distinct_field}", filter=processes, distinct=True),
+    }
+
+
+def sources_report(sources, subsidiary=None):
+    """
+    Annotate sources with their processes statistics, restricted to subsidiary processes if given
+
+    When a subsidiary is given only sources used by this subsidiary are kept. `distinct_count` is the
+    number of distinct offers.
+    """
+    qs = sources.select_related("category").annotate(**_processes_stats(subsidiary, "offer"))
+    if subsidiary:
+        qs = qs.filter(total_processes_count__gt=0)
+    return qs
+
+
+def offers_report(offers, subsidiary=None):
+    """
+    Annotate offers with their processes statistics, restricted to subsidiary processes if given
+
+    `distinct_count` is the number of distinct sources.
+    """
+    return offers.select_related("subsidiary").annotate(**_processes_stats(subsidiary, "sources"))
+
+
+# Processes listed by name in the activity summary
+SUMMARY_LISTED_STATES = {"hires": Process.HIRED, "offers": Process.JOB_OFFER, "declined": Process.CANDIDATE_DECLINED}
+
+
+def activity_summary(processes, interviews):
+    """
+    Summarize activity of processes and interviews querysets (already filtered on the timespan)
+
+    Processes counters are computed by one query grouped by subsidiary and source, interviews
+    counters by one query grouped by subsidiary, month and state, processes listed by state by a
+    third one. Returns plain data shared by the summary page and its JSON API:
+
+    {
+        "processes": {"new": int, "closed": int, "subsidiaries": [{"name", "new", "closed"}]},
+        "interviews": {"total": int, "go": int, "subsidiaries": [{"name", "total", "go"}]},
+        "sources": [{"name", "count"}],
+        "monthly_interviews": [{"month", "subsidiary", "state", "count"}],
+        "hires" / "offers" / "declined": [{"id", "candidate", "subsidiary", "contract_type", "contract_start_date"}],
+    }
+    """
+    summary = {
+        "processes": {"new": 0, "closed": 0, "subsidiaries": []},
+        "interviews": {"total": 0, "go": 0, "subsidiaries": []},
+        "sources": [],
+        "monthly_interviews": [],
+    }
+
+    process_subsidiaries = {}
+    sources = {}
+    for row in (
+        processes.order_by()
+        .values("subsidiary__name", "sources__name")
+        .annotate(new=Count("id"), closed=Count("id", filter=Q(state__in=Process.CLOSED_STATE_VALUES)))
+    ):
+        summary["processes"]["new"] += row["new"]
+        summary["processes"]["closed"] += row["closed"]
+        subsidiary = process_subsidiaries.setdefault(
+            row["subsidiary__name"], {"name": row["subsidiary__name"], "new": 0, "closed": 0}
+        )
+        subsidiary["new"] += row["new"]
+        subsidiary["closed"] += row["closed"]
+        if row["sources__name"] is not None:
+            sources[row["sources__name"]] = sources.get(row["sources__name"], 0) + row["new"]
+    summary["processes"]["subsidiaries"] = sorted(process_subsidiaries.values(), key=lambda s: s["name"])
+    summary["sources"] = [{"name": name, "count": count} for name, count in sorted(sources.items())]
+
+    interview_subsidiaries = {}
+    monthly = {}
+    for row in (
+        interviews.order_by()
+        .annotate(month=Trunc("planned_date", "month"))
+        .values("process__subsidiary__name", "month", "state")
+        .annotate(count=Count("id"))
+    ):
+        go = row["count"] if row["state"] == Interview.GO else 0
+        summary["interviews"]["total"] += row["count"]
+        summary["interviews"]["go"] += go
+        subsidiary = interview_subsidiaries.setdefault(
+            row["process__subsidiary__name"], {"name": row["process__subsidiary__name"], "total": 0, "go": 0}
+        )
+        subsidiary["total"] += row["count"]
+        subsidiary["go"] += go
+        if row["month"] is not None:
+            key = (row["month"], row["process__subsidiary__name"], row["state"])
+            monthly[key] = monthly.get(key, 0) + row["count"]
+    summary["interviews"]["subsidiaries"] = sorted(interview_subsidiaries.values(), key=lambda s: s["name"])
+    summary["monthly_interviews"] = [
+        {"month": month, "subsidiary": subsidiary, "state": state, "count": count}
+        for (month, subsidiary, state), count in sorted(monthly.items())
+    ]
+
+    listed = {state: name for name, state in SUMMARY_LISTED_STATES.items()}
+    for name in SUMMARY_LISTED_STATES:
+        summary[name] = []
+    for process in (
+        processes.filter(state__in=listed)
+        .select_related("candidate", "subsidiary", "contract_type")
+        .order_by("subsidiary__name", "id")
+    ):
+        summary[listed[process.state]].append(
+            {
+                "id": process.id,
+                "candidate": str(process.candidate.display_name),
+                "subsidiary": process.subsidiary.name,
+                "contract_type": None if process.contract_type is None else process.contract_type.name,
+                "contract_start_date": process.contract_start_date,
+            }
+        )
+
+    return summary
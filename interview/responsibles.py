@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Processes responsible computation
+
+Responsibles of a process follow its state: the default responsible (see interview.recipients) while waiting
+for a decision, interviewers of the last interview while it is being planned, plus interviewers of every
+interview without go/no go while the process is open.
+
+`recompute()` brings responsibles of many processes up to date at once, applying only the differences with
+set based deletes and inserts. It runs once responsible rules or subsidiaries change and when a user with
+rules is (de)activated (settings.RESPONSIBLE_RECOMPUTE_ON_CHANGE), and from `./manage.py recompute_responsibles`.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from interview import listcache, recipients
+from interview.models import Interview, Process, ResponsibleRule
+from ref.models import PyouPyouUser, Subsidiary
+
+DEFAULT_RESPONSIBLE_STATES = (
+    Process.WAITING_INTERVIEWER_TO_BE_DESIGNED,
+    Process.WAITING_NEXT_INTERVIEWER_TO_BE_DESIGNED_OR_END_OF_PROCESS,
+    Process.JOB_OFFER,
+)
+INTERVIEWERS_RESPONSIBLE_STATES = (
+    Process.WAITING_INTERVIEW_PLANIFICATION,
+    Process.WAITING_INTERVIEW_PLANIFICATION_RESPONSE,
+    Process.INTERVIEW_IS_PLANNED,
+)
+
+
+def target(process, interviews):
+    """
+    Responsible user ids of process
+
+    interviews are (state, interviewer ids) of the process interviews, ordered by rank.
+    """
+    responsible = set()
+    if process.state in DEFAULT_RESPONSIBLE_STATES:
+        default_responsible = recipients.responsible(process)
+        if default_responsible is not None:
+            responsible.add(default_responsible.id)
+    elif process.state in INTERVIEWERS_RESPONSIBLE_STATES and interviews:
+        responsible.update(interviews[-1][1])
+
+    if process.is_open():
+        for state, interviewers in interviews:
+            if state not in (Interview.GO, Interview.NO_GO):
+                responsible.update(interviewers)
+    return responsible
+
+
+def recompute(processes=None, dry_run=False, batch_size=2000):
+    """
+    Update responsibles of processes, open processes by default
+
+    Returns {process id: (added user ids, removed user ids)} of processes whose responsibles changed, without
+    changing them when dry_run is set.
+    """
+    if processes is None:
+        processes = Process.objects.filter(state__in=Process.OPEN_STATE_VALUES)
+    process_ids = list(processes.order_by("id").values_list("id", flat=True))
+
+    changes = {}
+    with recipients.loaded():
+        for start in range(0, len(process_ids), batch_size):
+            changes.update(_recompute_batch(process_ids[start : start + batch_size], dry_run))
+    return changes
+
+
+def _interviews(process_ids):
+    """(state, interviewer ids) of interviews of processes ordered by rank, by process id"""
+    interviews = defaultdict(dict)
+    for interview_id, process_id, state, user_id in (
+        Interview.objects.filter(process_id__in=process_ids)
+        .order_by("rank")
+        .values_list("id", "process_id", "state", "interviewers")
+    ):
+        interviews[process_id].setdefault(interview_id, (state, set()))[1].add(user_id)
+    return defaultdict(
+        list,
+        {
+            process_id: [(state, user_ids - {None}) for state, user_ids in process_interviews.values()]
+            for process_id, process_interviews in interviews.items()
+        },
+    )
+
+
+def _current(process_ids):
+    """Responsibles through rows ids by process id and user id"""
+    current = defaultdict(dict)
+    for pk, process_id, user_id in Process.responsible.through.objects.filter(process_id__in=process_ids).values_list(
+        "id", "process_id", "pyoupyouuser_id"
+    ):
+        current[process_id][user_id] = pk
+    return current
+
+
+def _update(processes, interviews, current, dry_run=False):
+    Responsible = Process.responsible.through
+
+    changes = {}
+    subsidiary_ids = set()
+    for process in processes:
+        responsible = target(process, interviews[process.id])
+        added = responsible - current[process.id].keys()
+        removed = current[process.id].keys() - responsible
+        if added or removed:
+            changes[process.id] = (added, removed)
+            subsidiary_ids.add(process.subsidiary_id)
+
+    if changes and not dry_run:
+        with transaction.atomic():
+            removed_ids = [
+                current[process_id][user_id] for process_id, (_, removed) in changes.items() for user_id in removed
+            ]
+            if removed_ids:
+                Responsible.objects.filter(id__in=removed_ids).delete()
+            Responsible.objects.bulk_create(
+                Responsible(process_id=process_id, pyoupyouuser_id=user_id)
+                for process_id, (added, _) in changes.items()
+                for user_id in added
+            )
+            listcache.bump(*subsidiary_ids)
+    return changes
+
+
+def _recompute_batch(process_ids, dry_run):
+    processes = Process.objects.filter(id__in=process_ids).only(
+        "id", "state", "subsidiary", "sources", "contract_type", "offer"
+    )
+    return _update(processes, _interviews(process_ids), _current(process_ids), dry_run)
+
+
+def update(process, is_new=False):
+    """
+    Update responsibles of a saved process, writing only the differences
+
+    A new process has neither responsible nor interview and interviewers are not responsible of closed
+    processes, they are not queried.
+    """
+    interviews = _interviews([process.id]) if not is_new and process.is_open() else defaultdict(list)
+    current = defaultdict(dict) if is_new else _current([process.id])
+    return _update([process], interviews, current)
+
+
+def recompute_default_responsibles(subsidiary_ids=None):
+    """Update responsibles of open processes waiting for their default responsible, in subsidiary_ids if set"""
+    processes = Process.objects.filter(state__in=DEFAULT_RESPONSIBLE_STATES)
+    if subsidiary_ids is not None:
+        processes = processes.filter(subsidiary_id__in=subsidiary_ids)
+    return recompute(processes)
+
+
+@receiver(post_save, sender=ResponsibleRule)
+@receiver(post_delete, sender=ResponsibleRule)
+def rule_changed(sender, **kwargs):
+    if settings.RESPONSIBLE_RECOMPUTE_ON_CHANGE:
+        # the rule subsidiary may have changed, recompute all subsidiaries once rule is committed
+        transaction.on_commit(recompute_default_responsibles)
+
+
+@receiver(post_save, sender=Subsidiary)
+def subsidiary_changed(sender, instance, created, **kwargs):
+    if settings.RESPONSIBLE_RECOMPUTE_ON_CHANGE and not created:
+        # subsidiary responsible is the default responsible when no rule applies
+        transaction.on_commit(lambda: recompute_default_responsibles([instance.id]))
+
+
+@receiver(post_save, sender=PyouPyouUser)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if not settings.RESPONSIBLE_RECOMPUTE_ON_CHANGE or (update_fields is not None and "is_active" not in update_fields):
+        return
+    # user activation only changes processes of subsidiaries where it is responsible through a rule
+    subsidiary_ids = set(ResponsibleRule.objects.filter(responsible=instance).values_list("subsidiary_id", flat=True))
+    if subsidiary_ids:
+        transaction.on_commit(lambda: recompute_default_responsibles(subsidiary_ids))
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Full text search over processes
+
+Processes are searched through their SearchDocument (candidate name/email/phone, process notes and
+interviews minutes). The backend follows settings.SEARCH_BACKEND, by default the database one:
+
+- "sqlite": FTS5 table ranked with bm25, candidate matches weighting more than notes
+- "mysql": FULLTEXT index in boolean mode ranked by relevance
+- "basic": icontains lookups without index nor ranking, used when the database has no full text index
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from interview.models import Process, SearchDocument
+
+# best matches kept among processes visible by the user
+SEARCH_MAX_RESULTS = 500
+SEARCH_MAX_TERMS = 10
+
+
+def terms(query):
+    """Words of the query, operators of full text engines are dropped"""
+    return re.findall(r"\w+", query.lower())[:SEARCH_MAX_TERMS]
+
+
+def basic_matches(words, visible, limit):
+    documents = SearchDocument.objects.filter(process__in=visible)
+    for word in words:
+        documents = documents.filter(Q(candidate__icontains=word) | Q(notes__icontains=word))
+    return list(documents.order_by("-process_id").values_list("process_id", flat=True)[:limit])
+
+
+def sqlite_matches(words, visible, limit):
+    # every word is required, as a prefix
+    match = " ".join('"{word}"*'.format(word=word) for word in words)
+    visible_sql, visible_params = visible.values("id").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT rowid FROM interview_searchdocument_fts WHERE interview_searchdocument_fts MATCH %s "
+            "AND rowid IN ({visible}) ORDER BY bm25(interview_searchdocument_fts, 10.0, 1.0) LIMIT %s".format(
+                visible=visible_sql
+            ),
+            [match, *visible_params, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def mysql_matches(words, visible, limit):
+    # every word is required, as a prefix
+    match = " ".join("+{word}*".format(word=word) for word in words)
+    visible_sql, visible_params = visible.values("id").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT process_id FROM interview_searchdocument "
+            "WHERE MATCH(candidate, notes) AGAINST (%s IN BOOLEAN MODE) AND process_id IN ({visible}) "
+            "ORDER BY MATCH(candidate, notes) AGAINST (%s IN BOOLEAN MODE) DESC LIMIT %s".format(visible=visible_sql),
+            [match, *visible_params, match, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {
+    "basic": basic_matches,
+    "sqlite": sqlite_matches,
+    "mysql": mysql_matches,
+}
+
+
+def get_backend():
+    return BACKENDS.get(getattr(settings, "SEARCH_BACKEND", None) or connection.vendor, basic_matches)
+
+
+def search_processes(user, query):
+    """
+    Processes visible by user matching every word of query, best matches first
+
+    Returned queryset is annotated with `search_rank` (0 for the best match).
+    """
+    words = terms(query)
+    if not words:
+        return Process.objects.none()
+
+    # restricted to visible processes before keeping the best matches
+    process_ids = get_backend()(words, Process.objects.for_user(user), SEARCH_MAX_RESULTS)
+    if not process_ids:
+        return Process.objects.none()
+    rank = Case(*(When(id=pk, then=Value(i)) for i, pk in enumerate(process_ids)), output_field=IntegerField())
+    return Process.objects.for_table(user).filter(id__in=process_ids).annotate(search_rank=rank).order_by("search_rank")
@@ -0,0 +1,54 @@
+// Draw charts from compact json payloads built by views, using plotly basic bundle
+
+var CHART_CONFIG = {scrollZoom: false, staticPlot: false, showAxisRangeEntryBoxes: false, displayModeBar: false, responsive: true};
+
+function escapeHtml(text) {
+    return String(text).replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;").replace(/"/g, "&quot;");
+}
+
+// data: {title, colors: {type: color}, tasks: [{label, url, type, start, finish}]}
+function drawGantt(elementId, data) {
+    var traces = {};
+    var labels = [];
+    data.tasks.forEach(task => {
+        var label = "<a href=\"" + escapeHtml(task.url) + "\">" + escapeHtml(task.label) + "</a>";
+        labels.push(label);
+        if (!(task.type in traces)) {
+            traces[task.type] = {
+                type: "bar",
+                orientation: "h",
+                name: task.type,
+                marker: {color: data.colors[task.type]},
+                x: [], y: [], base: [], text: [],
+                hovertemplate: "%{text}<extra>%{fullData.name}</extra>",
+            };
+        }
+        var trace = traces[task.type];
+        trace.y.push(label);
+        trace.base.push(task.start);
+        trace.x.push(new Date(task.finish) - new Date(task.start));
+        trace.text.push(escapeHtml(task.label) + "<br>" + task.start + " - " + task.finish);
+    });
+
+    var layout = {
+        title: {text: data.title},
+        barmode: "overlay",
+        height: Math.max(600, 25 * data.tasks.length + 150),
+        xaxis: {type: "date", showgrid: true, fixedrange: true},
+        // first task on top
+        yaxis: {type: "category", categoryorder: "array", categoryarray: labels.reverse(), showgrid: true, fixedrange: true, automargin: true},
+    };
+    Plotly.newPlot(elementId, Object.values(traces), layout, CHART_CONFIG);
+}
+
+// data: {labels: {x, y, legend}, series: [{name, x, y}]}
+function drawStackedBars(elementId, data) {
+    var traces = data.series.map(serie => ({type: "bar", name: serie.name, x: serie.x, y: serie.y}));
+    var layout = {
+        barmode: "relative",
+        xaxis: {title: {text: data.labels.x}},
+        yaxis: {title: {text: data.labels.y}},
+        legend: {title: {text: data.labels.legend}},
+    };
+    Plotly.newPlot(elementId, traces, layout, CHART_CONFIG);
+}
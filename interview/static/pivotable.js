@@ -12,18 +12,74 @@
              unusedAttrsVertical: false,
              rendererName: rendererName,
              aggregatorName: aggregatorName,
-             onRefresh: hideTotal,
+             onRefresh: options['onRefresh'] || hideTotal,
              vals: vals,
              inclusions: options['inclusions'] || '',
              exclusions: options['exclusions'] || '',
              rowOrder: options['rowOrder'] || 'key_a_to_z',
              colOrder: options['colOrder'] || 'key_a_to_z',
              filter: filter,
+             aggregators: options['aggregators'],
+             hiddenAttributes: options['hiddenAttributes'],
          },
          true,
          lang
      );
  }
+ function aggregatedPivotQuery(rows, cols, aggregatorName, vals, filtered) {
+     // null while the averaged attribute is not chosen
+     if (aggregatorName === "Average" && !vals[0]) { return null; }
+     var params = new URLSearchParams({aggregator: aggregatorName});
+     rows.forEach(attr => params.append("rows", attr));
+     cols.forEach(attr => params.append("cols", attr));
+     filtered.forEach(attr => params.append("attrs", attr));
+     if (aggregatorName === "Average") { params.append("vals", vals[0]); }
+     return params.toString();
+ }
+ function drawAggregatedPivot(url, rows, cols, rendererName, aggregatorName, vals, options, lang) {
+     // Cells are aggregated server side, records only hold the representation attributes (and
+     // filtered ones) with the cell "count" and for averages the "sum" of vals. Other attributes
+     // are listed without values, cells are requested again once the representation changes.
+     var filtered = Object.keys($.extend({}, options['inclusions'], options['exclusions'])).sort();
+     var query = aggregatedPivotQuery(rows, cols, aggregatorName, vals, filtered);
+     if (query === null) { return; }
+     drawAggregatedPivot.query = query;
+
+     var tpl = $.pivotUtilities.aggregatorTemplates;
+     var intFormat = $.pivotUtilities.numberFormat({digitsAfterDecimal: 0});
+     var aggregators = {
+         "Count": () => tpl.sum(intFormat)(["count"]),
+         // averaged attribute is chosen in vals, its sum is computed server side
+         "Average": () => (data, rowKey, colKey) =>
+             $.extend(tpl.sumOverSum()(["sum", "count"])(data, rowKey, colKey), {numInputs: 1}),
+     };
+
+     function refresh(config) {
+         hideTotal(config);
+         var configFiltered = Object.keys($.extend({}, config.inclusions, config.exclusions)).sort();
+         var configQuery = aggregatedPivotQuery(config.rows, config.cols, config.aggregatorName, config.vals, configFiltered);
+         if (configQuery !== null && configQuery !== drawAggregatedPivot.query) {
+             var configOptions = $.extend({}, options, {inclusions: config.inclusions, exclusions: config.exclusions});
+             drawAggregatedPivot(url, config.rows, config.cols, config.rendererName, config.aggregatorName,
+                 config.vals, configOptions, lang);
+         }
+     }
+
+     fetch(url + "?" + query)
+         .then(response => response.json())
+         .then(result => {
+             // ignore responses of a representation which is not displayed anymore
+             if (drawAggregatedPivot.query !== query) { return; }
+             var unused = Object.fromEntries(result.attributes.map(attr => [attr, null]));
+             var records = result.records.map(record => $.extend({}, unused, record));
+             var aggregatedOptions = $.extend({}, options, {
+                 aggregators: aggregators,
+                 hiddenAttributes: ["count", "sum"],
+                 onRefresh: refresh,
+             });
+             drawPivot(records, rows, cols, rendererName, aggregatorName, vals, aggregatedOptions, lang);
+         });
+ }
  function hideTotal(config) {
      // Hide total when it does not have any sense
      if (config["rendererOptions"]["hideRowTotal"]) {
@@ -1,25 +1,44 @@
 import json
 
 import datetime
+import gzip
 import hashlib
+import io
+import itertools
 from django.db.utils import IntegrityError
 import os
+import pathlib
 import random
+import tempfile
+from unittest import mock
 
 import dateutil.relativedelta
 import pytz
 from django.contrib.sessions.middleware import SessionMiddleware
 from django.core import mail
+from django.core.cache import cache
 from django.core.management import call_command
 from django.core.files.base import ContentFile
-from django.test import TestCase, RequestFactory
+from django.http import HttpResponse
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from interview.models import Candidate, ResponsibleRule
+from interview.models import (
+    AnalyticsFact,
+    Candidate,
+    OutboxEmail,
+    ResponsibleRule,
+    SearchDocument,
+    fiscal_year,
+)
 from django.utils.text import slugify
 from factory.faker import faker
 
-from interview import views
+from interview import forms, notifications, refdata, reports, responsibles, unitofwork, views
+from interview.search import search_processes
 from interview.factory import (
     ProcessFactory,
     InterviewFactory,
@@ -34,7 +53,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 
 from interview.models import Process, Document, Interview, Offer, document_path
 from interview.views import process, minute_edit, minute, interview, close_process, reopen_process
-from pyoupyou.middleware import ExternalCheckMiddleware
+from pyoupyou.middleware import ExternalCheckMiddleware, NotificationCollectorMiddleware
 from ref.factory import SubsidiaryFactory, PyouPyouUserFactory
 from ref.models import PyouPyouUser, Subsidiary
 
@@ -108,6 +127,21 @@ class AccessRestrictionDateTestCase(TestCase):
         response = process(request, self.p.id)
         self.assertEqual(response.status_code, 404)
 
+    def test_for_user_without_duplicates(self):
+        # old user is responsible and interviewer of both interviews, process is listed once
+        self.p.responsible.add(self.pyouPyouUserOld)
+        InterviewFactory(process=self.p).interviewers.set([self.pyouPyouUserOld])
+
+        processes = Process.objects.for_table(self.pyouPyouUserOld).filter(id=self.p.id)
+        self.assertNotIn("DISTINCT", str(processes.query))
+        self.assertEqual([(p.id, p.current_rank) for p in processes], [(self.p.id, 2)])
+        self.assertEqual(Interview.objects.for_user(self.pyouPyouUserOld).filter(process=self.p).count(), 2)
+
+        self.assertFalse(Process.objects.for_user(self.pyouPyouUserNew).filter(id=self.p.id).exists())
+        self.assertFalse(Interview.objects.for_user(self.pyouPyouUserNew).filter(process=self.p).exists())
+        self.p.responsible.add(self.pyouPyouUserNew)
+        self.assertTrue(Process.objects.for_user(self.pyouPyouUserNew).filter(id=self.p.id).exists())
+
     def test_view_close_process(self):
         request = self.factory.post(reverse("process-close", kwargs={"process_id": self.p.id}))
 
@@ -265,6 +299,7 @@ class StatusAndNotificationTestCase(TestCase):
         p = ProcessFactory(subsidiary=subsidiary)
         self.assertEqual(p.state, Process.WAITING_INTERVIEWER_TO_BE_DESIGNED)
         self.assertEqual(list(p.responsible.all()), [subsidiaryResponsible])
+        call_command("send_notifications")
         self.assertEqual(len(mail.outbox), 1)
         self.assertCountEqual(mail.outbox[0].to, [subsidiaryResponsible.email])
         mail.outbox = []
@@ -280,6 +315,7 @@ class StatusAndNotificationTestCase(TestCase):
         self.assertEqual(Process.objects.get(id=p.id).state, Process.WAITING_INTERVIEW_PLANIFICATION)
         self.assertEqual(i1.state, Interview.WAITING_PLANIFICATION)
         self.assertEqual(list(p.responsible.all()), [interviewer])
+        call_command("send_notifications")
         self.assertEqual(len(mail.outbox), 1)
         self.assertCountEqual(mail.outbox[0].to, [subsidiaryResponsible.email, interviewer.email])
         mail.outbox = []
@@ -296,6 +332,7 @@ class StatusAndNotificationTestCase(TestCase):
         self.assertEqual(i1.state, Interview.PLANNED)
 
         self.assertEqual(list(p.responsible.all()), [interviewer])
+        call_command("send_notifications")
         self.assertEqual(len(mail.outbox), 1)
         self.assertCountEqual(mail.outbox[0].to, [subsidiaryResponsible.email, interviewer.email])
         mail.outbox = []
@@ -321,6 +358,7 @@ class StatusAndNotificationTestCase(TestCase):
         )
         self.assertEqual(i1.state, Interview.GO)
         self.assertEqual(list(p.responsible.all()), [subsidiaryResponsible])
+        call_command("send_notifications")
         self.assertEqual(len(mail.outbox), 1)
         self.assertCountEqual(mail.outbox[0].to, [subsidiaryResponsible.email])
         mail.outbox = []
@@ -334,6 +372,7 @@ class StatusAndNotificationTestCase(TestCase):
 
         self.assertEqual(Process.objects.get(id=p.id).state, Process.JOB_OFFER)
         self.assertEqual(list(p.responsible.all()), [subsidiaryResponsible])
+        call_command("send_notifications")
         self.assertEqual(len(mail.outbox), 1)
         self.assertCountEqual(mail.outbox[0].to, [subsidiaryResponsible.email])
         mail.outbox = []
@@ -347,6 +386,7 @@ class StatusAndNotificationTestCase(TestCase):
 
         self.assertEqual(Process.objects.get(id=p.id).state, Process.HIRED)
         self.assertEqual(list(p.responsible.all()), [])
+        call_command("send_notifications")
         self.assertCountEqual(mail.outbox[0].to, [subsidiaryResponsible.email])
         mail.outbox = []
 
@@ -360,6 +400,7 @@ class StatusAndNotificationTestCase(TestCase):
         p = ProcessFactory(subsidiary=subsidiary)
         self.assertEqual(p.state, Process.WAITING_INTERVIEWER_TO_BE_DESIGNED)
         self.assertEqual(list(p.responsible.all()), [subsidiaryResponsible])
+        call_command("send_notifications")
         self.assertEqual(len(mail.outbox), 1)
         self.assertCountEqual(mail.outbox[0].to, [subsidiaryResponsible.email])
         mail.outbox = []
@@ -377,6 +418,7 @@ class StatusAndNotificationTestCase(TestCase):
         self.assertEqual(Process.objects.get(id=p.id).state, Process.WAITING_INTERVIEW_PLANIFICATION)
         self.assertEqual(i1.state, Interview.WAITING_PLANIFICATION)
         self.assertEqual(list(p.responsible.all()), [interviewer])
+        call_command("send_notifications")
         self.assertEqual(len(mail.outbox), 1)
         # assert u1 is also in the recipients
         self.assertCountEqual(
@@ -398,6 +440,7 @@ class StatusAndNotificationTestCase(TestCase):
         p.state = Process.HIRED
         p.save()
 
+        call_command("send_notifications")
         # assert only one email was sent
         self.assertEqual(len(mail.outbox), 1)
         # assert it was sent to subscribed user
@@ -414,6 +457,7 @@ class StatusAndNotificationTestCase(TestCase):
         p.state = Process.NO_GO
         p.save()
 
+        call_command("send_notifications")
         # assert only one email was sent
         self.assertEqual(len(mail.outbox), 1)
         # assert it was sent to subscribed user
@@ -421,6 +465,221 @@ class StatusAndNotificationTestCase(TestCase):
         mail.outbox = []
 
 
+class OutboxEmailTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.subsidiary.responsible = PyouPyouUserFactory(company=self.subsidiary)
+        self.subsidiary.save()
+        mail.outbox = []
+
+    def test_notification_sent_by_worker(self):
+        ProcessFactory(subsidiary=self.subsidiary)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipients, self.subsidiary.responsible.email)
+        self.assertEqual(len(mail.outbox), 0)
+
+        call_command("send_notifications")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, email.subject)
+        self.assertEqual(mail.outbox[0].to, [self.subsidiary.responsible.email])
+        email.refresh_from_db()
+        self.assertIsNotNone(email.sent_at)
+
+        # already sent
+        call_command("send_notifications")
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_no_notification_for_rolled_back_change(self):
+        try:
+            with transaction.atomic():
+                ProcessFactory(subsidiary=self.subsidiary)
+                raise IntegrityError()
+        except IntegrityError:
+            pass
+        self.assertFalse(OutboxEmail.objects.exists())
+        call_command("send_notifications")
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_batch_sent_over_one_connection(self):
+        for i in range(5):
+            OutboxEmail.objects.queue("subject {}".format(i), "body", ["a@example.com", "b@example.com"])
+
+        with mock.patch("django.core.mail.get_connection", wraps=mail.get_connection) as get_connection:
+            call_command("send_notifications", batch_size=2)
+        self.assertEqual(get_connection.call_count, 3)
+        self.assertEqual([m.subject for m in mail.outbox], ["subject {}".format(i) for i in range(5)])
+        self.assertFalse(OutboxEmail.objects.pending().exists())
+
+    def test_failed_email_retried_with_backoff(self):
+        email = OutboxEmail.objects.queue("subject", "body", ["a@example.com"])
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("down")):
+            self.assertEqual(OutboxEmail.objects.deliver(), 0)
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, 1)
+            self.assertIn("down", email.last_error)
+            self.assertGreater(email.next_attempt, datetime.datetime.now(datetime.timezone.utc))
+            self.assertFalse(OutboxEmail.objects.pending().exists())
+
+            # delay doubles after each attempt
+            OutboxEmail.objects.update(next_attempt=email.created)
+            before = datetime.datetime.now(datetime.timezone.utc)
+            OutboxEmail.objects.deliver()
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, 2)
+            self.assertGreaterEqual(
+                email.next_attempt, before + datetime.timedelta(seconds=2 * settings.NOTIFICATION_RETRY_DELAY)
+            )
+
+        OutboxEmail.objects.update(next_attempt=email.created)
+        self.assertEqual(OutboxEmail.objects.deliver(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_batch_claimed_while_sent(self):
+        email = OutboxEmail.objects.queue("subject", "body", ["a@example.com"])
+
+        def send_messages(messages):
+            # sent outside of the claim transaction, other workers skip the batch
+            self.assertFalse(OutboxEmail.objects.pending().exists())
+            self.assertIsNone(OutboxEmail.objects.get(id=email.id).sent_at)
+            return len(messages)
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=send_messages):
+            self.assertEqual(OutboxEmail.objects.deliver(), 1)
+        self.assertIsNotNone(OutboxEmail.objects.get(id=email.id).sent_at)
+
+    def test_batch_postponed_when_connection_fails(self):
+        email = OutboxEmail.objects.queue("subject", "body", ["a@example.com"])
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.open", side_effect=OSError("refused")):
+            self.assertEqual(OutboxEmail.objects.deliver(), 0)
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 0)
+        self.assertIn("refused", email.last_error)
+        self.assertFalse(OutboxEmail.objects.pending().exists())
+
+    def test_email_given_up_after_max_attempts(self):
+        OutboxEmail.objects.queue("subject", "body", ["a@example.com"])
+        OutboxEmail.objects.update(attempts=settings.NOTIFICATION_MAX_ATTEMPTS)
+        call_command("send_notifications")
+        self.assertEqual(len(mail.outbox), 0)
+
+
+class NotificationDigestTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.responsible = PyouPyouUserFactory(company=self.subsidiary)
+        self.hourly = PyouPyouUserFactory(
+            company=self.subsidiary, notification_frequency=PyouPyouUser.NotificationFrequency.HOURLY
+        )
+        self.daily = PyouPyouUserFactory(
+            company=self.subsidiary, notification_frequency=PyouPyouUser.NotificationFrequency.DAILY
+        )
+        self.subsidiary.responsible = self.responsible
+        self.subsidiary.save()
+        self.subsidiary.informed.add(self.hourly, self.daily)
+        mail.outbox = []
+
+    def test_digest_grouped_per_recipient(self):
+        p1 = ProcessFactory(subsidiary=self.subsidiary)
+        p2 = ProcessFactory(subsidiary=self.subsidiary)
+
+        # digest users are not notified immediately
+        call_command("send_notifications")
+        self.assertEqual([m.to for m in mail.outbox], [[self.responsible.email], [self.responsible.email]])
+        mail.outbox = []
+
+        call_command("send_digests", "hourly")
+        call_command("send_notifications")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.hourly.email])
+        self.assertIn(p1.get_absolute_url(), mail.outbox[0].body)
+        self.assertIn(p2.get_absolute_url(), mail.outbox[0].body)
+        mail.outbox = []
+
+        # events are only sent once
+        call_command("send_digests", "hourly")
+        call_command("send_notifications")
+        self.assertEqual(len(mail.outbox), 0)
+
+        call_command("send_digests", "daily")
+        call_command("send_notifications")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.daily.email])
+
+    def test_body_not_rendered_for_digest_only_recipients(self):
+        self.subsidiary.responsible = None
+        self.subsidiary.save()
+        with mock.patch("interview.models.render_to_string") as render_to_string:
+            ProcessFactory(subsidiary=self.subsidiary)
+        render_to_string.assert_not_called()
+        self.assertEqual(OutboxEmail.objects.filter(digest="").count(), 0)
+        self.assertEqual(OutboxEmail.objects.exclude(digest="").count(), 2)
+
+    def test_notification_settings_view(self):
+        self.client.force_login(self.responsible)
+        response = self.client.get(reverse("notification-settings"))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(reverse("notification-settings"), {"notification_frequency": "daily"})
+        self.assertEqual(response.status_code, 302)
+        self.responsible.refresh_from_db()
+        self.assertEqual(self.responsible.notification_frequency, PyouPyouUser.NotificationFrequency.DAILY)
+
+
+class NotificationCollectorTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.subsidiary.responsible = PyouPyouUserFactory(company=self.subsidiary)
+        self.subsidiary.save()
+        self.process = ProcessFactory(subsidiary=self.subsidiary)
+        self.interviewers = [PyouPyouUserFactory(company=self.subsidiary) for i in range(2)]
+        OutboxEmail.objects.all().delete()
+
+    def create_interview(self):
+        interview = Interview(process=self.process)
+        interview.save()
+        for interviewer in self.interviewers:
+            interview.interviewers.add(interviewer)
+        return interview
+
+    def test_notifications_sent_at_once_outside_collecting(self):
+        self.create_interview()
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+
+    def test_duplicate_notifications_coalesced(self):
+        with notifications.collecting():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_interview()
+            self.assertFalse(OutboxEmail.objects.exists())
+
+        email = OutboxEmail.objects.get()
+        # sent with the final state of the interview
+        self.assertCountEqual(
+            email.recipients.splitlines(),
+            [self.subsidiary.responsible.email] + [interviewer.email for interviewer in self.interviewers],
+        )
+
+    def test_rolled_back_notifications_dropped(self):
+        with notifications.collecting():
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        self.create_interview()
+                        raise IntegrityError()
+                except IntegrityError:
+                    pass
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_middleware_collects_request_notifications(self):
+        def get_response(request):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_interview()
+            return HttpResponse()
+
+        NotificationCollectorMiddleware(get_response)(RequestFactory().get("/"))
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+
+@override_settings(MEDIA_ROOT=pathlib.Path(tempfile.mkdtemp()))
 class AnonymizesCandidateTestCase(TestCase):
     def setUp(self):
         self.factory = RequestFactory()
@@ -458,6 +717,7 @@ class AnonymizesCandidateTestCase(TestCase):
         # process state set to a "closed" value
         self.p.state = Process.HIRED
         self.p.save()
+        call_command("send_notifications")
         mail.outbox = []
 
     def test_anonymize_candidate(self):
@@ -559,6 +819,7 @@ class AnonymizesCandidateTestCase(TestCase):
         for interview in anonymized_process.interview_set.all():
             self.assertEqual(interview.minute, "")
 
+        call_command("send_notifications")
         self.assertEqual(len(mail.outbox), 0)
         mail.outbox = []
 
@@ -575,9 +836,49 @@ class AnonymizesCandidateTestCase(TestCase):
         for interview in anonymized_process.interview_set.all():
             self.assertEqual(interview.minute, "")
 
+        call_command("send_notifications")
         self.assertEqual(len(mail.outbox), 0)
         mail.outbox = []
 
+    def test_anonymize_cmd_dry_run(self):
+        out = io.StringIO()
+        call_command("anonymize", "--dry-run", stdout=out)
+        self.assertEqual(out.getvalue(), "1 candidates, 1 processes, 5 interviews and 1 documents to anonymize\n")
+        self.assertFalse(Candidate.objects.get(id=self.p.candidate.id).anonymized)
+
+    def test_anonymize_cmd_removes_documents_directories(self):
+        Document.objects.create(
+            document_type="CL", content=ContentFile("cl content", "cl.txt"), candidate=self.p.candidate
+        )
+        paths = self.p.candidate.documents_dirs()
+        self.assertTrue(any(os.path.exists(path) for path in paths))
+
+        call_command("anonymize", "--workers", "2")
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+        self.assertEqual(0, Document.objects.filter(candidate=self.p.candidate).count())
+        self.assertEqual(SearchDocument.objects.get(process=self.p).candidate, "")
+
+    def test_anonymize_cmd_resumes_after_checkpoint(self):
+        p2 = ProcessFactory(subsidiary=self.subsidiary, state=Process.NO_GO)
+        p2.end_date = self.p.end_date
+        p2.save()
+        current_date = str(datetime.datetime.now().date())
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = pathlib.Path(directory) / "anonymize.checkpoint"
+            checkpoint.write_text(json.dumps({"date": current_date, "last_candidate_id": self.p.candidate.id}))
+            with self.settings(ANONYMIZE_CHECKPOINT_FILE=checkpoint):
+                out = io.StringIO()
+                call_command("anonymize", current_date, "--batch-size", "1", stdout=out)
+                self.assertTrue(out.getvalue().startswith("1 candidates anonymized in "))
+                self.assertFalse(Candidate.objects.get(id=self.p.candidate.id).anonymized)
+                self.assertTrue(Candidate.objects.get(id=p2.candidate.id).anonymized)
+                self.assertFalse(checkpoint.exists())
+
+                checkpoint.write_text(json.dumps({"date": current_date, "last_candidate_id": p2.candidate.id}))
+                call_command("anonymize", current_date, "--restart")
+                self.assertTrue(Candidate.objects.get(id=self.p.candidate.id).anonymized)
+
     def test_anonymize_cmd_with_default_no_process_found(self):
         # default process end date anonymization filter starts twelve months ago from the current date
         self.p.end_date = datetime.datetime.now() - datetime.timedelta(10)
@@ -817,7 +1118,24 @@ class HomeViewTestCase(TestCase):
         self.assertNotEqual(p1.id, subsidiary_processes[0].id)
         self.assertNotEqual(p2.id, subsidiary_processes[0].id)
 
+    def test_dashboard_single_processes_query(self):
+        subsidiary = SubsidiaryFactory()
+        pyoupyou_user = PyouPyouUserFactory(company=subsidiary)
+        for i in range(30):
+            process = ProcessFactory(subsidiary=subsidiary)
+            process.responsible.add(pyoupyou_user)
+        self.client.force_login(user=pyoupyou_user)
 
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"ssort": "subsidiary", "apage": 2})
+        self.assertEqual(response.status_code, 200)
+        processes_queries = [q for q in queries if 'FROM "interview_process"' in q["sql"]]
+        self.assertEqual(len(processes_queries), 1)
+        self.assertEqual(len(response.context["actions_needed_processes_table"].page.object_list), 5)
+        self.assertEqual(len(response.context["subsidiary_processes_table"].rows), 30)
+
+
+@override_settings(MEDIA_ROOT=pathlib.Path(tempfile.mkdtemp()))
 class ProcessCreationViewTestCase(TestCase):
     def setUp(self):
         self.url = reverse(views.new_candidate)
@@ -1296,6 +1614,7 @@ class NoMailToDeactivatedUsersTestCase(TestCase):
         interview.interviewers.add(self.inactive_interviewer)
         interview.planned_date = datetime.datetime.now() + datetime.timedelta(days=1)
         interview.save()
+        call_command("send_notifications")
         all_recipients = []
         for message in mail.outbox:
             all_recipients.extend(message.to)
@@ -1329,12 +1648,396 @@ class MailToResponsibleBasedOnRulesTestCase(TestCase):
         process = ProcessFactory(
             subsidiary=self.subsidiary, sources=self.source_linkedin, contract_type=self.contract_cdi
         )
+        call_command("send_notifications")
         all_recipients = []
         for message in mail.outbox:
             all_recipients.extend(message.to)
         self.assertIn("active_resp@example.com", all_recipients)
 
 
+class CompiledResponsibleRulesTestCase(TestCase):
+    def setUp(self):
+        self.subsidiaries = [SubsidiaryFactory() for i in range(2)]
+        self.users = [PyouPyouUserFactory(company=self.subsidiaries[0]) for i in range(4)]
+        self.subsidiaries[0].responsible = self.users[0]
+        self.subsidiaries[0].save()
+        self.sources = [SourcesFactory() for i in range(2)]
+        self.contract_types = [ContractTypeFactory() for i in range(2)]
+        self.offers = [OfferFactory(subsidiary=self.subsidiaries[0]) for i in range(2)]
+
+    @staticmethod
+    def rule_query_responsible(process):
+        # rules lookup of compiled rules, as a query
+        rule = (
+            ResponsibleRule.objects.filter(
+                Q(sources=process.sources) | Q(sources__isnull=True),
+                Q(subsidiary=process.subsidiary) | Q(subsidiary__isnull=True),
+                Q(contract_type=process.contract_type) | Q(contract_type__isnull=True),
+                Q(offer=process.offer) | Q(offer__isnull=True),
+            )
+            .order_by("-priority", "pk")
+            .first()
+        )
+        if rule is not None and rule.responsible.is_active:
+            return rule.responsible
+        return process.subsidiary.responsible
+
+    def test_same_responsible_as_rules_query(self):
+        rng = random.Random(42)
+        for priority in rng.sample(range(100), 30):
+            ResponsibleRule.objects.create(
+                responsible=rng.choice(self.users),
+                subsidiary=rng.choice(self.subsidiaries),
+                sources=rng.choice(self.sources + [None]),
+                contract_type=rng.choice(self.contract_types + [None]),
+                offer=rng.choice(self.offers + [None]),
+                priority=priority,
+            )
+        self.users[1].is_active = False
+        self.users[1].save()
+
+        for cached in (False, True):
+            with self.settings(REFERENCE_DATA_CACHE=cached):
+                for subsidiary, sources, contract_type, offer in itertools.product(
+                    self.subsidiaries, self.sources + [None], self.contract_types + [None], self.offers + [None]
+                ):
+                    process = Process(subsidiary=subsidiary, sources=sources, contract_type=contract_type, offer=offer)
+                    self.assertEqual(process.compute_responsable(), self.rule_query_responsible(process))
+
+    @override_settings(REFERENCE_DATA_CACHE=True)
+    def test_recipients_cached_until_changed(self):
+        process = ProcessFactory(subsidiary=self.subsidiaries[0], offer=self.offers[0])
+        self.assertEqual(process.recipient_list(), {self.users[0].email})
+        with self.assertNumQueries(1):
+            process.recipient_list()
+
+        self.subsidiaries[0].informed.add(self.users[1])
+        self.offers[0].subscribers.add(self.users[2])
+        process.subscribers.add(self.users[3])
+        self.assertEqual(process.recipient_list(), {user.email for user in self.users})
+
+        self.users[3].is_active = False
+        self.users[3].save()
+        self.assertEqual(process.recipient_list(), {user.email for user in self.users[:3]})
+
+        ResponsibleRule.objects.create(responsible=self.users[3], subsidiary=self.subsidiaries[0])
+        self.users[3].is_active = True
+        self.users[3].save(update_fields=["is_active"])
+        self.assertEqual(process.compute_responsable(), self.users[3])
+
+    def test_rules_queried_when_not_cached(self):
+        process = ProcessFactory(subsidiary=self.subsidiaries[0])
+        self.assertEqual(process.compute_responsable(), self.users[0])
+        # created by another worker, whose local memory cache version is not seen here
+        ResponsibleRule.objects.bulk_create(
+            [ResponsibleRule(responsible=self.users[1], subsidiary=self.subsidiaries[0])]
+        )
+        self.assertEqual(process.compute_responsable(), self.users[1])
+        with self.settings(REFERENCE_DATA_CACHE=True):
+            process.compute_responsable()
+            ResponsibleRule.objects.update(responsible=self.users[2])
+            self.assertEqual(process.compute_responsable(), self.users[1])
+
+    def test_recipients_of_active_users_only(self):
+        process = ProcessFactory(subsidiary=self.subsidiaries[0], offer=self.offers[0])
+        ResponsibleRule.objects.create(responsible=self.users[1], subsidiary=self.subsidiaries[0])
+        self.offers[0].subscribers.add(self.users[2])
+        process.subscribers.add(self.users[3])
+        self.assertEqual(process.recipient_list(), {user.email for user in self.users})
+
+        # deactivated without signal, as another worker would do without a shared cache
+        PyouPyouUser.objects.filter(id__in=[self.users[0].id, self.users[1].id, self.users[3].id]).update(
+            is_active=False
+        )
+        self.assertEqual(process.recipient_list(), {self.users[2].email})
+
+
+class RecomputeResponsiblesTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.default_responsible = PyouPyouUserFactory(company=self.subsidiary)
+        self.rule_responsible = PyouPyouUserFactory(company=self.subsidiary)
+        self.interviewer = PyouPyouUserFactory(company=self.subsidiary)
+        self.subsidiary.responsible = self.default_responsible
+        self.subsidiary.save()
+
+        self.waiting = ProcessFactory(subsidiary=self.subsidiary)
+        self.planned = ProcessFactory(subsidiary=self.subsidiary)
+        interview = Interview(process=self.planned)
+        interview.save()
+        interview.interviewers.add(self.interviewer)
+        self.go = ProcessFactory(subsidiary=self.subsidiary)
+        interview = Interview(process=self.go)
+        interview.save()
+        interview.interviewers.add(self.interviewer)
+        interview.state = Interview.GO
+        interview.save()
+        self.hired = ProcessFactory(subsidiary=self.subsidiary)
+        self.hired.state = Process.HIRED
+        self.hired.save()
+
+    def assertResponsibles(self, process, users):
+        self.assertCountEqual(process.responsible.all(), users)
+
+    def test_same_responsibles_as_process_save(self):
+        self.assertEqual(responsibles.recompute(Process.objects.all(), dry_run=True), {})
+
+    def test_recomputed_on_rule_and_user_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ResponsibleRule.objects.create(responsible=self.rule_responsible, subsidiary=self.subsidiary)
+        self.assertResponsibles(self.waiting, [self.rule_responsible])
+        self.assertResponsibles(self.go, [self.rule_responsible])
+        self.assertResponsibles(self.planned, [self.interviewer])
+        self.assertResponsibles(self.hired, [])
+
+        # deactivated as done by delete_account
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rule_responsible.is_active = False
+            self.rule_responsible.save()
+        self.assertResponsibles(self.waiting, [self.default_responsible])
+        self.assertResponsibles(self.go, [self.default_responsible])
+
+    def test_recompute_command(self):
+        self.planned.responsible.set([self.default_responsible])
+
+        out = io.StringIO()
+        call_command("recompute_responsibles", dry_run=True, stdout=out)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            [
+                "Process {id}: +{added} -{removed}".format(
+                    id=self.planned.id, added=self.interviewer.trigramme, removed=self.default_responsible.trigramme
+                )
+            ],
+        )
+        self.assertResponsibles(self.planned, [self.default_responsible])
+
+        call_command("recompute_responsibles", subsidiary=[self.subsidiary.code], stdout=io.StringIO())
+        self.assertResponsibles(self.planned, [self.interviewer])
+        self.assertEqual(responsibles.recompute(dry_run=True), {})
+
+
+class ProcessSaveResponsiblesTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.subsidiary.responsible = PyouPyouUserFactory(company=self.subsidiary)
+        self.subsidiary.save()
+        self.interviewers = [PyouPyouUserFactory(company=self.subsidiary) for i in range(2)]
+        self.process = ProcessFactory(subsidiary=self.subsidiary)
+        self.interview = Interview(process=self.process)
+        self.interview.save()
+        self.interview.interviewers.add(*self.interviewers)
+
+    @staticmethod
+    def responsible_queries(queries):
+        return [query["sql"] for query in queries if '"interview_process_responsible"' in query["sql"]]
+
+    def test_unchanged_responsibles_not_written(self):
+        process = Process.objects.get(id=self.process.id)
+        # update, interviews and responsibles
+        with self.assertNumQueries(3) as queries:
+            process.save(trigger_notification=False)
+        # state is known from the loaded instance
+        self.assertTrue(queries.captured_queries[0]["sql"].startswith("UPDATE"))
+        self.assertEqual(len(self.responsible_queries(queries)), 1)
+        self.assertCountEqual(process.responsible.all(), self.interviewers)
+
+    def test_only_responsibles_differences_written(self):
+        Interview.objects.filter(id=self.interview.id).update(state=Interview.GO)
+        process = Process.objects.get(id=self.process.id)
+        process.state = Process.WAITING_NEXT_INTERVIEWER_TO_BE_DESIGNED_OR_END_OF_PROCESS
+        with CaptureQueriesContext(connection) as queries:
+            process.save(trigger_notification=False)
+        self.assertEqual(
+            [sql.split(" ")[0] for sql in self.responsible_queries(queries)], ["SELECT", "DELETE", "INSERT"]
+        )
+        self.assertEqual(list(process.responsible.all()), [self.subsidiary.responsible])
+        self.assertEqual(Process.objects.get(id=process.id).last_state_change, process.last_state_change)
+        self.assertGreater(process.last_state_change, self.process.last_state_change)
+
+    def test_state_change_detected_without_loaded_instance(self):
+        process = Process(
+            id=self.process.id,
+            candidate=self.process.candidate,
+            subsidiary=self.subsidiary,
+            start_date=self.process.start_date,
+            state=Process.JOB_OFFER,
+            last_state_change=self.process.last_state_change,
+        )
+        process.save(trigger_notification=False)
+        self.assertGreater(process.last_state_change, self.process.last_state_change)
+
+
+class UnitOfWorkTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.subsidiary.responsible = PyouPyouUserFactory(company=self.subsidiary)
+        self.subsidiary.save()
+        self.interviewer = PyouPyouUserFactory(company=self.subsidiary)
+        self.process = ProcessFactory(subsidiary=self.subsidiary)
+        self.interviews = [Interview(process=self.process) for i in range(2)]
+        for interview in self.interviews:
+            interview.save()
+            interview.interviewers.add(self.interviewer)
+
+    def test_process_updated_once_from_last_interview(self):
+        with mock.patch.object(Process, "save", autospec=True, side_effect=Process.save) as save:
+            with unitofwork.deferred_process_updates():
+                for interview in Interview.objects.filter(process=self.process):
+                    interview.state = Interview.PLANNED
+                    interview.planned_date = datetime.datetime(2024, 3, 1, 10, tzinfo=pytz.utc)
+                    interview.save(trigger_notification=False)
+                self.assertEqual(save.call_count, 0)
+        self.assertEqual(save.call_count, 1)
+        process = Process.objects.get(id=self.process.id)
+        self.assertEqual(process.state, Process.INTERVIEW_IS_PLANNED)
+        self.assertEqual(list(process.responsible.all()), [self.interviewer])
+
+    def test_not_last_interview_does_not_update_process(self):
+        first = Interview.objects.get(id=self.interviews[0].id)
+        first.state = Interview.GO
+        with unitofwork.deferred_process_updates():
+            first.save(trigger_notification=False)
+        self.assertEqual(Process.objects.get(id=self.process.id).state, Process.WAITING_INTERVIEW_PLANIFICATION)
+
+    def test_block_rolled_back_when_it_raises(self):
+        last = Interview.objects.get(id=self.interviews[1].id)
+        last.state = Interview.GO
+        with self.assertRaises(ValueError):
+            with unitofwork.deferred_process_updates():
+                last.save(trigger_notification=False)
+                raise ValueError
+        self.assertIsNone(unitofwork.current())
+        self.assertEqual(Process.objects.get(id=self.process.id).state, Process.WAITING_INTERVIEW_PLANIFICATION)
+        self.assertNotEqual(Interview.objects.get(id=last.id).state, Interview.GO)
+
+    def test_nested_blocks_applied_by_outermost(self):
+        last = Interview.objects.get(id=self.interviews[1].id)
+        last.state = Interview.GO
+        with unitofwork.deferred_process_updates():
+            with unitofwork.deferred_process_updates():
+                last.save(trigger_notification=False)
+            self.assertEqual(Process.objects.get(id=self.process.id).state, Process.WAITING_INTERVIEW_PLANIFICATION)
+        self.assertEqual(
+            Process.objects.get(id=self.process.id).state,
+            Process.WAITING_NEXT_INTERVIEWER_TO_BE_DESIGNED_OR_END_OF_PROCESS,
+        )
+
+
+class BatchUpdateStateTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.interviewer = PyouPyouUserFactory(company=self.subsidiary)
+        self.past = datetime.datetime(2024, 3, 1, 10, tzinfo=pytz.utc)
+        self.future = datetime.datetime(2024, 3, 20, 10, tzinfo=pytz.utc)
+
+        # last interview overdue
+        self.overdue = self.process_with_interviews(self.past)
+        # overdue interview followed by another one
+        self.not_last = self.process_with_interviews(self.past, None)
+        self.not_overdue = self.process_with_interviews(self.future)
+        self.closed = self.process_with_interviews(self.past)
+        Process.objects.filter(id=self.closed.id).update(state=Process.NO_GO)
+
+    def process_with_interviews(self, *planned_dates):
+        process = ProcessFactory(subsidiary=self.subsidiary)
+        for planned_date in planned_dates:
+            interview = Interview(process=process, planned_date=planned_date)
+            interview.save(trigger_notification=False)
+            interview.interviewers.add(self.interviewer)
+        return process
+
+    def run_command(self, *args):
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("batch_update_state", "Fri, 08 Mar 2024 10:00:00 +0000", *args, stdout=out)
+        return out.getvalue()
+
+    def states(self):
+        return {
+            name: (
+                Process.objects.get(id=process.id).state,
+                list(Interview.objects.filter(process=process).values_list("state", flat=True)),
+                list(Process.objects.get(id=process.id).responsible.all()),
+            )
+            for name, process in (
+                ("overdue", self.overdue),
+                ("not_last", self.not_last),
+                ("not_overdue", self.not_overdue),
+                ("closed", self.closed),
+            )
+        }
+
+    def test_overdue_interviews_moved(self):
+        with mock.patch.object(Interview, "save") as save:
+            out = self.run_command()
+        save.assert_not_called()
+        self.assertTrue(
+            out.startswith("2 interviews moved to wait information, 1 processes moved to wait interview minute in ")
+        )
+        self.assertEqual(
+            self.states(),
+            {
+                "overdue": (Process.WAITING_ITW_MINUTE, [Interview.WAIT_INFORMATION], [self.interviewer]),
+                "not_last": (
+                    Process.WAITING_INTERVIEW_PLANIFICATION,
+                    [Interview.WAIT_INFORMATION, Interview.WAITING_PLANIFICATION],
+                    [self.interviewer],
+                ),
+                "not_overdue": (Process.INTERVIEW_IS_PLANNED, [Interview.PLANNED], [self.interviewer]),
+                "closed": (Process.NO_GO, [Interview.PLANNED], [self.interviewer]),
+            },
+        )
+        overdue = Process.objects.get(id=self.overdue.id)
+        self.assertGreater(overdue.last_state_change, self.overdue.last_state_change)
+        self.assertEqual(AnalyticsFact.objects.get(process=overdue, interview_rank=1).state, Process.WAITING_ITW_MINUTE)
+
+    def test_same_result_as_interviews_saves(self):
+        self.run_command("--batch-size", "1")
+        bulk = self.states()
+        Interview.objects.filter(state=Interview.WAIT_INFORMATION).update(state=Interview.PLANNED)
+        Process.objects.filter(id=self.overdue.id).update(state=Process.INTERVIEW_IS_PLANNED)
+
+        out = self.run_command("--per-interview")
+        self.assertTrue(
+            out.startswith("2 interviews moved to wait information, 1 processes moved to wait interview minute in ")
+        )
+        self.assertEqual(self.states(), bulk)
+
+
+class CandidateDuplicatesTestCase(TestCase):
+    def test_sorted_name_hash_ignores_words_order(self):
+        candidate = CandidateFactory(name="Jean  Pierre de la Fontaine Dupont Martin Éric")
+        other = Candidate(name="éric martin dupont fontaine la de pierre jean")
+        self.assertEqual(candidate.anonymized_hashed_sorted_name, other.anonymized_sorted_name())
+        with self.assertNumQueries(1):
+            self.assertEqual(list(other.find_duplicates()), [candidate])
+        self.assertEqual(other.compare(candidate), ["name"])
+
+    def test_candidates_anonymized_without_sorted_name_hash(self):
+        candidate = CandidateFactory(name="Nâme Middle LastName")
+        candidate.anonymize()
+        candidate.save()
+        Candidate.objects.filter(id=candidate.id).update(anonymized_hashed_sorted_name="")
+        candidate.refresh_from_db()
+
+        other = Candidate(name="lastname name middle")
+        self.assertEqual(list(other.find_duplicates()), [candidate])
+        self.assertEqual(other.compare(candidate), ["name"])
+
+    def test_rebuild_name_hashes(self):
+        candidate = CandidateFactory(name="Name LastName")
+        Candidate.objects.filter(id=candidate.id).update(anonymized_hashed_sorted_name="")
+        call_command("rebuild_name_hashes")
+        self.assertEqual(
+            Candidate.objects.get(id=candidate.id).anonymized_hashed_sorted_name, candidate.anonymized_sorted_name()
+        )
+
+    def test_anonymization_fields_not_in_candidate_forms(self):
+        for form in (forms.ProcessCandidateForm(), forms.ProcessReuseCandidateForm()):
+            self.assertEqual(list(form.fields), ["name", "email", "phone", "linkedin_url", "candidate_documents"])
+
+
 class ProcessDetailsViewTestCase(TestCase):
     def setUp(self):
         # create a process
@@ -1680,6 +2383,31 @@ class MiddlewareTestCase(TestCase):
         self.assertEqual(response.status_code, 403)
         self.assertInHTML(needle="Please contact your system administrator", haystack=str(response.content))
 
+    def test_global_subsidiary_filter(self):
+        response = self.client.get(self.url, {"subsidiary": self.subsidiary.id})
+        self.assertEqual(self.client.session["subsidiary"], self.subsidiary.id)
+        self.assertEqual(response.wsgi_request.subsidiaries_filter.form.cleaned_data["subsidiary"], self.subsidiary)
+
+        # applied to next pages
+        response = self.client.get(reverse("process-list"))
+        self.assertEqual(response.wsgi_request.GET["subsidiary"], self.subsidiary.id)
+
+        # ajax views are left untouched
+        response = self.client.get(reverse("kanban-column", args=[0]), {"subsidiary": ""})
+        self.assertEqual(self.client.session["subsidiary"], self.subsidiary.id)
+        self.assertEqual(response.wsgi_request.GET["subsidiary"], "")
+
+    def test_global_subsidiary_filter_skips_feeds(self):
+        self.client.logout()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("calendar_full", kwargs={"token": self.pyoupyou_user.token}),
+            )
+        self.assertEqual(response.status_code, 200)
+        # no session is created and subsidiary filter is not built
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertFalse([q for q in queries if "ref_subsidiary" in q["sql"]])
+
     def test_access_external_and_source(self):
         # limited_to_source != None; privilege = 2 || 3;
         self.pyoupyou_user.limited_to_source = SourcesFactory(category=SourcesCategoryFactory())
@@ -1949,3 +2677,719 @@ class SeeLinkedProcessCreatedBeforeUserJoinedTestCase(TestCase):
         open_processes = response.context["open_processes_table"].data
         self.assertEqual(len(open_processes), 1)
         self.assertTrue(older_process in open_processes)
+
+
+class InterviewersLoadTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.pyoupyou_user = PyouPyouUserFactory(company=self.subsidiary)
+        self.client.force_login(self.pyoupyou_user)
+
+    def create_interview(self, interviewer, planned_date, prequalification=False):
+        itw = InterviewFactory(
+            process=ProcessFactory(subsidiary=self.subsidiary),
+            planned_date=planned_date,
+            prequalification=prequalification,
+        )
+        itw.interviewers.add(interviewer)
+        return itw
+
+    def test_load_values(self):
+        now = datetime.datetime.now(pytz.timezone("Europe/Paris"))
+        self.create_interview(self.pyoupyou_user, now - datetime.timedelta(days=3))
+        self.create_interview(self.pyoupyou_user, now - datetime.timedelta(days=20))
+        self.create_interview(self.pyoupyou_user, now + datetime.timedelta(days=2), prequalification=True)
+        self.create_interview(self.pyoupyou_user, None, prequalification=True)
+
+        [load] = reports.interviewers_load(PyouPyouUser.objects.filter(id=self.pyoupyou_user.id))
+        self.assertEqual(load["interviewer"], self.pyoupyou_user)
+        self.assertEqual(load["itw_last_month"], 2)
+        self.assertEqual(load["itw_last_week"], 1)
+        self.assertEqual(load["itw_planned"], 0.5)
+        self.assertEqual(load["itw_not_planned_yet"], 0.5)
+        self.assertEqual(load["load"], pow(0.5 + 0.5 + 2, 2) + 2 * 1 + 2 - 4)
+
+    def test_query_count_does_not_depend_on_users(self):
+        now = datetime.datetime.now(pytz.timezone("Europe/Paris"))
+        self.create_interview(self.pyoupyou_user, now - datetime.timedelta(days=3))
+        # first request initialises the session
+        self.client.get(reverse("interviewers-load"))
+
+        with CaptureQueriesContext(connection) as few_users:
+            response = self.client.get(reverse("interviewers-load"))
+        self.assertEqual(response.status_code, 200)
+
+        for i in range(10):
+            interviewer = PyouPyouUserFactory(company=self.subsidiary, trigramme=f"ld{i}")
+            self.create_interview(interviewer, now - datetime.timedelta(days=3))
+
+        with CaptureQueriesContext(connection) as many_users:
+            response = self.client.get(reverse("interviewers-load"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["load_table"].rows), 11)
+        self.assertEqual(len(few_users), len(many_users))
+
+
+class SourcesAndOffersReportTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.other_subsidiary = SubsidiaryFactory()
+        self.pyoupyou_user = PyouPyouUserFactory(company=self.subsidiary)
+        self.client.force_login(self.pyoupyou_user)
+
+        self.category = SourcesCategoryFactory()
+        self.source = SourcesFactory(category=self.category)
+        self.offer = OfferFactory(subsidiary=self.subsidiary)
+
+        ProcessFactory(subsidiary=self.subsidiary, sources=self.source, offer=self.offer)
+        hired = ProcessFactory(subsidiary=self.subsidiary, sources=self.source)
+        hired.state = Process.HIRED
+        hired.save()
+        ProcessFactory(subsidiary=self.other_subsidiary, sources=self.source, offer=self.offer)
+
+    def test_sources_report(self):
+        response = self.client.get(reverse("active-sources"))
+        self.assertEqual(response.status_code, 200)
+        [row] = [r for r in response.context["sources"].data if r["id"] == self.source.id]
+        self.assertEqual(row["total_processes_count"], 3)
+        self.assertEqual(row["active_processes_count"], 2)
+        self.assertEqual(row["total_hired"], 1)
+        self.assertEqual(row["offers"], 1)
+        self.assertEqual(row["source_category"], self.category.name)
+
+        # global subsidiary filter
+        response = self.client.get(reverse("active-sources"), {"subsidiary": self.other_subsidiary.id})
+        [row] = response.context["sources"].data
+        self.assertEqual(row["total_processes_count"], 1)
+        self.assertEqual(row["total_hired"], 0)
+
+    def test_offers_report(self):
+        response = self.client.get(reverse("offers"))
+        self.assertEqual(response.status_code, 200)
+        [row] = response.context["offers"].data
+        self.assertEqual(row["total_processes_count"], 2)
+        self.assertEqual(row["active_processes_count"], 2)
+        self.assertEqual(row["sources"], 1)
+
+        response = self.client.get(reverse("offers"), {"subsidiary": self.subsidiary.id})
+        [row] = response.context["offers"].data
+        self.assertEqual(row["total_processes_count"], 1)
+
+    def test_query_count_does_not_depend_on_rows(self):
+        # first requests initialise the session
+        self.client.get(reverse("active-sources"), {"archived": ""})
+        self.client.get(reverse("offers"))
+
+        with CaptureQueriesContext(connection) as few_sources:
+            self.client.get(reverse("active-sources"), {"archived": ""})
+        with CaptureQueriesContext(connection) as few_offers:
+            self.client.get(reverse("offers"))
+
+        for _ in range(5):
+            ProcessFactory(
+                subsidiary=self.subsidiary,
+                sources=SourcesFactory(category=self.category, archived=True),
+                offer=OfferFactory(subsidiary=self.subsidiary),
+            )
+        # reload reference data cache invalidated by new sources and offers
+        self.client.get(reverse("offers"))
+
+        with CaptureQueriesContext(connection) as many_sources:
+            response = self.client.get(reverse("active-sources"), {"archived": ""})
+        self.assertEqual(len(response.context["sources"].data), 6)
+        with CaptureQueriesContext(connection) as many_offers:
+            response = self.client.get(reverse("offers"))
+        self.assertEqual(len(response.context["offers"].data), 6)
+
+        self.assertEqual(len(few_sources), len(many_sources))
+        self.assertEqual(len(few_offers), len(many_offers))
+
+
+class KanbanTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.pyoupyou_user = PyouPyouUserFactory(company=self.subsidiary)
+        self.client.force_login(self.pyoupyou_user)
+
+    def create_process(self, *prequalifications):
+        p = ProcessFactory(subsidiary=self.subsidiary)
+        for prequalification in prequalifications:
+            itw = InterviewFactory(process=p, prequalification=prequalification)
+            itw.interviewers.add(self.pyoupyou_user)
+        return p
+
+    def column_ids(self, column):
+        return [p.id for p in column["processes"]]
+
+    def test_kanban_columns(self):
+        new_process = self.create_process()
+        prequalified = self.create_process(True)
+        second_itw = self.create_process(True, False)
+        first_itw = self.create_process(False)
+
+        response = self.client.get(reverse("kanban"))
+        self.assertEqual(response.status_code, 200)
+        columns = response.context["columns"]
+        self.assertEqual(len(columns), 5)
+        self.assertEqual(self.column_ids(columns[0]), [new_process.id, prequalified.id])
+        self.assertEqual(self.column_ids(columns[1]), [second_itw.id, first_itw.id])
+        self.assertEqual(columns[1]["count"], 2)
+
+        new_card, prequalified_card = columns[0]["processes"]
+        self.assertEqual(new_card.resp, [])
+        self.assertEqual(new_card.date, views._("Not planned"))
+        self.assertEqual(prequalified_card.color, "#e7cbf5")
+        self.assertEqual(prequalified_card.resp, [str(self.pyoupyou_user)])
+        self.assertEqual(prequalified_card.date, prequalified.interview_set.last().planned_date.date())
+
+    def test_kanban_query_count_does_not_depend_on_processes(self):
+        self.create_process(False)
+        # first request initialises the session
+        self.client.get(reverse("kanban"))
+        with CaptureQueriesContext(connection) as few_processes:
+            self.client.get(reverse("kanban"))
+
+        for _ in range(5):
+            self.create_process(True, False, False)
+        with CaptureQueriesContext(connection) as many_processes:
+            response = self.client.get(reverse("kanban"))
+        self.assertEqual(response.context["columns"][2]["count"], 5)
+        self.assertEqual(len(few_processes), len(many_processes))
+
+    def test_kanban_column_pages(self):
+        processes = [self.create_process(False) for _ in range(5)]
+
+        with mock.patch.object(views, "KANBAN_PAGE_SIZE", 2):
+            response = self.client.get(reverse("kanban"))
+            column = response.context["columns"][1]
+            self.assertEqual(column["count"], 5)
+            self.assertEqual(self.column_ids(column), [p.id for p in processes[:2]])
+            self.assertEqual(column["next_page"], 2)
+
+            response = self.client.get(reverse("kanban-column", kwargs={"rank": 1}), {"page": 3})
+            self.assertEqual(response.status_code, 200)
+            column = response.context["column"]
+            self.assertEqual(self.column_ids(column), [processes[4].id])
+            self.assertIsNone(column["next_page"])
+
+
+class AnalyticsFactTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.pyoupyou_user = PyouPyouUserFactory(company=self.subsidiary)
+        self.client.force_login(self.pyoupyou_user)
+
+        self.process = ProcessFactory(subsidiary=self.subsidiary)
+        self.process.start_date = datetime.date(2024, 1, 10)
+        self.process.save()
+        self.first_itw = InterviewFactory(
+            process=self.process, planned_date=datetime.datetime(2024, 1, 15, 10, tzinfo=datetime.timezone.utc)
+        )
+        self.first_itw.interviewers.add(self.pyoupyou_user)
+        self.second_itw = InterviewFactory(process=self.process, planned_date=None)
+
+    def test_fiscal_year(self):
+        with self.settings(FINANCIAL_STARTING_MONTH_DAY="07-01"):
+            self.assertEqual(fiscal_year(datetime.date(2024, 6, 30)), "2023/2024")
+            self.assertEqual(fiscal_year(datetime.date(2024, 7, 1)), "2024/2025")
+
+    def test_facts_follow_changes(self):
+        process_fact = AnalyticsFact.objects.get(process=self.process, interview__isnull=True)
+        self.assertEqual(process_fact.itw_count, 2)
+        self.assertEqual(process_fact.start_fiscal_year, "2023/2024")
+        self.assertEqual(process_fact.state, Process.WAITING_INTERVIEW_PLANIFICATION)
+
+        first_fact = AnalyticsFact.objects.get(interview=self.first_itw)
+        self.assertEqual(first_fact.days_since_last_itw, 5)
+        self.assertEqual(first_fact.interviewers, self.pyoupyou_user.trigramme)
+        second_fact = AnalyticsFact.objects.get(interview=self.second_itw)
+        self.assertIsNone(second_fact.days_since_last_itw)
+
+        self.second_itw.planned_date = datetime.datetime(2024, 1, 25, 10, tzinfo=datetime.timezone.utc)
+        self.second_itw.save()
+        self.assertEqual(AnalyticsFact.objects.get(interview=self.second_itw).days_since_last_itw, 10)
+        self.assertEqual(
+            AnalyticsFact.objects.get(process=self.process, interview__isnull=True).state,
+            Process.INTERVIEW_IS_PLANNED,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.second_itw.delete()
+        self.assertEqual(AnalyticsFact.objects.filter(process=self.process).count(), 2)
+        self.assertEqual(AnalyticsFact.objects.get(process=self.process, interview__isnull=True).itw_count, 1)
+
+    def test_facts_refreshed_only_when_copied_fields_change(self):
+        process = Process.objects.get(id=self.process.id)
+        with CaptureQueriesContext(connection) as queries:
+            process.save(trigger_notification=False)
+        self.assertFalse([q for q in queries if '"interview_analyticsfact"' in q["sql"]])
+
+        process.contract_duration = 12
+        process.save(trigger_notification=False)
+        self.assertEqual(AnalyticsFact.objects.get(process=process, interview__isnull=True).contract_duration, 12)
+
+    def test_rebuild_command(self):
+        AnalyticsFact.objects.all().delete()
+        call_command("rebuild_analytics", batch_size=1)
+        self.assertEqual(AnalyticsFact.objects.filter(process=self.process).count(), 3)
+
+    def test_pivotable_views(self):
+        response = self.client.get(reverse("processes-pivotable"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse("pivotable-data", args=["processes"]))
+
+        response = self.client.get(reverse("interviews-pivotable"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse("pivotable-data", args=["interviews"]))
+
+    def test_pivotable_data(self):
+        other = ProcessFactory(subsidiary=self.subsidiary)
+        other.start_date = datetime.date(2024, 1, 20)
+        other.save()
+        url = reverse("pivotable-data", args=["processes"])
+
+        response = self.client.get(url, {"rows": str(views._("subsidiary")), "attrs": str(views._("process id"))})
+        self.assertEqual(response.status_code, 200)
+        records = response.json()["records"]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(sum(record["count"] for record in records), 2)
+        # every attribute can be dragged in the representation
+        self.assertIn(str(views._("contract type")), response.json()["attributes"])
+
+        response = self.client.get(
+            url,
+            {
+                "rows": str(views._("subsidiary")),
+                "attrs": str(views._("process id")),
+                "aggregator": "Average",
+                "vals": str(views._("process length")),
+            },
+        )
+        records = {record[str(views._("process id"))]: record for record in response.json()["records"]}
+        record = records[str(other.id)]
+        self.assertEqual(record["count"], 1)
+        self.assertEqual(record["sum"], (datetime.date.today() - other.start_date).days)
+
+        response = self.client.get(
+            reverse("pivotable-data", args=["interviews"]),
+            {"rows": str(views._("interview rank")), "cols": str(views._("days since last itw"))},
+        )
+        records = {record[str(views._("interview rank"))]: record for record in response.json()["records"]}
+        self.assertEqual(records[1][str(views._("days since last itw"))], 5)
+        self.assertEqual(records[2][str(views._("days since last itw"))], views._("Unknown"))
+
+        response = self.client.get(url, {"aggregator": "Median"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTsvTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.pyoupyou_user = PyouPyouUserFactory(company=self.subsidiary)
+        self.client.force_login(self.pyoupyou_user)
+
+        self.process = ProcessFactory(subsidiary=self.subsidiary)
+        self.process.start_date = datetime.date(2024, 1, 10)
+        self.process.save()
+        self.first_itw = InterviewFactory(
+            process=self.process, planned_date=datetime.datetime(2024, 1, 15, 10, tzinfo=datetime.timezone.utc)
+        )
+        self.first_itw.interviewers.add(self.pyoupyou_user)
+        self.second_itw = InterviewFactory(
+            process=self.process, planned_date=datetime.datetime(2024, 1, 25, 10, tzinfo=datetime.timezone.utc)
+        )
+        self.second_itw.interviewers.add(self.pyoupyou_user)
+
+    def get_rows(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return [line.split("\t") for line in b"".join(response.streaming_content).decode().split("\n")]
+
+    def test_export_processes(self):
+        header, row = self.get_rows(reverse("export-processes-tsv"))
+        row = dict(zip(header, row))
+        self.assertEqual(row["process.id"], str(self.process.id))
+        self.assertEqual(row["process itw count"], "2")
+        self.assertEqual(row["process length"], "15")
+
+    def test_export_interviews(self):
+        header, first, second = self.get_rows(reverse("export-interviews-tsv"))
+        first, second = dict(zip(header, first)), dict(zip(header, second))
+        self.assertEqual(first["days since last"], "5")
+        self.assertEqual(second["days since last"], "10")
+        self.assertEqual(second["interviewers"], self.pyoupyou_user.trigramme)
+        self.assertEqual(second["process itw count"], "2")
+
+    def test_export_query_count(self):
+        url = reverse("export-interviews-tsv")
+        self.get_rows(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.get_rows(url)
+        count = len(queries)
+
+        for i in range(5):
+            InterviewFactory(process=ProcessFactory(subsidiary=self.subsidiary)).interviewers.add(self.pyoupyou_user)
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.get_rows(url)
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(len(queries), count)
+
+
+class DumpDataTestCase(TestCase):
+    def setUp(self):
+        subsidiary = SubsidiaryFactory()
+        self.pyoupyou_user = PyouPyouUserFactory(company=subsidiary, is_superuser=True)
+        self.client.force_login(self.pyoupyou_user)
+        self.process = ProcessFactory(subsidiary=subsidiary)
+        InterviewFactory(process=self.process)
+
+    def get_dump(self, **params):
+        response = self.client.get("/admin/dump_data", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_dump_data_matches_dumpdata(self):
+        out = io.StringIO()
+        call_command(
+            "dumpdata",
+            use_natural_foreign_keys=True,
+            use_base_manager=True,
+            exclude=["auth.Permission", "contenttypes"],
+            stdout=out,
+        )
+        # the dump request itself updates the session
+        without_sessions = lambda dump: [o for o in json.loads(dump) if o["model"] != "sessions.session"]
+        self.assertEqual(without_sessions(self.get_dump()), without_sessions(out.getvalue()))
+
+    def test_dump_data_models_filter_and_gzip(self):
+        dump = json.loads(gzip.decompress(self.get_dump(models="interview.Process,ref", gzip="1")))
+        self.assertEqual({o["model"].split(".")[0] for o in dump}, {"interview", "ref"})
+        self.assertNotIn("interview.interview", {o["model"] for o in dump})
+        self.assertIn(self.process.id, [o["pk"] for o in dump if o["model"] == "interview.process"])
+
+        with mock.patch.object(views, "DUMP_DATA_CHUNK_SIZE", 1):
+            self.assertEqual(len(json.loads(self.get_dump(models="interview.Interview"))), 1)
+
+    def test_dump_data_unknown_model(self):
+        response = self.client.get("/admin/dump_data", {"models": "interview.Unknown"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ActivitySummaryTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.other_subsidiary = SubsidiaryFactory()
+        self.pyoupyou_user = PyouPyouUserFactory(company=self.subsidiary)
+        self.client.force_login(self.pyoupyou_user)
+
+        self.hired = ProcessFactory(subsidiary=self.subsidiary)
+        self.declined = ProcessFactory(subsidiary=self.other_subsidiary)
+        self.open = ProcessFactory(subsidiary=self.subsidiary)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        go = InterviewFactory(process=self.hired, planned_date=now)
+        InterviewFactory(process=self.declined, planned_date=now)
+        InterviewFactory(process=self.open, planned_date=None)
+        # interviews and processes states are computed on save
+        Interview.objects.filter(id=go.id).update(state=Interview.GO)
+        Process.objects.filter(id=self.hired.id).update(state=Process.HIRED)
+        Process.objects.filter(id=self.declined.id).update(state=Process.CANDIDATE_DECLINED)
+
+    def test_activity_summary(self):
+        with self.assertNumQueries(3):
+            summary = reports.activity_summary(Process.objects.all(), Interview.objects.all())
+
+        self.assertEqual(summary["processes"]["new"], 3)
+        self.assertEqual(summary["processes"]["closed"], 2)
+        self.assertEqual(
+            {s["name"]: (s["new"], s["closed"]) for s in summary["processes"]["subsidiaries"]},
+            {self.subsidiary.name: (2, 1), self.other_subsidiary.name: (1, 1)},
+        )
+        self.assertEqual(summary["interviews"]["total"], 3)
+        self.assertEqual(summary["interviews"]["go"], 1)
+        self.assertEqual(
+            {s["name"]: (s["total"], s["go"]) for s in summary["interviews"]["subsidiaries"]},
+            {self.subsidiary.name: (2, 1), self.other_subsidiary.name: (1, 0)},
+        )
+        self.assertEqual(sum(m["count"] for m in summary["monthly_interviews"]), 2)
+        self.assertEqual([p["id"] for p in summary["hires"]], [self.hired.id])
+        self.assertEqual([p["id"] for p in summary["declined"]], [self.declined.id])
+        self.assertEqual(summary["offers"], [])
+
+    def test_activity_summary_views(self):
+        response = self.client.get(reverse("activity_summary"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.hired.candidate.name)
+        self.assertContains(response, 'id="activity-chart-data"')
+        series = response.context["chart"]["series"]
+        self.assertEqual(sum(sum(serie["y"]) for serie in series), 2)
+
+        response = self.client.get(reverse("activity-summary-api"))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["processes"]["new"], 3)
+        self.assertEqual(data["hires"][0]["candidate"], self.hired.candidate.name)
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command("benchmark", "activity_summary", years=1, processes_per_month=2, repeat=1, stdout=out)
+        self.assertIn("activity_summary: 6 queries", out.getvalue())
+
+        out = io.StringIO()
+        call_command("benchmark", "process_visibility", years=1, processes_per_month=2, repeat=1, stdout=out)
+        self.assertIn("process_visibility: 301 queries", out.getvalue())
+
+        out = io.StringIO()
+        call_command("benchmark", "responsibles_recompute", years=1, processes_per_month=2, repeat=1, stdout=out)
+        self.assertIn("responsibles_recompute: 10 queries", out.getvalue())
+
+        out = io.StringIO()
+        call_command("benchmark", "duplicate_candidates_16_words", years=1, processes_per_month=2, repeat=1, stdout=out)
+        self.assertIn("duplicate_candidates_16_words: 1 queries", out.getvalue())
+        # dataset is rolled back
+        self.assertEqual(Process.objects.count(), 3)
+
+
+class GanttTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.pyoupyou_user = PyouPyouUserFactory(company=self.subsidiary)
+        self.client.force_login(self.pyoupyou_user)
+
+    def test_gantt(self):
+        response = self.client.get(reverse("gantt"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context["gantt"])
+
+        contract_type = ContractTypeFactory(has_duration=True, color="#FF0000")
+        process = ProcessFactory(subsidiary=self.subsidiary, contract_type=contract_type, contract_duration=6)
+        Process.objects.filter(id=process.id).update(
+            state=Process.HIRED, contract_start_date=datetime.date.today() + datetime.timedelta(days=10)
+        )
+
+        response = self.client.get(reverse("gantt"))
+        self.assertContains(response, 'id="gantt-data"')
+        gantt = response.context["gantt"]
+        self.assertEqual(gantt["colors"][contract_type.name], "#FF0000")
+        (task,) = gantt["tasks"]
+        self.assertEqual(task["url"], process.get_absolute_url())
+        self.assertEqual(task["type"], contract_type.name)
+        self.assertEqual(task["finish"] - task["start"], datetime.timedelta(180))
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.pyoupyou_user = PyouPyouUserFactory(company=self.subsidiary)
+        self.client.force_login(self.pyoupyou_user)
+
+        self.named = ProcessFactory(
+            subsidiary=self.subsidiary,
+            candidate=CandidateFactory(name="Zébulon Quartz", email="zq@mail.com"),
+            closed_comment="",
+        )
+        self.noted = ProcessFactory(
+            subsidiary=self.subsidiary,
+            candidate=CandidateFactory(name="Other Person", email="op@mail.com"),
+            closed_comment="",
+            other_informations="knows quartz crystals",
+        )
+        self.itw = InterviewFactory(process=self.noted, minute="Talked about kubernetes operators")
+
+    def search(self, query):
+        return [process.id for process in search_processes(self.pyoupyou_user, query)]
+
+    def test_ranking_and_prefix(self):
+        # candidate name weights more than notes
+        self.assertEqual(self.search("quartz"), [self.named.id, self.noted.id])
+        self.assertEqual(self.search("zebul"), [self.named.id])
+        self.assertEqual(self.search("kubernetes quartz"), [self.noted.id])
+        self.assertEqual(self.search('"*:-'), [])
+
+    def test_follow_changes(self):
+        self.itw.minute = "Talked about erlang"
+        self.itw.save()
+        self.assertEqual(self.search("kubernetes"), [])
+        self.assertEqual(self.search("erlang"), [self.noted.id])
+
+        candidate = self.named.candidate
+        candidate.name = "Ambroise Quartz"
+        candidate.save()
+        self.assertEqual(self.search("ambroise"), [self.named.id])
+
+        self.named.closed_comment = "hired elsewhere"
+        self.named.save()
+        self.assertEqual(self.search("elsewhere"), [self.named.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.itw.delete()
+        self.assertEqual(self.search("erlang"), [])
+
+    def test_refreshed_only_when_indexed_text_changes(self):
+        interview = Interview.objects.get(id=self.itw.id)
+        interview.state = Interview.GO
+        with CaptureQueriesContext(connection) as queries:
+            interview.save(trigger_notification=False)
+            Candidate.objects.get(id=self.named.candidate_id).save()
+        self.assertFalse([q for q in queries if '"interview_searchdocument"' in q["sql"]])
+
+    def test_permission_scope(self):
+        Process.objects.filter(id=self.noted.id).update(start_date=datetime.date(2000, 1, 1))
+        self.assertEqual(self.search("quartz"), [self.named.id])
+        self.itw.interviewers.add(self.pyoupyou_user)
+        self.assertEqual(self.search("quartz"), [self.named.id, self.noted.id])
+
+    def test_best_matches_kept_among_visible_processes(self):
+        Process.objects.filter(id=self.named.id).update(start_date=datetime.date(2000, 1, 1))
+        with mock.patch("interview.search.SEARCH_MAX_RESULTS", 1):
+            self.assertEqual(self.search("quartz"), [self.noted.id])
+            with self.settings(SEARCH_BACKEND="basic"):
+                self.assertEqual(self.search("quartz"), [self.noted.id])
+
+    def test_basic_backend(self):
+        with self.settings(SEARCH_BACKEND="basic"):
+            self.assertEqual(set(self.search("quartz")), {self.named.id, self.noted.id})
+            self.assertEqual(self.search("KUBER quartz"), [self.noted.id])
+
+    def test_search_view(self):
+        response = self.client.get(reverse("search"), {"q": "quartz"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row.record for row in response.context["table"].page.object_list], [self.named, self.noted])
+
+    def test_rebuild_command(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(self.search("quartz"), [])
+        call_command("rebuild_search_index", batch_size=1)
+        self.assertEqual(self.search("quartz"), [self.named.id, self.noted.id])
+
+
+@override_settings(REFERENCE_DATA_CACHE=True)
+class ReferenceDataCacheTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.pyoupyou_user = PyouPyouUserFactory(company=self.subsidiary)
+        self.client.force_login(self.pyoupyou_user)
+
+    def test_reloaded_on_change(self):
+        self.assertIn(self.subsidiary, refdata.subsidiaries())
+        with self.assertNumQueries(0):
+            refdata.subsidiaries()
+
+        other = SubsidiaryFactory()
+        self.assertIn(other, refdata.subsidiaries())
+        other.delete()
+        self.assertNotIn(other, refdata.subsidiaries())
+
+        contract_type = ContractTypeFactory(color="#00FF00")
+        self.assertEqual(refdata.contract_type_colors()[contract_type.name], "#00FF00")
+
+    def test_reloaded_on_other_worker_change(self):
+        refdata.subsidiaries()
+        # another worker changed reference data
+        cache.set(refdata.VERSION_KEY, "other")
+        with self.assertNumQueries(1):
+            refdata.subsidiaries()
+        with self.settings(REFERENCE_DATA_MAX_AGE=-1), self.assertNumQueries(1):
+            refdata.subsidiaries()
+
+    def test_not_cached_in_local_memory_cache(self):
+        refdata.subsidiaries()
+        with self.settings(REFERENCE_DATA_CACHE=None), self.assertNumQueries(1):
+            self.assertIn(self.subsidiary, refdata.subsidiaries())
+
+    def test_pages_use_cache(self):
+        for url in (reverse(views.dashboard), reverse("candidate-new")):
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertContains(response, self.subsidiary.name)
+            # subsidiaries list is not queried
+            self.assertFalse(
+                [q for q in queries if q["sql"].endswith('FROM "ref_subsidiary" ORDER BY "ref_subsidiary"."name" ASC')]
+            )
+
+
+@override_settings(PROCESS_LIST_CACHE=True)
+class ProcessListCacheTestCase(TestCase):
+    def setUp(self):
+        self.subsidiary = SubsidiaryFactory()
+        self.other_subsidiary = SubsidiaryFactory()
+        self.pyoupyou_user = PyouPyouUserFactory(company=self.subsidiary)
+        self.client.force_login(self.pyoupyou_user)
+        self.process = ProcessFactory(subsidiary=self.subsidiary)
+        self.other_process = ProcessFactory(subsidiary=self.other_subsidiary)
+
+    def get_processes(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("process-list"), params)
+        self.assertEqual(response.status_code, 200)
+        processes_queries = [q for q in queries if 'FROM "interview_process"' in q["sql"]]
+        return [row.record for row in response.context["open_processes_table"].page.object_list], processes_queries
+
+    def test_served_from_cache_until_change(self):
+        records, queries = self.get_processes()
+        self.assertEqual(set(records), {self.process, self.other_process})
+        self.assertTrue(queries)
+        records, queries = self.get_processes()
+        self.assertEqual(set(records), {self.process, self.other_process})
+        self.assertEqual(queries, [])
+
+        candidate = self.process.candidate
+        candidate.name = "Renamed candidate"
+        candidate.save()
+        records, queries = self.get_processes()
+        self.assertTrue(queries)
+        self.assertIn("Renamed candidate", [record.candidate.name for record in records])
+
+        # sort and page are part of the key
+        records, queries = self.get_processes(osort="-candidate")
+        self.assertTrue(queries)
+        self.assertEqual(records, sorted(records, key=lambda p: p.candidate.name, reverse=True))
+
+    def test_invalidated_by_responsible_change(self):
+        self.process.responsible.add(self.pyoupyou_user)
+        self.get_processes(subsidiary=self.subsidiary.id)
+        self.pyoupyou_user.trigramme = "ZZZ"
+        self.pyoupyou_user.save()
+        records, queries = self.get_processes(subsidiary=self.subsidiary.id)
+        self.assertTrue(queries)
+        self.assertEqual([user.trigramme for user in records[0].responsible.all()], ["ZZZ"])
+
+    def test_not_cached_in_local_memory_cache(self):
+        self.get_processes()
+        with self.settings(PROCESS_LIST_CACHE=None):
+            records, queries = self.get_processes()
+        self.assertEqual(set(records), {self.process, self.other_process})
+        self.assertTrue(queries)
+
+    def test_invalidated_by_subsidiary(self):
+        self.get_processes(subsidiary=self.subsidiary.id)
+        self.other_process.closed_comment = "changed"
+        self.other_process.save()
+        records, queries = self.get_processes()
+        self.assertEqual(records, [self.process])
+        self.assertEqual(queries, [])
+
+        self.process.state = Process.NO_GO
+        self.process.end_date = datetime.date.today()
+        self.process.save()
+        records, queries = self.get_processes()
+        self.assertEqual(records, [])
+        self.assertTrue(queries)
+
+        self.get_processes(subsidiary="")
+        InterviewFactory(process=self.other_process)
+        records, queries = self.get_processes()
+        self.assertTrue(queries)
+
+    def test_per_user(self):
+        self.get_processes()
+        # joined after processes started, they are not visible
+        other_user = PyouPyouUserFactory(
+            company=self.subsidiary,
+            date_joined=datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=2),
+        )
+        self.client.force_login(other_user)
+        records, queries = self.get_processes()
+        self.assertEqual(records, [])
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Deferred processes updates of interviews saves
+
+Saving an interview makes its process follow the interview state when it is the last one, saving the process
+which recomputes its responsibles and notifies its new state. Within `deferred_process_updates()` interviews
+saves only record their process: at the end of the block each affected process is updated and saved once,
+from its last interview. Outside of it processes are updated on each interview save.
+
+The block and processes updates run in one transaction: interviews saved in a block that raises are rolled
+back along with their processes updates.
+"""
+import contextlib
+import threading
+
+from django.db import transaction
+
+_local = threading.local()
+
+
+class UnitOfWork:
+    def __init__(self):
+        # process id: [process, interviews created, ids of saved interviews]
+        self.processes = {}
+
+    def interview_saved(self, interview, is_new):
+        process = self.processes.setdefault(interview.process_id, [interview.process, False, set()])
+        # latest instance, it is the one the interview save would have saved
+        process[0] = interview.process
+        process[1] = process[1] or is_new
+        process[2].add(interview.id)
+
+    def flush(self):
+        # models import this module
+        from interview import listcache
+        from interview.models import Interview
+
+        processes, self.processes = self.processes, {}
+        if not processes:
+            return
+        last_interviews = {}
+        for interview in Interview.objects.filter(process_id__in=processes).order_by("process", "rank"):
+            last_interviews[interview.process_id] = interview
+
+        for process_id, (process, created, interview_ids) in processes.items():
+            last_interview = last_interviews.get(process_id)
+            if last_interview is not None and (created or (last_interview.id in interview_ids and process.is_open())):
+                process.set_state_from_interview(last_interview)
+                process.save()
+            else:
+                listcache.bump(process.subsidiary_id)
+
+
+def current():
+    """UnitOfWork of the running `deferred_process_updates()` block, None outside"""
+    return getattr(_local, "work", None)
+
+
+@contextlib.contextmanager
+def deferred_process_updates():
+    """
+    Update processes of interviews saved in this block once at its end, in the block transaction, blocks may be
+    nested
+    """
+    if current() is not None:
+        yield current()
+        return
+
+    with transaction.atomic():
+        work = _local.work = UnitOfWork()
+        try:
+            yield work
+        finally:
+            _local.work = None
+        work.flush()
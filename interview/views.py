@@ -1,18 +1,12 @@
 # -*- coding: utf-8 -*-
 import datetime
 import calendar
-import io
 from collections import defaultdict
 import json
 
 from django.contrib.admin.models import LogEntry, ADDITION, CHANGE
 from django.contrib.admin.options import get_content_type_for_model
 from django.contrib.auth.views import redirect_to_login
-from plotly.offline import plot
-import plotly.figure_factory as ff
-import plotly.express as px
-
-import pandas as pd
 
 import django_tables2 as tables
 import requests
@@ -20,16 +14,29 @@ from django.conf import settings
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.files import File
 from django.core.files.temp import NamedTemporaryFile
-from django.core.management import call_command
-from django.db import transaction
-from django.db.models import Q, Prefetch, F, Max
-from django.db.models.functions import Trunc
-from django.http import HttpResponseRedirect, JsonResponse, HttpResponseNotFound, HttpResponse, HttpResponseBadRequest
+from django.apps import apps as django_apps
+from django.core import serializers
+from django.core.management import CommandError
+from django.core.management.utils import parse_apps_and_model_labels
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.paginator import Paginator
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.db.models import Q, Prefetch, F, Max, Min, OuterRef, Subquery, Window
+from django.db.models.functions import Lag, RowNumber
+from django.http import (
+    HttpResponseRedirect,
+    JsonResponse,
+    HttpResponseNotFound,
+    HttpResponse,
+    HttpResponseBadRequest,
+    StreamingHttpResponse,
+)
 from django.shortcuts import render
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.timezone import make_aware, now
 from django.utils.html import format_html
+from django.utils.text import compress_sequence
 from django.utils.translation import gettext as _t
 from django.utils.translation import gettext_lazy as _
 from django.views.decorators.http import require_http_methods
@@ -39,9 +46,9 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.utils.dateparse import parse_date
 from django.db.models import Count
 from rest_framework.decorators import api_view
-from dateutil import parser
 
-from interview.decorators import privilege_level_check
+from interview import listcache, pivot, refdata, reports
+from interview.decorators import global_subsidiary_filter_exempt, privilege_level_check
 from interview.filters import (
     ProcessFilter,
     ProcessSummaryFilter,
@@ -60,10 +67,13 @@ from interview.forms import (
     CloseForm,
     OfferForm,
     InterviewersForm,
+    NotificationSettingsForm,
     ProcessReuseCandidateForm,
 )
+from interview.search import search_processes
 from interview.serializers import CognitoWebHookSerializer
 from interview.models import (
+    fiscal_year,
     Process,
     Document,
     Interview,
@@ -72,7 +82,6 @@ from interview.models import (
     Candidate,
     Offer,
     DocumentInterview,
-    ContractType,
 )
 from ref.filters import SubsidiaryFilter
 from ref.models import PyouPyouUser, Subsidiary
@@ -85,12 +94,15 @@ register = template.Library()
 
 def get_global_filter(request):
     """
-    returns a SubsidiaryFilter based on current session's filter
+    returns a SubsidiaryFilter based on current session's filter, built once per request
     to access subsidiary: f.form.cleaned_data["subsidiary"]
     """
-    f = SubsidiaryFilter(request.session, queryset=Subsidiary.objects.all())
-    f.is_valid()
-    return f
+    if not hasattr(request, "_global_filter"):
+        f = SubsidiaryFilter(request.session, queryset=Subsidiary.objects.all())
+        refdata.set_choices(f.form.fields["subsidiary"], refdata.subsidiaries())
+        f.is_valid()
+        request._global_filter = f
+    return request._global_filter
 
 
 def log_action(added, object, user, view):
@@ -158,6 +170,14 @@ class ProcessTable(tables.Table):
         row_attrs = {"class": lambda record: "danger" if record.needs_attention else None}
 
 
+class DashboardProcessTable(ProcessTable):
+    # rows are sorted in memory, subsidiary instances are not comparable
+    subsidiary = tables.Column(order_by=("subsidiary__name",))
+
+    class Meta(ProcessTable.Meta):
+        pass
+
+
 class ProcessEndTable(ProcessTable):
     class Meta(ProcessTable.Meta):
         sequence = (
@@ -278,12 +298,12 @@ def process(request, process_id, slug_info=None):
         "interviews": interviews,
         "close_form": close_form,
         "goal": goal,
-        "subsidiaries": Subsidiary.objects.all(),
         "others_process": ProcessLightTable(others_process),
     }
     return render(request, "interview/process_detail.html", context)
 
 
+@global_subsidiary_filter_exempt
 @login_required
 @require_http_methods(["POST"])
 def switch_offer_subscription_ajax(request, offer_id):
@@ -303,6 +323,7 @@ def switch_offer_subscription_ajax(request, offer_id):
     return render(request, "interview/unsubscribe_button_offer.html", {})
 
 
+@global_subsidiary_filter_exempt
 @login_required
 @require_http_methods(["POST"])
 def switch_process_subscription_ajax(request, process_id):
@@ -322,6 +343,19 @@ def switch_process_subscription_ajax(request, process_id):
     return render(request, "interview/unsubscribe_button_process.html", {})
 
 
+@login_required
+@require_http_methods(["GET", "POST"])
+def notification_settings(request):
+    if request.method == "POST":
+        form = NotificationSettingsForm(data=request.POST, instance=request.user)
+        if form.is_valid():
+            form.save()
+            return HttpResponseRedirect(reverse("notification-settings"))
+    else:
+        form = NotificationSettingsForm(instance=request.user)
+    return render(request, "interview/notification_settings.html", {"form": form})
+
+
 @login_required
 @require_http_methods(["POST"])
 @privilege_level_check(
@@ -376,8 +410,9 @@ def closed_processes(request):
     closed_processes = subsidiary_filter.filter_queryset(
         Process.objects.for_table(request.user).filter(end_date__isnull=False)
     )
+    key = listcache.list_key("closed", request.user, subsidiary_filter.form.cleaned_data.get("subsidiary"))
 
-    closed_processes_table = ProcessEndTable(closed_processes, prefix="c")
+    closed_processes_table = ProcessEndTable(listcache.CachedTableData(closed_processes, key), prefix="c")
 
     config = RequestConfig(request)
     config.configure(closed_processes_table)
@@ -385,7 +420,6 @@ def closed_processes(request):
     context = {
         "title": _("Closed processes"),
         "table": closed_processes_table,
-        "subsidiaries": Subsidiary.objects.all(),
     }
 
     return render(request, "interview/single_table.html", context)
@@ -409,7 +443,8 @@ def processes_for_source(request, source_id):
         return HttpResponseNotFound()
 
     processes = subsidiary_filter.filter_queryset(Process.objects.for_table(request.user).filter(sources_id=source_id))
-    processes_table = ProcessEndTable(processes, prefix="c")
+    key = listcache.list_key(("source", source_id), request.user, subsidiary_filter.form.cleaned_data.get("subsidiary"))
+    processes_table = ProcessEndTable(listcache.CachedTableData(processes, key), prefix="c")
 
     config = RequestConfig(request)
     config.configure(processes_table)
@@ -417,7 +452,6 @@ def processes_for_source(request, source_id):
     context = {
         "title": source.name + " (" + source.category.name + ")",
         "table": processes_table,
-        "subsidiaries": Subsidiary.objects.all(),
     }
 
     return render(request, "interview/single_table.html", context)
@@ -434,7 +468,8 @@ def processes_for_offer(request, offer_id):
         return HttpResponseNotFound()
 
     processes = subsidiary_filter.filter_queryset(Process.objects.for_table(request.user).filter(offer_id=offer_id))
-    processes_table = ProcessEndTable(processes, prefix="c")
+    key = listcache.list_key(("offer", offer_id), request.user, subsidiary_filter.form.cleaned_data.get("subsidiary"))
+    processes_table = ProcessEndTable(listcache.CachedTableData(processes, key), prefix="c")
 
     config = RequestConfig(request)
     config.configure(processes_table)
@@ -442,7 +477,6 @@ def processes_for_offer(request, offer_id):
     context = {
         "title": offer.name + " (" + offer.subsidiary.name + ")",
         "table": processes_table,
-        "subsidiaries": Subsidiary.objects.all(),
         "subscribed_object": offer,
         "subscription_url": f"/switch_offer_subscription/{offer.id}/",
         "subscribe_button_template": "interview/subscribe_button_offer.html",
@@ -465,8 +499,16 @@ def processes(request):
         Process.objects.for_table(request.user).filter(end_date__gte=a_week_ago)
     )
 
-    open_processes_table = ProcessTable(open_processes, prefix="o")
-    recently_closed_processes_table = ProcessEndTable(recently_closed_processes, prefix="c")
+    subsidiary = subsidiary_filter.form.cleaned_data.get("subsidiary")
+    open_processes_table = ProcessTable(
+        listcache.CachedTableData(open_processes, listcache.list_key("open", request.user, subsidiary)), prefix="o"
+    )
+    recently_closed_processes_table = ProcessEndTable(
+        listcache.CachedTableData(
+            recently_closed_processes, listcache.list_key("recently-closed", request.user, subsidiary)
+        ),
+        prefix="c",
+    )
 
     config = RequestConfig(request)
     config.configure(open_processes_table)
@@ -475,7 +517,6 @@ def processes(request):
     context = {
         "open_processes_table": open_processes_table,
         "recently_closed_processes_table": recently_closed_processes_table,
-        "subsidiaries": Subsidiary.objects.all(),
     }
     return render(request, "interview/list_processes.html", context)
 
@@ -607,7 +648,6 @@ def new_candidate(request, past_candidate_id=None):
             "interviewers_form": interviewers_form,
             "duplicates": duplicate_processes,
             "candidate": candidate,
-            "subsidiaries": Subsidiary.objects.all(),
             "document_types": doctypes,
         },
     )
@@ -672,7 +712,6 @@ def interview(request, process_id=None, interview_id=None, action=None):
         {
             "form": form,
             "process": process,
-            "subsidiaries": Subsidiary.objects.all(),
             "goal": goal,
         },
     )
@@ -721,12 +760,12 @@ def minute_edit(request, interview_id):
             "form": form,
             "process": interview.process,
             "interview": interview,
-            "subsidiaries": Subsidiary.objects.all(),
             "documents": DocumentInterview.objects.filter(interview=interview),
         },
     )
 
 
+@global_subsidiary_filter_exempt
 @login_required
 @require_http_methods(["POST"])
 def delete_document_minute_ajax(request):
@@ -759,7 +798,6 @@ def minute(request, interview_id, slug_info=None):
     context = {
         "interview": interview,
         "process": interview.process,
-        "subsidiaries": Subsidiary.objects.all(),
         "goal": goal,
         "document": interview.documentinterview_set.all(),
     }
@@ -773,28 +811,15 @@ def dashboard(request):
         return processes_for_source(request, request.user.limited_to_source.id)
 
     a_week_ago = timezone.now() - datetime.timedelta(days=7)
-    c = request.user
-    actions_needed_processes = (
-        Process.objects.for_table(request.user).exclude(state__in=Process.CLOSED_STATE_VALUES).filter(responsible=c)
-    )
-
-    actions_needed_processes_table = ProcessTable(actions_needed_processes, prefix="a")
-
-    related_processes = (
-        Process.objects.for_table(request.user)
-        .filter(interview__interviewers=request.user)
-        .filter(Q(end_date__gte=a_week_ago) | Q(state__in=Process.OPEN_STATE_VALUES))
-        .distinct()
+    # sections are split and paginated in memory from a single query
+    processes = listcache.cached_list(
+        listcache.list_key("dashboard", request.user),
+        lambda: Process.objects.for_dashboard(request.user, a_week_ago),
     )
-    related_processes_table = ProcessTable(related_processes, prefix="r")
 
-    subsidiary_processes = (
-        Process.objects.for_table(request.user)
-        .filter(Q(end_date__gte=a_week_ago) | Q(state__in=Process.OPEN_STATE_VALUES))
-        .filter(subsidiary=c.company)
-    )
-
-    subsidiary_processes_table = ProcessTable(subsidiary_processes, prefix="s")
+    actions_needed_processes_table = DashboardProcessTable([p for p in processes if p.needs_action], prefix="a")
+    related_processes_table = DashboardProcessTable([p for p in processes if p.is_related], prefix="r")
+    subsidiary_processes_table = DashboardProcessTable([p for p in processes if p.in_subsidiary], prefix="s")
 
     config = RequestConfig(request)
     config.configure(actions_needed_processes_table)
@@ -805,12 +830,12 @@ def dashboard(request):
         "actions_needed_processes_table": actions_needed_processes_table,
         "related_processes_table": related_processes_table,
         "subsidiary_processes_table": subsidiary_processes_table,
-        "subsidiaries": Subsidiary.objects.all(),
     }
 
     return render(request, "interview/dashboard.html", context)
 
 
+@global_subsidiary_filter_exempt
 @login_required
 @require_http_methods(["POST"])
 @user_passes_test(lambda u: not u.is_external)
@@ -826,6 +851,7 @@ def create_source_ajax(request):
         return JsonResponse(data)
 
 
+@global_subsidiary_filter_exempt
 @login_required
 @require_http_methods(["POST"])
 @user_passes_test(lambda u: not u.is_external)
@@ -936,30 +962,105 @@ def edit_candidate(request, process_id):
         "process_form": process_form,
         "source_form": source_form,
         "offer_form": offer_form,
-        "subsidiaries": Subsidiary.objects.all(),
         "documents": Document.objects.filter(candidate=candidate),
         "document_types": doctypes,
     }
     return render(request, "interview/new_candidate.html", data)
 
 
+DUMP_DATA_EXCLUDE = ["auth.Permission", "contenttypes"]
+DUMP_DATA_CHUNK_SIZE = 500
+
+
+def dump_data_models(labels=None):
+    """
+    Models dumped for "app_label" or "app_label.ModelName" labels (all apps if empty), sorted to
+    allow natural foreign keys loading. Raise CommandError on unknown labels.
+    """
+    excluded_models, excluded_apps = parse_apps_and_model_labels(DUMP_DATA_EXCLUDE)
+    if labels:
+        models, app_configs = parse_apps_and_model_labels(labels)
+        app_list = dict.fromkeys(app_configs)
+        for model in models:
+            app_models = app_list.setdefault(model._meta.app_config, [])
+            if app_models is not None:
+                app_models.append(model)
+    else:
+        app_list = dict.fromkeys(
+            app_config for app_config in django_apps.get_app_configs() if app_config.models_module is not None
+        )
+    app_list = {app_config: models for app_config, models in app_list.items() if app_config not in excluded_apps}
+    return [
+        model
+        for model in serializers.sort_dependencies(app_list.items(), allow_cycles=True)
+        if model not in excluded_models
+        and not model._meta.proxy
+        and router.allow_migrate_model(DEFAULT_DB_ALIAS, model)
+    ]
+
+
+def dump_data_chunks(models, chunk_size=DUMP_DATA_CHUNK_SIZE):
+    """
+    Serialize models objects as `dumpdata --natural-foreign` JSON, yielding one string per chunk of
+    objects so that only chunk_size objects are held in memory
+    """
+
+    def serialize(objects):
+        return ",\n".join(
+            json.dumps(o, cls=DjangoJSONEncoder, ensure_ascii=False)
+            for o in serializers.serialize("python", objects, use_natural_foreign_keys=True)
+        )
+
+    yield "["
+    separator = "\n"
+    for model in models:
+        objects = []
+        for obj in model._base_manager.order_by(model._meta.pk.name).iterator(chunk_size=chunk_size):
+            objects.append(obj)
+            if len(objects) == chunk_size:
+                yield separator + serialize(objects)
+                separator = ",\n"
+                objects = []
+        if objects:
+            yield separator + serialize(objects)
+            separator = ",\n"
+    yield "\n]\n"
+
+
+@global_subsidiary_filter_exempt
 @user_passes_test(lambda u: u.is_active and u.is_superuser)
 def dump_data(request):
-    out = io.StringIO()
-    call_command(
-        "dumpdata",
-        use_natural_foreign_keys=True,
-        use_base_manager=True,
-        exclude=["auth.Permission", "contenttypes"],
-        stdout=out,
-    )
-    response = HttpResponse(out.getvalue(), content_type="application/json")
-    response["Content-Disposition"] = "attachment; filename=pyoupyou_dump.json"
+    """
+    Stream a JSON dump of the database
+
+    `models` restricts the dump to comma separated "app_label" or "app_label.ModelName" labels,
+    `gzip=1` compresses it.
+    """
+    labels = [label for value in request.GET.getlist("models") for label in value.split(",") if label]
+    try:
+        models = dump_data_models(labels)
+    except CommandError as e:
+        return HttpResponseBadRequest(str(e))
+
+    if request.GET.get("gzip") == "1":
+        chunks = compress_sequence(chunk.encode() for chunk in dump_data_chunks(models))
+        response = StreamingHttpResponse(chunks, content_type="application/gzip")
+        response["Content-Disposition"] = "attachment; filename=pyoupyou_dump.json.gz"
+    else:
+        response = StreamingHttpResponse(dump_data_chunks(models), content_type="application/json")
+        response["Content-Disposition"] = "attachment; filename=pyoupyou_dump.json"
     return response
 
 
+EXPORT_CHUNK_SIZE = 2000
+
+
 def process_stats(process):
-    """Compute process length (in days and itw count), shared by TSV exports"""
+    """
+    Compute process length (in days and itw count), shared by TSV exports
+
+    process must be annotated with `interview_last_planned_date` and `itw_count`
+    """
     process_length = 0
     end_date = None
     if process.end_date:
@@ -971,193 +1072,193 @@ def process_stats(process):
             end_date = datetime.datetime.now().date()
 
     process_length = (end_date - process.start_date).days
-    process_interview_count = process.interview_set.count()
+    process_interview_count = process.itw_count
 
     return process_length, process_interview_count
 
 
+def tsv_response(header, rows, filename):
+    """Stream header and rows (iterables of columns) as a TSV attachment"""
+
+    def lines():
+        yield "\t".join(str(c).replace("\t", " ") for c in header)
+        for columns in rows:
+            yield "\n" + "\t".join(str(c).replace("\t", " ") for c in columns)
+
+    response = StreamingHttpResponse(lines(), content_type="text/plain; charset=utf-8")
+    response["Content-Disposition"] = "attachment; filename={filename}".format(filename=filename)
+    return response
+
+
+@global_subsidiary_filter_exempt
 @login_required
 @require_http_methods(["GET"])
 def export_processes_tsv(request):
-    processes = Process.objects.for_user(request.user).prefetch_related("interview_set")
-
-    ret = []
-
-    ret.append(
-        "\t".join(
-            str(x).replace("\t", " ")
-            for x in [
-                "process.id",
-                "candidate.name",
-                "subsidiary",
-                "start_date",
-                "end_date",
-                "process length",
-                "sources",
-                "source_category",
-                "offer",
-                "contract_type",
-                "contract_start_date",
-                "contract_duration",
-                "process state",
-                "process state label",
-                "process itw count",
-                "mean days between itws",
-            ]
-        )
+    processes = (
+        Process.objects.for_user(request.user)
+        .select_related("candidate", "subsidiary", "sources__category", "offer__subsidiary", "contract_type")
+        .annotate(interview_last_planned_date=Max("interview__planned_date"), itw_count=Count("interview"))
+        .order_by("id")
     )
 
-    for process in processes:
-        process_length, process_interview_count = process_stats(process)
-        columns = [
-            process.id,
-            process.candidate.name,
-            process.subsidiary,
-            process.start_date,
-            process.end_date,
-            process_length,
-            process.sources,
-            "" if process.sources is None else process.sources.category.name,
-            process.offer,
-            process.contract_type,
-            process.contract_start_date,
-            process.contract_duration,
-            process.state,
-            process.get_state_display(),
-            process_interview_count,
-            0 if process_interview_count == 0 else int(process_length / process_interview_count),
-        ]
-        ret.append("\t".join(str(c).replace("\t", " ") for c in columns))
-
-    response = HttpResponse("\n".join(ret), content_type="text/plain; charset=utf-8")
-    response["Content-Disposition"] = "attachment; filename=all_processes.tsv"
+    header = [
+        "process.id",
+        "candidate.name",
+        "subsidiary",
+        "start_date",
+        "end_date",
+        "process length",
+        "sources",
+        "source_category",
+        "offer",
+        "contract_type",
+        "contract_start_date",
+        "contract_duration",
+        "process state",
+        "process state label",
+        "process itw count",
+        "mean days between itws",
+    ]
 
-    return response
+    def rows():
+        for process in processes.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            process_length, process_interview_count = process_stats(process)
+            yield [
+                process.id,
+                process.candidate.name,
+                process.subsidiary,
+                process.start_date,
+                process.end_date,
+                process_length,
+                process.sources,
+                "" if process.sources is None else process.sources.category.name,
+                process.offer,
+                process.contract_type,
+                process.contract_start_date,
+                process.contract_duration,
+                process.state,
+                process.get_state_display(),
+                process_interview_count,
+                0 if process_interview_count == 0 else int(process_length / process_interview_count),
+            ]
 
+    return tsv_response(header, rows(), "all_processes.tsv")
 
+
+@global_subsidiary_filter_exempt
 @login_required
 @require_http_methods(["GET"])
 def export_interviews_tsv(request):
-    pyoupyou_users = PyouPyouUser.objects.filter(is_active=True).select_related("user").select_related("company")
+    pyoupyou_users = PyouPyouUser.objects.filter(is_active=True).select_related("company")
+    process_interviews = Interview.objects.filter(process=OuterRef("process")).order_by().values("process")
+    previous = {"partition_by": F("process"), "order_by": F("rank").asc()}
     interviews = (
         Interview.objects.for_user(request.user)
-        .select_related("process")
-        .select_related("process__sources")
-        .select_related("process__contract_type")
-        .select_related("process__candidate")
-        .select_related("process__subsidiary")
-        .select_related("process__offer")
+        .select_related(
+            "process__candidate",
+            "process__subsidiary",
+            "process__sources__category",
+            "process__offer__subsidiary",
+            "process__contract_type",
+            "kind_of_interview",
+        )
         .prefetch_related(Prefetch("interviewers", queryset=pyoupyou_users))
-    )
-
-    ret = []
-
-    ret.append(
-        "\t".join(
-            str(x).replace("\t", " ")
-            for x in [
-                "process.id",
-                "candidate.name",
-                "subsidiary",
-                "start_date",
-                "end_date",
-                "process length",
-                "source",
-                "source category",
-                "offer",
-                "contract_type",
-                "contract_start_date",
-                "contract_duration",
-                "process state",
-                "process state label",
-                "process itw count",
-                "mean days between itws",
-                "interview.id",
-                "state",
-                "interviewers",
-                "interview rank",
-                "days since last",
-                "planned_date",
-                "prequalification",
-                "kind",
-            ]
+        .annotate(
+            process_last_planned_date=Subquery(
+                process_interviews.annotate(last_planned_date=Max("planned_date")).values("last_planned_date")
+            ),
+            process_itw_count=Subquery(process_interviews.annotate(itw_count=Count("id")).values("itw_count")),
+            previous_rank=Window(Lag("rank"), **previous),
+            previous_planned_date=Window(Lag("planned_date"), **previous),
         )
+        .order_by("process", "rank")
     )
-    processes_length = {}
-    processes_itw_count = {}
-
-    for interview in interviews:
-        interviewers = ""
-        for i in interview.interviewers.all():
-            interviewers += i.trigramme + "_"
-        interviewers = interviewers[:-1]
-
-        if interview.process.id not in processes_length:
-            process_length, process_interview_count = process_stats(interview.process)
-            processes_length[interview.process.id] = process_length
-            processes_itw_count[interview.process.id] = process_interview_count
-        else:
-            process_length = processes_length[interview.process.id]
-            process_interview_count = processes_itw_count[interview.process.id]
-
-        # Compute time elapsed since last event (previous interview or beginning of process)
-        time_since_last_is_sound = True
-        last_event_date = interview.process.start_date
-        next_event_date = None
-        if interview.rank > 1:
-            last_itw = (
-                Interview.objects.for_user(request.user)
-                .filter(process=interview.process, rank=interview.rank - 1)
-                .first()
-            )
-            if last_itw and last_itw.planned_date is not None:
-                last_event_date = last_itw.planned_date.date()
-            else:
+
+    header = [
+        "process.id",
+        "candidate.name",
+        "subsidiary",
+        "start_date",
+        "end_date",
+        "process length",
+        "source",
+        "source category",
+        "offer",
+        "contract_type",
+        "contract_start_date",
+        "contract_duration",
+        "process state",
+        "process state label",
+        "process itw count",
+        "mean days between itws",
+        "interview.id",
+        "state",
+        "interviewers",
+        "interview rank",
+        "days since last",
+        "planned_date",
+        "prequalification",
+        "kind",
+    ]
+
+    def rows():
+        for interview in interviews.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            interviewers = "_".join(i.trigramme for i in interview.interviewers.all())
+
+            process = interview.process
+            process.interview_last_planned_date = interview.process_last_planned_date
+            process.itw_count = interview.process_itw_count or 0
+            process_length, process_interview_count = process_stats(process)
+
+            # Compute time elapsed since last event (previous interview or beginning of process)
+            time_since_last_is_sound = True
+            last_event_date = process.start_date
+            next_event_date = None
+            if interview.rank > 1:
+                if interview.previous_rank == interview.rank - 1 and interview.previous_planned_date is not None:
+                    last_event_date = interview.previous_planned_date.date()
+                else:
+                    time_since_last_is_sound = False
+            if interview.planned_date is None:
                 time_since_last_is_sound = False
-        if interview.planned_date is None:
-            time_since_last_is_sound = False
-        else:
-            next_event_date = interview.planned_date.date()
-        if time_since_last_is_sound:
-            time_since_last_event = int((next_event_date - last_event_date).days)
-            # we have some processes that were created after the first itw was planned
-            if time_since_last_event < 0:
+            else:
+                next_event_date = interview.planned_date.date()
+            if time_since_last_is_sound:
+                time_since_last_event = int((next_event_date - last_event_date).days)
+                # we have some processes that were created after the first itw was planned
+                if time_since_last_event < 0:
+                    time_since_last_event = ""
+            else:
                 time_since_last_event = ""
-        else:
-            time_since_last_event = ""
-
-        columns = [
-            interview.process.id,
-            interview.process.candidate.name,
-            interview.process.subsidiary,
-            interview.process.start_date,
-            interview.process.end_date,
-            process_length,
-            interview.process.sources,
-            "" if interview.process.sources is None else interview.process.sources.category.name,
-            interview.process.offer,
-            interview.process.contract_type,
-            interview.process.contract_start_date,
-            interview.process.contract_duration,
-            interview.process.state,
-            interview.process.get_state_display(),
-            process_interview_count,
-            0 if process_interview_count == 0 else int(process_length / process_interview_count),
-            interview.id,
-            interview.state,
-            interviewers,
-            interview.rank,
-            time_since_last_event,
-            interview.planned_date,
-            interview.prequalification,
-            interview.kind_of_interview,
-        ]
-        ret.append("\t".join(str(c).replace("\t", " ") for c in columns))
-
-    response = HttpResponse("\n".join(ret), content_type="text/plain; charset=utf-8")
-    response["Content-Disposition"] = "attachment; filename=all_interviews.tsv"
 
-    return response
+            yield [
+                process.id,
+                process.candidate.name,
+                process.subsidiary,
+                process.start_date,
+                process.end_date,
+                process_length,
+                process.sources,
+                "" if process.sources is None else process.sources.category.name,
+                process.offer,
+                process.contract_type,
+                process.contract_start_date,
+                process.contract_duration,
+                process.state,
+                process.get_state_display(),
+                process_interview_count,
+                0 if process_interview_count == 0 else int(process_length / process_interview_count),
+                interview.id,
+                interview.state,
+                interviewers,
+                interview.rank,
+                time_since_last_event,
+                interview.planned_date,
+                interview.prequalification,
+                interview.kind_of_interview,
+            ]
+
+    return tsv_response(header, rows(), "all_interviews.tsv")
 
 
 class LoadTable(tables.Table):
@@ -1176,60 +1277,6 @@ class LoadTable(tables.Table):
         attrs = {"class": "table table-striped table-condensed"}
 
 
-def _interviewer_load(interviewer):
-    a_month_ago = timezone.now() - datetime.timedelta(days=30)
-    a_week_ago = timezone.now() - datetime.timedelta(days=7)
-    end_of_today = timezone.now().replace(hour=23, minute=59, second=59)
-
-    itw_last_month = calculate_load(
-        Interview.objects.filter(interviewers=interviewer)
-        .filter(planned_date__gte=a_month_ago)
-        .filter(planned_date__lt=end_of_today)
-        .values("prequalification")
-        .annotate(load=Count("id"))
-        .order_by("prequalification")
-    )
-    itw_last_week = calculate_load(
-        Interview.objects.filter(interviewers=interviewer)
-        .filter(planned_date__gte=a_week_ago)
-        .filter(planned_date__lt=end_of_today)
-        .values("prequalification")
-        .annotate(load=Count("id"))
-        .order_by("prequalification")
-    )
-    itw_planned = calculate_load(
-        Interview.objects.filter(interviewers=interviewer)
-        .filter(planned_date__gte=timezone.now())
-        .values("prequalification")
-        .annotate(load=Count("id"))
-        .order_by("prequalification")
-    )
-    itw_not_planned_yet = calculate_load(
-        Interview.objects.filter(interviewers=interviewer)
-        .filter(planned_date=None)
-        .filter(process__state__in=Process.OPEN_STATE_VALUES)
-        .values("prequalification")
-        .annotate(load=Count("id"))
-        .order_by("prequalification")
-    )
-
-    load = pow(itw_planned + itw_not_planned_yet + 2, 2) + 2 * itw_last_week + itw_last_month - 4
-
-    return {
-        "load": load,
-        "itw_last_month": itw_last_month,
-        "itw_last_week": itw_last_week,
-        "itw_not_planned_yet": itw_not_planned_yet,
-        "itw_planned": itw_planned,
-    }
-
-
-def calculate_load(itws):
-    prequalification_weight = 2
-    loads = {x["prequalification"]: x["load"] for x in itws}
-    return loads.get(False, 0) + (loads.get(True, 0) / prequalification_weight)
-
-
 @login_required
 @require_http_methods(["GET"])
 @user_passes_test(lambda u: not u.is_external)
@@ -1241,23 +1288,12 @@ def interviewers_load(request):
         pyoupyou_user_qs = PyouPyouUser.objects.filter(company=subsidiary)
     else:
         pyoupyou_user_qs = PyouPyouUser.objects.all()
-    data = []
-    for c in pyoupyou_user_qs.filter(is_active=True).order_by("company", "full_name"):
-        load = _interviewer_load(c)
-        data.append(
-            {
-                "subsidiary": c.company,
-                "interviewer": c,
-                "load": load["load"],
-                "itw_last_month": load["itw_last_month"],
-                "itw_last_week": load["itw_last_week"],
-                "itw_not_planned_yet": load["itw_not_planned_yet"],
-                "itw_planned": load["itw_planned"],
-                "a_month_ago": (timezone.now() - datetime.timedelta(days=30)).strftime(
-                    "%d/%m/%Y"
-                ),  # For the link to interviews_list
-            }
-        )
+    # For the link to interviews_list
+    a_month_ago = (timezone.now() - datetime.timedelta(days=30)).strftime("%d/%m/%Y")
+    data = reports.interviewers_load(pyoupyou_user_qs.filter(is_active=True).order_by("company", "full_name"))
+    for row in data:
+        row["subsidiary"] = row["interviewer"].company
+        row["a_month_ago"] = a_month_ago
 
     load_table = LoadTable(data, order_by="-load")
     RequestConfig(request, paginate={"per_page": 100}).configure(load_table)
@@ -1266,7 +1302,6 @@ def interviewers_load(request):
         "interview/interviewers-load.html",
         {
             "subsidiary": subsidiary,
-            "subsidiaries": Subsidiary.objects.all(),
             "load_table": load_table,
         },
     )
@@ -1278,18 +1313,18 @@ def interviewers_load(request):
 def search(request):
     q = request.GET.get("q", "").strip()
 
-    results = Process.objects.filter(Q(candidate__name__icontains=q) | Q(candidate__email__icontains=q)).distinct()
+    results = search_processes(request.user, q)
 
-    search_result = ProcessEndTable(results, prefix="c")
+    # keep search ranking unless user sorts by a column
+    search_result = ProcessEndTable(results, prefix="c", order_by=())
 
-    config = RequestConfig(request)
+    config = RequestConfig(request, paginate={"per_page": 50})
     config.configure(search_result)
 
     context = {
         "title": _('Search result for "{q}"').format(q=q),
         "table": search_result,
         "search_query": q,
-        "subsidiaries": Subsidiary.objects.all(),
     }
 
     return render(request, "interview/single_table.html", context)
@@ -1299,9 +1334,7 @@ def search(request):
 @require_http_methods(["GET"])
 @user_passes_test(lambda u: not u.is_external)
 def gantt(request):
-    cmap = {}
-    for contract_type in ContractType.objects.all():
-        cmap[contract_type.name] = contract_type.color
+    cmap = refdata.contract_type_colors()
 
     state_filter = Process.OPEN_STATE_VALUES + [Process.JOB_OFFER, Process.HIRED]
     today = timezone.now().date()
@@ -1339,45 +1372,21 @@ def gantt(request):
             state = ""
         processes_dict.append(
             {
-                "Task": "<a href='{}'>{} {}</a>".format(process.get_absolute_url(), process.candidate.name, state),
-                "ContractType": process.contract_type.name,
-                "Start": start_date,
-                "Finish": end_date,
+                "label": "{} {}".format(process.candidate.name, state).strip(),
+                "url": process.get_absolute_url(),
+                "type": process.contract_type.name,
+                "start": start_date,
+                "finish": end_date,
             }
         )
 
-    if not processes_dict:
-        context = {
-            "gantt": _("No data"),
-            "filter": filter,
-            "subsidiaries": Subsidiary.objects.all(),
-        }
-
-        return render(request, "interview/gantt.html", context)
-
     for process in processes_dict:
-        if not process["Finish"]:
-            process["Finish"] = max_end_date
-
-    fig = ff.create_gantt(
-        processes_dict, index_col="ContractType", show_colorbar=True, showgrid_x=True, showgrid_y=True, colors=cmap
-    )
-    fig.layout.update(
-        {
-            "title": {"text": _t("Contracts")},
-            "xaxis": {"rangeslider": {"visible": False}, "rangeselector": None, "fixedrange": True},
-            "yaxis": {"fixedrange": True},
-        }
-    )
-
-    config = dict({"scrollZoom": False, "staticPlot": False, "showAxisRangeEntryBoxes": False, "displayModeBar": False})
-
-    grant_chart = plot(fig, output_type="div", config=config)
+        if not process["finish"]:
+            process["finish"] = max_end_date
 
     context = {
-        "gantt": grant_chart,
+        "gantt": {"title": _t("Contracts"), "colors": cmap, "tasks": processes_dict} if processes_dict else None,
         "filter": filter,
-        "subsidiaries": Subsidiary.objects.all(),
     }
 
     return render(request, "interview/gantt.html", context)
@@ -1438,48 +1447,24 @@ def active_sources(request):
     request_get = request.GET.copy()
     request_get.setdefault("archived", "False")
 
-    sources_filter = ActiveSourcesFilter(
-        request_get,
-        queryset=(
-            Sources.objects.all()
-            if subsidiary is None
-            else Sources.objects.filter(process__subsidiary=subsidiary).distinct()
-        ),
-    )
-    sources_qs = sources_filter.qs
-
-    subsidiary_id = sources_filter.data.get("subsidiary")
-    if subsidiary_id:
-        try:
-            subsidiary = Subsidiary.objects.get(id=subsidiary_id)
-        except Subsidiary.DoesNotExist:
-            pass
+    sources_filter = ActiveSourcesFilter(request_get, queryset=Sources.objects.all())
 
     data = []
-    filtered_process = Process.objects.all()
-    if subsidiary:
-        filtered_process = filtered_process.filter(subsidiary=subsidiary)
-    for s in sources_qs:
-        total_processes = filtered_process.filter(sources=s)
-        total_processes_count = total_processes.count()
-        active_processes_count = filtered_process.filter(sources=s, state__in=Process.OPEN_STATE_VALUES).count()
-        total_hired = filtered_process.filter(sources=s, state=Process.HIRED).count()
-        last_state_change = filtered_process.filter(sources=s).aggregate(Max("last_state_change"))
-        distinct_offers = Offer.objects.filter(process__in=filtered_process.filter(sources=s)).distinct().count()
-
+    for s in reports.sources_report(sources_filter.qs, subsidiary):
         row = {
             "name": s.name,
-            "source_category": s.category.name,
-            "last_active_process_days": last_state_change,
-            "total_processes_count": total_processes_count,
-            "active_processes_count": active_processes_count,
-            "total_hired": total_hired,
-            "ratio": 100 * total_hired / total_processes_count if total_processes_count > 0 else None,
-            "last_state_change": last_state_change["last_state_change__max"],
+            "source_category": s.category.name if s.category else "",
+            "last_active_process_days": s.last_state_change,
+            "total_processes_count": s.total_processes_count,
+            "active_processes_count": s.active_processes_count,
+            "total_hired": s.total_hired,
+            "ratio": 100 * s.total_hired / s.total_processes_count if s.total_processes_count > 0 else None,
+            "last_state_change": s.last_state_change,
             "url": reverse(viewname="process-list-source", kwargs={"source_id": s.id}),
             "admin_url": reverse(viewname="admin:interview_sources_change", kwargs={"object_id": s.id}),
-            "offers": distinct_offers,
+            "offers": s.distinct_count,
             "id": s.id,
+            "archived": s.archived,
         }
 
         data.append(row)
@@ -1493,9 +1478,7 @@ def active_sources(request):
     if not sources_filter.data.get("archived"):
         # change table rendering to gray out rows that are archived
         all_sources_table.attrs.update({"class": "table table-condensed"})
-        all_sources_table.row_attrs.update(
-            {"bgcolor": lambda record: "#e0e0e0" if Sources.objects.get(id=record["id"]).archived else None}
-        )
+        all_sources_table.row_attrs.update({"bgcolor": lambda record: "#e0e0e0" if record["archived"] else None})
 
     RequestConfig(request, paginate={"per_page": 100}).configure(all_sources_table)
     return render(
@@ -1503,7 +1486,6 @@ def active_sources(request):
         "interview/active-sources.html",
         {
             "subsidiary": subsidiary,
-            "subsidiaries": Subsidiary.objects.all(),
             "sources": all_sources_table,
             "filter": sources_filter,
         },
@@ -1521,30 +1503,20 @@ def offers(request):
     offers_qs = offers.filter(archived=False)
 
     data = []
-    filtered_process = Process.objects.all()
-    if subsidiary:
-        filtered_process = filtered_process.filter(subsidiary=subsidiary)
-    for o in offers_qs:
-        total_processes = filtered_process.filter(offer=o)
-        total_processes_count = total_processes.count()
-        active_processes_count = filtered_process.filter(offer=o, state__in=Process.OPEN_STATE_VALUES).count()
-        total_hired = filtered_process.filter(offer=o, state=Process.HIRED).count()
-        last_state_change = filtered_process.filter(offer=o).aggregate(Max("last_state_change"))
-        distinct_sources = Sources.objects.filter(process__in=filtered_process.filter(offer=o)).distinct().count()
-
+    for o in reports.offers_report(offers_qs, subsidiary):
         data.append(
             {
                 "name": o.name,
                 "subsidiary": o.subsidiary,
-                "last_active_process_days": last_state_change,
-                "total_processes_count": total_processes_count,
-                "active_processes_count": active_processes_count,
-                "total_hired": total_hired,
-                "ratio": 100 * total_hired / total_processes_count if total_processes_count > 0 else None,
-                "last_state_change": last_state_change["last_state_change__max"],
+                "last_active_process_days": o.last_state_change,
+                "total_processes_count": o.total_processes_count,
+                "active_processes_count": o.active_processes_count,
+                "total_hired": o.total_hired,
+                "ratio": 100 * o.total_hired / o.total_processes_count if o.total_processes_count > 0 else None,
+                "last_state_change": o.last_state_change,
                 "url": reverse(viewname="process-list-offer", kwargs={"offer_id": o.id}),
                 "admin_url": reverse(viewname="admin:interview_offer_change", kwargs={"object_id": o.id}),
-                "sources": distinct_sources,
+                "sources": o.distinct_count,
             }
         )
 
@@ -1555,149 +1527,82 @@ def offers(request):
         "interview/offers.html",
         {
             "subsidiary": subsidiary,
-            "subsidiaries": Subsidiary.objects.all(),
             "offers": offers_table,
         },
     )
 
 
-@login_required
-@require_http_methods(["GET"])
-@user_passes_test(lambda u: not u.is_external)
-def activity_summary(request):
+def _activity_summary(request):
+    """Summary filter, subsidiary, timespan and reports.activity_summary result of the request"""
     subsidiary_filter = get_global_filter(request)
+    subsidiary = subsidiary_filter.form.cleaned_data["subsidiary"]
     process_filter = ProcessSummaryFilter(
         request.GET, queryset=subsidiary_filter.filter_queryset(Process.objects.all())
     )
     interview_filter = InterviewSummaryFilter(
         request.GET,
-        queryset=(
-            Interview.objects.filter(process__subsidiary=subsidiary_filter.form.cleaned_data["subsidiary"])
-            if subsidiary_filter.form.cleaned_data["subsidiary"]
-            else Interview.objects.all()
-        ),
-    )
-
-    # Processes started in the timespan
-    new_processes_total = process_filter.qs.count()
-    new_processes = process_filter.qs.values("subsidiary__name").annotate(count=Count("candidate"))
-
-    # Processes closed and last modified in the timespan
-    closed_processes_total = process_filter.qs.filter(state__in=Process.CLOSED_STATE_VALUES).count()
-    closed_processes = (
-        process_filter.qs.filter(state__in=Process.CLOSED_STATE_VALUES)
-        .values("subsidiary__name")
-        .annotate(count=Count("candidate"))
-    )
-
-    # Processes closed and last modified in the timespan and GO
-    go_processes = process_filter.qs.filter(state=Process.HIRED).order_by("subsidiary")
-
-    # Processes with a pending offer
-    offer_processes = process_filter.qs.filter(state=Process.JOB_OFFER).order_by("subsidiary")
-
-    # Processes declined by candidate
-    declined_processes = process_filter.qs.filter(state=Process.CANDIDATE_DECLINED).order_by("subsidiary")
-
-    # New interviews
-    new_interviews_total = interview_filter.qs.count()
-    new_interviews = (
-        interview_filter.qs.order_by("process__subsidiary__name")
-        .values("process__subsidiary__name")
-        .annotate(count=Count("id"))
+        queryset=(Interview.objects.filter(process__subsidiary=subsidiary) if subsidiary else Interview.objects.all()),
     )
 
-    # New GO interviews
-    new_interviews_go_total = interview_filter.qs.filter(state=Interview.GO).count()
-    new_interviews_go = (
-        interview_filter.qs.filter(state=Interview.GO)
-        .order_by("process__subsidiary__name")
-        .values("process__subsidiary__name")
-        .annotate(count=Count("id"))
-    )
-
-    active_sources = process_filter.qs.values("sources__name").annotate(count=Count("sources")).filter(count__gt=0)
+    summary = reports.activity_summary(process_filter.qs, interview_filter.qs)
 
-    start_date = Process.objects.order_by("start_date").first().start_date
+    start_date = None
     end_date = timezone.now()
     if process_filter.form.cleaned_data["last_state_change"]:
-        if process_filter.form.cleaned_data["last_state_change"].start:
-            start_date = process_filter.form.cleaned_data["last_state_change"].start
+        start_date = process_filter.form.cleaned_data["last_state_change"].start
         if process_filter.form.cleaned_data["last_state_change"].stop:
             end_date = process_filter.form.cleaned_data["last_state_change"].stop
-    subsidiary = subsidiary_filter.form.cleaned_data["subsidiary"]
+    if start_date is None:
+        start_date = Process.objects.aggregate(start_date=Min("start_date"))["start_date"]
 
-    source_data = (
-        interview_filter.qs.filter(planned_date__isnull=False)
-        .order_by("process__subsidiary__name")
-        .annotate(planned_date_month=Trunc("planned_date", "month"))
-        .values("planned_date_month")
-        .order_by("planned_date_month")
-        .values("planned_date_month", "process__subsidiary__name", "state")
-        .annotate(count=Count("id"))
-    )
+    return process_filter, subsidiary, start_date, end_date, summary
 
-    df = pd.DataFrame(source_data)
 
-    translated_values = [
-        _t("NEED PLANIFICATION"),
-        _t("WAIT PLANIFICATION RESPONSE"),
-        _t("PLANNED"),
-        _t("GO"),
-        _t("NO"),
-        _t("DRAFT"),
-        _t("WAIT INFORMATION"),
-    ]
+@login_required
+@require_http_methods(["GET"])
+@user_passes_test(lambda u: not u.is_external)
+def activity_summary(request):
+    process_filter, subsidiary, start_date, end_date, summary = _activity_summary(request)
 
-    chart = None
-    if len(df) > 0:
-        df = df.replace(Interview.ALL_STATE_VALUES, translated_values)
-        df["subsidiary_state"] = df["process__subsidiary__name"] + " " + df["state"]
-        df = df.sort_values("subsidiary_state")
-
-        fig = px.bar(
-            df,
-            x="planned_date_month",
-            y="count",
-            color="subsidiary_state",
-            title="",
-            labels={
-                "planned_date_month": _t("Interview date"),
-                "process__subsidiary__name": _t("Subsidiary"),
-                "count": _t("Count"),
-                "subsidiary_state": _t("Subsidiary and state"),
-            },
-        )
+    # one stacked bars serie per subsidiary and interview state
+    states = dict(Interview.ITW_STATE)
+    series = {}
+    for row in summary["monthly_interviews"]:
+        name = "{} {}".format(row["subsidiary"], states[row["state"]])
+        serie = series.setdefault(name, {"name": name, "x": [], "y": []})
+        serie["x"].append(row["month"].date())
+        serie["y"].append(row["count"])
 
-        config = dict(
-            {"scrollZoom": False, "staticPlot": False, "showAxisRangeEntryBoxes": False, "displayModeBar": False}
-        )
-        chart = plot(fig, output_type="div", config=config)
+    chart = None
+    if series:
+        chart = {
+            "labels": {"x": _t("Interview date"), "y": _t("Count"), "legend": _t("Subsidiary and state")},
+            "series": [series[name] for name in sorted(series)],
+        }
 
     return render(
         request,
         "interview/summary.html",
         {
             "filter": process_filter,
-            "interviews_total": new_interviews_total,
-            "interviews_go_total": new_interviews_go_total,
-            "interviews_details": zip(new_interviews, new_interviews_go) if not subsidiary else None,
-            "new_processes_total": new_processes_total,
-            "new_processes": new_processes if not subsidiary else None,
-            "closed_processes_total": closed_processes_total,
-            "closed_processes": closed_processes if not subsidiary else None,
-            "active_sources": active_sources,
-            "go_processes": go_processes,
-            "offer_processes": offer_processes,
-            "declined_processes": declined_processes,
+            "summary": summary,
+            "show_subsidiaries": not subsidiary,
             "start": start_date,
             "end": end_date,
-            "plot_div": chart if chart else "",
-            "subsidiaries": Subsidiary.objects.all(),
+            "chart": chart,
         },
     )
 
 
+@global_subsidiary_filter_exempt
+@login_required
+@require_http_methods(["GET"])
+@user_passes_test(lambda u: not u.is_external)
+def activity_summary_api(request):
+    process_filter, subsidiary, start_date, end_date, summary = _activity_summary(request)
+    return JsonResponse({"start": start_date, "end": end_date, **summary})
+
+
 @login_required
 @require_http_methods(["GET"])
 def interviews_list(request):
@@ -1741,12 +1646,12 @@ def interviews_list(request):
     context = {
         "interviews_table": interviews_table,
         "filter": interview_filter,
-        "subsidiaries": Subsidiary.objects.all(),
     }
 
     return render(request, "interview/list_interviews.html", context)
 
 
+@global_subsidiary_filter_exempt
 @csrf_exempt
 @api_view(["POST"])
 def process_from_cognito_form(request, source_id, subsidiary_id):
@@ -1771,121 +1676,6 @@ def process_from_cognito_form(request, source_id, subsidiary_id):
 @login_required
 @user_passes_test(lambda u: not u.is_external)
 def interviews_pivotable(request):
-    data = []
-
-    subsidiary_filter = get_global_filter(request)
-
-    processes = subsidiary_filter.filter_queryset(
-        Process.objects.all()
-        .select_related("sources__category")
-        .select_related("contract_type")
-        .select_related("candidate")
-        .select_related("subsidiary")
-        .select_related("offer__subsidiary")
-        .prefetch_related("interview_set__kind_of_interview", "interview_set__interviewers")
-        .annotate(interview_last_planned_date=Max("interview__planned_date"))
-    )
-
-    # Analysis default filter on the current financial year
-    current_financial_year_default_filter = "%d/%d" % (datetime.date.today().year, datetime.date.today().year + 1)
-    financial_closing_current_date = parser.parse(
-        "%d-%s" % (datetime.date.today().year, settings.FINANCIAL_STARTING_MONTH_DAY)
-    ).date()
-    if datetime.date.today() < financial_closing_current_date:
-        current_financial_year_default_filter = "%d/%d" % (datetime.date.today().year - 1, datetime.date.today().year)
-
-    processes_length = {}
-    processes_itw_count = {}
-    for process in processes:
-        # Compute interview length
-        if process.id not in processes_length:
-            process_length, process_interview_count = process_stats(process)
-            processes_length[process.id] = process_length
-            processes_itw_count[process.id] = process_interview_count
-        else:
-            process_length = processes_length[process.id]
-            process_interview_count = processes_itw_count[process.id]
-
-        # Compute process start/end financial closing date
-        financial_closing_start_date = parser.parse(
-            "%d-%s" % (process.start_date.year, settings.FINANCIAL_STARTING_MONTH_DAY)
-        ).date()
-        process_start_fiscal_year = "%d/%d" % (process.start_date.year, process.start_date.year + 1)
-        if process.start_date < financial_closing_start_date:
-            process_start_fiscal_year = "%d/%d" % (process.start_date.year - 1, process.start_date.year)
-
-        process_end_date = "" if process.end_date is None else process.end_date.strftime("%Y-%m-%d")
-        process_source_category = "" if process.sources is None else process.sources.category.name
-        process_contract_start_date = (
-            "" if process.contract_start_date is None else process.contract_start_date.strftime("%Y-%m")
-        )
-        process_contract_duration = 0 if process.contract_duration is None else process.contract_duration
-        process_mean_days_between_itws = (
-            0 if process_interview_count == 0 else int(process_length / process_interview_count)
-        )
-
-        for idx, interview in enumerate(process.interview_set.all()):
-            interviewers = ""
-            for i in interview.interviewers.all():
-                interviewers += i.trigramme + "_"
-            interviewers = interviewers[:-1]
-
-            # Compute time elapsed since last event (previous interview or beginning of process)
-            time_since_last_is_sound = True
-            last_event_date = process.start_date
-            next_event_date = None
-            if interview.rank > 1:
-                last_itw = process.interview_set.all()[idx - 1]
-                if last_itw and last_itw.planned_date is not None:
-                    last_event_date = last_itw.planned_date.date()
-                else:
-                    time_since_last_is_sound = False
-            if interview.planned_date is None:
-                time_since_last_is_sound = False
-            else:
-                next_event_date = interview.planned_date.date()
-            if time_since_last_is_sound:
-                time_since_last_event = int((next_event_date - last_event_date).days)
-                # we have some processes that were created after the first itw was planned
-                if time_since_last_event < 0:
-                    time_since_last_event = _("Unknown")
-            else:
-                time_since_last_event = _("Unknown")
-
-            interview_planned_date = (
-                "" if interview.planned_date is None else interview.planned_date.strftime("%Y-%m-%d")
-            )
-            interview_planned_month_year = (
-                "" if interview.planned_date is None else interview.planned_date.strftime("%Y-%m")
-            )
-
-            data.append(
-                {
-                    _("subsidiary"): str(process.subsidiary),
-                    _("process start date"): process.start_date.strftime("%Y-%m-%d"),
-                    _("process start fiscal year"): process_start_fiscal_year,
-                    _("process end date"): process_end_date,
-                    _("source"): str(process.sources),
-                    _("source category"): process_source_category,
-                    _("offer"): str(process.offer),
-                    _("contract type"): str(process.contract_type),
-                    _("contract start date"): process_contract_start_date,
-                    _("contract duration"): process_contract_duration,
-                    _("process state label"): process.get_state_display(),
-                    _("process itw count"): process_interview_count,
-                    _("mean days between itws"): process_mean_days_between_itws,
-                    _("itw state label"): interview.get_state_display(),
-                    _("interviewers"): interviewers,
-                    _("interview rank"): interview.rank,
-                    _("days since last itw"): time_since_last_event,
-                    _("itw id"): interview.id,
-                    _("itw date"): interview_planned_date,
-                    _("itw year month"): interview_planned_month_year,
-                    _("itw kind"): str(interview.kind_of_interview),
-                    _("itw prequalification"): _("yes") if interview.prequalification else _("no"),
-                }
-            )
-
     representations = [
         {
             "title": _("Interview per state/subsidiaries"),
@@ -1925,8 +1715,8 @@ def interviews_pivotable(request):
         request,
         "interview/pivotable.html",
         {
-            "data": data,
-            "current_financial_year_default_filter": current_financial_year_default_filter,
+            "kind": "interviews",
+            "current_financial_year_default_filter": fiscal_year(datetime.date.today()),
             "title": _("Interviews analysis"),
             "representations": representations,
         },
@@ -1936,79 +1726,7 @@ def interviews_pivotable(request):
 @login_required
 @user_passes_test(lambda u: not u.is_external)
 def processes_pivotable(request):
-    data = []
-
-    subsidiary_filter = get_global_filter(request)
-
-    processes = subsidiary_filter.filter_queryset(
-        Process.objects.all()
-        .select_related("sources__category")
-        .select_related("contract_type")
-        .select_related("candidate")
-        .select_related("subsidiary")
-        .select_related("offer__subsidiary")
-        .prefetch_related("interview_set__kind_of_interview", "interview_set__interviewers")
-        .annotate(interview_last_planned_date=Max("interview__planned_date"))
-    )
-
-    # Analysis default filter on the current financial year
-    current_financial_year_default_filter = "%d/%d" % (datetime.date.today().year, datetime.date.today().year + 1)
-    financial_closing_current_date = parser.parse(
-        "%d-%s" % (datetime.date.today().year, settings.FINANCIAL_STARTING_MONTH_DAY)
-    ).date()
-    if datetime.date.today() < financial_closing_current_date:
-        current_financial_year_default_filter = "%d/%d" % (datetime.date.today().year - 1, datetime.date.today().year)
-
-    processes_length = {}
-    processes_itw_count = {}
-    for process in processes:
-        # Compute interview length
-        if process.id not in processes_length:
-            process_length, process_interview_count = process_stats(process)
-            processes_length[process.id] = process_length
-            processes_itw_count[process.id] = process_interview_count
-        else:
-            process_length = processes_length[process.id]
-            process_interview_count = processes_itw_count[process.id]
-
-        # Compute process start/end financial closing date
-        financial_closing_start_date = parser.parse(
-            "%d-%s" % (process.start_date.year, settings.FINANCIAL_STARTING_MONTH_DAY)
-        ).date()
-        process_start_fiscal_year = "%d/%d" % (process.start_date.year, process.start_date.year + 1)
-        if process.start_date < financial_closing_start_date:
-            process_start_fiscal_year = "%d/%d" % (process.start_date.year - 1, process.start_date.year)
-
-        process_end_date = "" if process.end_date is None else process.end_date.strftime("%Y-%m-%d")
-        process_source_category = "" if process.sources is None else process.sources.category.name
-        process_contract_start_date = (
-            "" if process.contract_start_date is None else process.contract_start_date.strftime("%Y-%m")
-        )
-        process_contract_duration = 0 if process.contract_duration is None else process.contract_duration
-        process_mean_days_between_itws = (
-            0 if process_interview_count == 0 else int(process_length / process_interview_count)
-        )
-
-        data.append(
-            {
-                _("subsidiary"): str(process.subsidiary),
-                _("process id"): str(process.id),
-                _("process start date"): process.start_date.strftime("%Y-%m-%d"),
-                _("process start year month"): process.start_date.strftime("%Y-%m"),
-                _("process start fiscal year"): process_start_fiscal_year,
-                _("process end date"): process_end_date,
-                _("process length"): process_length,
-                _("source"): str(process.sources),
-                _("source category"): process_source_category,
-                _("offer"): str(process.offer),
-                _("contract type"): str(process.contract_type),
-                _("contract start date"): process_contract_start_date,
-                _("contract duration"): process_contract_duration,
-                _("process state label"): process.get_state_display(),
-                _("process itw count"): process_interview_count,
-                _("mean days between itws"): process_mean_days_between_itws,
-            }
-        )
+    current_financial_year_default_filter = fiscal_year(datetime.date.today())
 
     default_option = {
         _("process start fiscal year"): [current_financial_year_default_filter],
@@ -2066,7 +1784,7 @@ def processes_pivotable(request):
         request,
         "interview/pivotable.html",
         {
-            "data": data,
+            "kind": "processes",
             "current_financial_year_default_filter": current_financial_year_default_filter,
             "title": _("Processes analysis"),
             "representations": representations,
@@ -2074,61 +1792,127 @@ def processes_pivotable(request):
     )
 
 
+@global_subsidiary_filter_exempt
 @login_required
-@require_http_methods(["GET"])
-def kanban(request):
-    DEFAULT_MIN_STEPS = 5
+@user_passes_test(lambda u: not u.is_external)
+def pivotable_data(request, kind):
+    """
+    Aggregated cells of an analysis page
+
+    Facts are grouped by rows, cols and attrs attributes (attrs are kept for client side filtering), all
+    attributes are listed so that the representation can be changed.
+    """
+    try:
+        records = pivot.aggregate(
+            kind,
+            get_global_filter(request).filter_queryset(pivot.facts(kind)),
+            request.GET.getlist("rows") + request.GET.getlist("cols") + request.GET.getlist("attrs"),
+            aggregator=request.GET.get("aggregator", "Count"),
+            vals=request.GET.getlist("vals"),
+        )
+    except pivot.PivotError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({"attributes": pivot.attributes(kind), "records": records})
+
+
+KANBAN_MIN_COLUMNS = 5
+KANBAN_PAGE_SIZE = 20
+
+
+def _kanban_filter(request):
     subsidiary_filter = get_global_filter(request)
     subsidiary = subsidiary_filter.form.cleaned_data.get("subsidiary", None)
 
-    filter_kwargs = {"state__in": Process.OPEN_STATE_VALUES}
+    processes = Process.objects.for_kanban().filter(state__in=Process.OPEN_STATE_VALUES)
     if subsidiary is not None:
-        filter_kwargs["subsidiary"] = subsidiary
-    processes = Process.objects.filter(**filter_kwargs)
-    processfilter = KanbanProcessFilter(request.GET, queryset=processes, subsidiary=subsidiary)
-    processes_by_rank = [[] for _ in range(DEFAULT_MIN_STEPS)]
+        processes = processes.filter(subsidiary=subsidiary)
+    return KanbanProcessFilter(request.GET, queryset=processes, subsidiary=subsidiary)
 
+
+def _kanban_card(p):
+    """Set display attributes of a process annotated by Process.objects.for_kanban"""
     WHITE = "#FFFFFF"
 
-    for p in processfilter.qs:
-        p.color = WHITE
-        p.url = p.get_absolute_url()
-        itw = Interview.objects.filter(process=p).last()
-        first_itw = Interview.objects.filter(process=p, prequalification=True).first()
-        rank = itw.rank if itw else 0
-        if first_itw:
-            rank = max(0, rank - 1)
-        if itw and itw.prequalification:
-            p.color = "#e7cbf5"
-
-        if rank >= len(processes_by_rank):
-            for k in range(len(processes_by_rank), rank + 1):
-                # init columns if more are needed
-                processes_by_rank.append([])
-
-        if itw and itw.planned_date:
-            planned_date = itw.planned_date.date()
-        else:
-            planned_date = _("Not planned")
+    p.url = p.get_absolute_url()
+    p.color = "#e7cbf5" if p.last_interview_prequalification else WHITE
+    p.band_color = p.contract_type.color if p.contract_type is not None else WHITE
+    p.name = p.candidate.name
+    p.sub_code = p.subsidiary.code
+    if p.last_interview_planned_date:
+        p.date = p.last_interview_planned_date.date()
+    else:
+        p.date = _("Not planned")
+    p.resp = sorted(p.last_interview_interviewers.split("\n")) if p.last_interview_interviewers else []
+    return p
+
+
+def _kanban_query_string(request):
+    params = request.GET.copy()
+    params.pop("page", None)
+    return params.urlencode()
+
 
-        p.band_color = WHITE
-        if p.contract_type is not None:
-            p.band_color = p.contract_type.color
+@login_required
+@require_http_methods(["GET"])
+def kanban(request):
+    processfilter = _kanban_filter(request)
+    processes = processfilter.qs
+
+    counters = dict(processes.order_by().values_list("kanban_column").annotate(count=Count("id")))
+    columns_count = max([KANBAN_MIN_COLUMNS] + [column + 1 for column in counters])
+    processes_by_rank = [[] for _ in range(columns_count)]
+
+    # only the first page of each column is rendered, next ones are loaded on demand by kanban_column
+    first_pages = (
+        processes.annotate(kanban_row=Window(RowNumber(), partition_by=F("kanban_column"), order_by=F("pk").asc()))
+        .filter(kanban_row__lte=KANBAN_PAGE_SIZE)
+        .order_by("kanban_column", "pk")
+    )
+    for p in first_pages:
+        processes_by_rank[p.kanban_column].append(_kanban_card(p))
 
-        p.name = p.candidate.name
-        p.sub_code = p.subsidiary.code
-        p.date = planned_date
-        p.resp = itw.interviewers.all() if itw else ""
-        processes_by_rank[rank].append(p)
+    columns = [
+        {
+            "rank": rank,
+            "processes": processes_list,
+            "count": counters.get(rank, 0),
+            "next_page": 2 if counters.get(rank, 0) > len(processes_list) else None,
+        }
+        for rank, processes_list in enumerate(processes_by_rank)
+    ]
 
-    legend = {}
-    contract_types = ContractType.objects.all()
-    for contract_type in contract_types:
-        legend[contract_type.name] = contract_type.color
+    legend = refdata.contract_type_colors()
 
-    counters = [len(processes_list) for processes_list in processes_by_rank]
     return render(
         request,
         "interview/kanban.html",
-        {"data": zip(processes_by_rank, counters), "filter": processfilter, "legend": legend},
+        {
+            "columns": columns,
+            "filter": processfilter,
+            "legend": legend,
+            "query_string": _kanban_query_string(request),
+        },
+    )
+
+
+@global_subsidiary_filter_exempt
+@login_required
+@require_http_methods(["GET"])
+def kanban_column(request, rank):
+    """Cards of a kanban column page, loaded from the kanban page"""
+    rank = int(rank)
+    processes = _kanban_filter(request).qs.filter(kanban_column=rank).order_by("pk")
+    page = Paginator(processes, KANBAN_PAGE_SIZE).get_page(request.GET.get("page"))
+
+    return render(
+        request,
+        "interview/kanban_cards.html",
+        {
+            "column": {
+                "rank": rank,
+                "processes": [_kanban_card(p) for p in page],
+                "next_page": page.next_page_number() if page.has_next() else None,
+            },
+            "query_string": _kanban_query_string(request),
+        },
     )
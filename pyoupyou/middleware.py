@@ -1,7 +1,8 @@
 from django.contrib.auth.middleware import RemoteUserMiddleware
 from django.http import HttpResponseForbidden
-from django.urls import resolve
+from django.utils.functional import SimpleLazyObject
 
+from interview import notifications
 from interview.views import get_global_filter
 from ref.models import PyouPyouUser
 
@@ -29,10 +30,28 @@ class ExternalCheckMiddleware:
 
 
 class GlobalSubsidiaryFilterMiddleware:
+    """
+    Keep the subsidiary selected in the navbar in session and apply it to pages
+
+    `request.subsidiaries_filter` is lazy, the filter form is only built when read. Admin, select2, feeds,
+    webhooks and ajax views (see interview.decorators.global_subsidiary_filter_exempt) are left untouched.
+    """
+
+    skipped_namespaces = ("admin", "django_select2")
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
+        request.subsidiaries_filter = SimpleLazyObject(lambda: get_global_filter(request))
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # resolver_match is set once the url is resolved, no need to resolve it again
+        if request.resolver_match.namespace in self.skipped_namespaces or getattr(
+            view_func, "global_subsidiary_filter_exempt", False
+        ):
+            return None
 
         request.session.setdefault("subsidiary", "")
 
@@ -44,13 +63,20 @@ class GlobalSubsidiaryFilterMiddleware:
                 subsidiary_id = ""
             request.session["subsidiary"] = subsidiary_id
 
-        # altering request.GET makes django-admin inaccessible
-        if resolve(request.path_info).namespace not in ("admin",):
-            # update current request.GET to match global filter
-            # this is useful to automatically apply the filter on views that previously had a filter
-            get_req = request.GET.copy()
-            get_req.setdefault("subsidiary", request.session["subsidiary"])
-            request.GET = get_req
+        # update current request.GET to match global filter
+        # this is useful to automatically apply the filter on views that previously had a filter
+        get_req = request.GET.copy()
+        get_req.setdefault("subsidiary", request.session["subsidiary"])
+        request.GET = get_req
+        return None
 
-        request.subsidiaries_filter = get_global_filter(request)
-        return self.get_response(request)
+
+class NotificationCollectorMiddleware:
+    """Send notifications triggered by a request once per object and event, see interview.notifications"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with notifications.collecting():
+            return self.get_response(request)
@@ -51,6 +51,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "pyoupyou.middleware.ExternalCheckMiddleware",
     "pyoupyou.middleware.GlobalSubsidiaryFilterMiddleware",
+    "pyoupyou.middleware.NotificationCollectorMiddleware",
 ]
 
 ROOT_URLCONF = "pyoupyou.urls"
@@ -67,6 +68,7 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "django.template.context_processors.request",
+                "interview.context_processors.reference_data",
             ]
         },
     }
@@ -123,3 +125,30 @@ DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 # Process analysis financial starting date.
 # It should only contain the month and day using '<month>-<day>' format.
 FINANCIAL_STARTING_MONTH_DAY = "07-01"
+
+# Reference data (subsidiaries, sources, offers...) and responsible rules are cached by each worker, changes are
+# seen at once by other workers only if CACHES default backend is shared between them, else after this many seconds.
+REFERENCE_DATA_MAX_AGE = 300
+# None caches them unless CACHES default backend is the local memory one, True or False forces it.
+REFERENCE_DATA_CACHE = None
+
+# Processes lists are cached per user until their processes change, or at most this many seconds as some
+# columns depend on the current date. See interview.listcache
+PROCESS_LIST_CACHE_TIMEOUT = 600
+# Changes are only seen by all workers if CACHES default backend is shared between them (database, memcached,
+# redis...). None caches lists unless the default backend is the local memory one, True or False forces it.
+PROCESS_LIST_CACHE = None
+
+# Notification emails are stored in an outbox and sent by ./manage.py send_notifications. Failed emails are retried
+# after this many seconds, doubled after each attempt, until NOTIFICATION_MAX_ATTEMPTS is reached.
+NOTIFICATION_RETRY_DELAY = 60
+NOTIFICATION_MAX_ATTEMPTS = 8
+# Emails of a batch are claimed by a worker for this many seconds while it sends them.
+NOTIFICATION_SEND_LEASE = 300
+
+# Recompute responsibles of open processes once responsible rules change or a user with rules is (de)activated.
+# See interview.responsibles, ./manage.py recompute_responsibles does it on demand.
+RESPONSIBLE_RECOMPUTE_ON_CHANGE = True
+
+# ./manage.py anonymize records the last anonymized candidate in this file to resume after an interruption.
+ANONYMIZE_CHECKPOINT_FILE = BASE_DIR / "anonymize.checkpoint"
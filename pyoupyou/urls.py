@@ -60,8 +60,13 @@ urlpatterns = [
     re_path(r"^reports/active-sources/$", views.active_sources, name="active-sources"),
     re_path(r"^reports/offers/$", views.offers, name="offers"),
     re_path(r"^reports/activity-summary/$", views.activity_summary, name="activity_summary"),
+    re_path(r"^reports/activity-summary/data/$", views.activity_summary_api, name="activity-summary-api"),
     re_path(r"^reports/pivotable/interviews/$", views.interviews_pivotable, name="interviews-pivotable"),
     re_path(r"^reports/pivotable/processes/$", views.processes_pivotable, name="processes-pivotable"),
+    re_path(r"^reports/pivotable/(?P<kind>interviews|processes)/data/$", views.pivotable_data, name="pivotable-data"),
+    re_path(r"^reports/export/processes.tsv$", views.export_processes_tsv, name="export-processes-tsv"),
+    re_path(r"^reports/export/interviews.tsv$", views.export_interviews_tsv, name="export-interviews-tsv"),
+    re_path(r"^notifications/$", views.notification_settings, name="notification-settings"),
     re_path(r"^candidate/(?P<process_id>\d+)/$", views.edit_candidate, name="candidate"),
     re_path(r"^candidate-reuse/(?P<candidate_id>\d+)/$", views.reuse_candidate, name="reuse_candidate"),
     re_path(r"^create_source/$", views.create_source_ajax, name="create_source"),
@@ -82,6 +87,7 @@ urlpatterns = [
     re_path(r"^select2/", include("django_select2.urls")),
     re_path(r"^search/", views.search, name="search"),
     re_path(r"^gantt/", views.gantt, name="gantt"),
+    re_path(r"^kanban/column/(?P<rank>\d+)/$", views.kanban_column, name="kanban-column"),
     re_path(r"^kanban/", views.kanban, name="kanban"),
 ]
 
@@ -7,7 +7,10 @@ from ref.models import Subsidiary, PyouPyouUser
 
 class PyouPyouUserAdmin(UserAdmin):
     fieldsets = (
-        (_("Personal info"), {"fields": ("full_name", "trigramme", "password", "email", "company")}),
+        (
+            _("Personal info"),
+            {"fields": ("full_name", "trigramme", "password", "email", "company", "notification_frequency")},
+        ),
         (
             _("Permissions"),
             {
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-17 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ref", "0016_delete_consultant"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pyoupyouuser",
+            name="notification_frequency",
+            field=models.CharField(
+                choices=[("immediate", "Immediately"), ("hourly", "Hourly digest"), ("daily", "Daily digest")],
+                default="immediate",
+                help_text="Notifications can be grouped in an hourly or daily digest email",
+                max_length=10,
+                verbose_name="Notification emails",
+            ),
+        ),
+    ]
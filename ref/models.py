@@ -83,6 +83,11 @@ class PyouPyouUser(AbstractBaseUser, PermissionsMixin):
         EXTERNAL_FULL = 3, _("User is an external consultant")
         EXTERNAL_READONLY = 4, _("User is external and has only read rights")
 
+    class NotificationFrequency(models.TextChoices):
+        IMMEDIATE = "immediate", _("Immediately")
+        HOURLY = "hourly", _("Hourly digest")
+        DAILY = "daily", _("Daily digest")
+
     trigramme = models.CharField(max_length=40, unique=True)
     full_name = models.CharField(_("full name"), max_length=50, blank=True)
     email = models.EmailField(_("email address"), blank=True)
@@ -119,6 +124,13 @@ class PyouPyouUser(AbstractBaseUser, PermissionsMixin):
         default=PrivilegeLevel.ALL,
         help_text=_("Designates what a user can or cannot do"),
     )
+    notification_frequency = models.CharField(
+        max_length=10,
+        choices=NotificationFrequency.choices,
+        default=NotificationFrequency.IMMEDIATE,
+        verbose_name=_("Notification emails"),
+        help_text=_("Notifications can be grouped in an hourly or daily digest email"),
+    )
 
     objects = PyouPyouUserManager()
 